@@ -1,31 +1,36 @@
 # Restaurante.py - Aplicación principal
 # Correcciones aplicadas: 
 # - llamadas correctas a Menu.disponibles_segun_stock(self.stock)
-# - sin uso incorrecto de self.db en lógica local
+# - sin uso incorrecto de la base de datos en lógica local
+# - cada acción abre su propia sesión corta (self._sesion())
 # - compatibilidad total con Stock, Menu, Pedido
 # - visualización intacta
 
-import os, csv, tempfile
+import os, tempfile
 import re
+import threading
 import customtkinter as ctk
 from typing import Dict
 from tkinter import ttk, filedialog, messagebox
-from PIL import Image, ImageTk
-import fitz  # PyMuPDF
 
 from logic.Stock import Stock
 from logic.Menu import poblar_db_con_menus_estaticos
 from logic.Pedido import Pedido
-from utils.Menupdf import generar_carta_pdf
-from utils.Boleta import Boleta
+# PIL, fitz (PyMuPDF), reportlab (utils.Boleta / utils.Menupdf) y matplotlib
+# (graficos) se importan dentro de las funciones que los usan: así la
+# ventana aparece sin esperar bibliotecas que muchos turnos nunca usan
 import models
-import graficos
 
 APP_W, APP_H = 1200, 640
+# Filas del CSV que se muestran en la pestaña de carga (el resto no se lee)
+FILAS_VISTA_PREVIA_CSV = 200
+TAMANO_MINIATURA = (110, 82)
 
 class RestauranteApp(ctk.CTk):
-    def __init__(self, db=None):
-        self.db = db
+    def __init__(self, sesiones=None):
+        # Proveedor de sesiones (database.unidad_de_trabajo): cada acción de la
+        # interfaz abre una sesión corta que se cierra al terminar
+        self.sesiones = sesiones
         super().__init__()
         self.title("Restaurante - Evaluación 2")
         self.geometry(f"{APP_W}x{APP_H}")
@@ -35,103 +40,113 @@ class RestauranteApp(ctk.CTk):
         ctk.set_default_color_theme("blue")
 
         self.stock = Stock()
-        self.pedido = Pedido(self.stock, db=self.db)
+        self.pedido = Pedido(self.stock, sesiones=self.sesiones)
 
         self.img_dir = os.path.join(os.path.dirname(__file__), "img")
-        self.menu_images = self._cargar_imagenes_menus()
+        self.menu_images = {}  # se cargan al construir la pestaña Pedido
 
-        self.tabs = ctk.CTkTabview(self, width=APP_W - 20, height=APP_H - 40)
+        self._carta_temp_pdf = None
+        self._boleta_temp_pdf = None
+        self._menu_interno = None  # Menús disponibles según stock
+        self._carga_clientes = 0  # aumenta en cada refresco de la tabla de clientes
+        self._cliente_pedido = None  # (correo normalizado, id) del cliente del carrito
+        self._menu_cargado = None  # (nombre, version) del menú cargado en el formulario
+
+        self.tabs = ctk.CTkTabview(self, width=APP_W - 20, height=APP_H - 40, command=self._al_mostrar_pestana)
         self.tabs.pack(padx=10, pady=10)
 
+        # Cada pestaña se construye la primera vez que se abre y sus datos se
+        # leen cada vez que se muestra: el arranque ya no crece con la
+        # cantidad de clientes o ingredientes
         # Orden: Carga, Stock, Carta, Clientes, Pedido, Boleta, Gráficos
-        for nombre in ("Carga de ingredientes", "Stock", "Carta restaurant", "Clientes", "Pedido", "Boleta", "Gráficos"):
+        self._constructores = {
+            "Carga de ingredientes": self._init_tab_csv,
+            "Stock": self._init_tab_stock,
+            "Carta restaurant": self._init_tab_carta,
+            "Clientes": self._init_tab_clientes,
+            "Pedido": self._init_tab_pedido,
+            "Boleta": self._init_tab_boleta,
+            "Gráficos": self._init_tab_graficos,
+        }
+        self._al_mostrar = {
+            "Stock": (self._refrescar_stock,),
+            "Carta restaurant": (self._actualizar_menu_selector, self._refrescar_ingredientes_carta),
+            "Clientes": (self._refrescar_clientes,),
+            "Pedido": (self._refrescar_pedido_cards, self._refrescar_pedido_tree),
+        }
+        self._pestanas_construidas = set()
+        for nombre in self._constructores:
             self.tabs.add(nombre)
 
-        self._init_tab_csv()
-        self._init_tab_stock()
-        self._init_tab_carta()
-        self._init_tab_clientes()
-        self._init_tab_pedido()
-        self._init_tab_boleta()
-        self._init_tab_graficos()
-
-        self._carta_temp_pdf = None
-        self._boleta_temp_pdf = None
-        self._menu_interno = None  # Menús disponibles según stock
+        # Solo la pestaña visible al abrir
+        self._al_mostrar_pestana()
 
 
     # ==========================================
     # UTILIDADES
     # ==========================================
 
-    def _cargar_imagenes_menus(self):
-        imgs = {}
-        search_dirs = []
+    def _sesion(self):
+        return self.sesiones()
 
-        if os.path.isdir(self.img_dir):
-            search_dirs.append(self.img_dir)
-
-        root_dir = os.path.dirname(__file__)
-        if root_dir not in search_dirs:
-            search_dirs.append(root_dir)
-
-        def candidate_paths_in_dir(name_base: str, dir_path: str):
-            exts = [".png", ".jpg", ".jpeg"]
-            variants = [
-                name_base.lower(),
-                name_base.lower().replace(" ", "_"),
-                name_base.lower().replace(" ", "-"),
-                name_base.lower().replace(" ", "")
-            ]
-            for v in variants:
-                for e in exts:
-                    yield os.path.join(dir_path, f"{v}{e}")
-
-        files = []
-        for d in search_dirs:
+    def _al_mostrar_pestana(self):
+        nombre = self.tabs.get()
+        if nombre not in self._pestanas_construidas:
+            self._constructores[nombre]()
+            self._pestanas_construidas.add(nombre)
+        for refrescar in self._al_mostrar.get(nombre, ()):
+            refrescar()
+
+    def _pestana_construida(self, nombre):
+        # Los refrescos de una pestaña que aún no se abre no hacen nada:
+        # sus datos se leen al mostrarla
+        return nombre in self._pestanas_construidas
+
+    def _cargar_imagenes_menus(self):
+        """
+        Decodifica las miniaturas en un pool de hilos (utils.Miniaturas, con
+        caché en disco) y crea los CTkImage en el hilo de Tk al terminar.
+        Las tarjetas del pedido se muestran de inmediato y reciben su imagen
+        cuando está lista.
+        """
+        rutas = self._buscar_imagenes_menus()
+        if not rutas:
+            return
+        try:
+            from utils.Miniaturas import decodificar_miniaturas
+        except ImportError:
+            return  # sin Pillow: tarjetas sin imagen
+        pendientes = decodificar_miniaturas(rutas, TAMANO_MINIATURA)
+        self.after(50, self._recibir_miniaturas, pendientes)
+
+    def _recibir_miniaturas(self, pendientes):
+        if not all(f.done() for f in pendientes.values()):
+            self.after(50, self._recibir_miniaturas, pendientes)
+            return
+        for nombre, futuro in pendientes.items():
             try:
-                for f in os.listdir(d):
-                    if os.path.isfile(os.path.join(d, f)):
-                        files.append((d, f))
+                pil_img = futuro.result()
             except Exception:
                 continue
+            self.menu_images[nombre] = ctk.CTkImage(pil_img, size=TAMANO_MINIATURA)
+        self._refrescar_pedido_cards()
 
-        # Obtener nombres de menús desde la base de datos
-        from crud.menu_crud import listar_menus
-        nombres_menus = [m.nombre for m in listar_menus(self.db)]
-
-        for m in nombres_menus:
-            found = None
-            base = m.strip().lower()
-
-            for d in search_dirs:
-                for p in candidate_paths_in_dir(base, d):
-                    if os.path.exists(p):
-                        found = p
-                        break
-                if found:
-                    break
-
-            if not found:
-                tokens = [t for t in base.replace("-", " ").replace("_", " ").split() if len(t) > 2]
-                for d, f in files:
-                    lf = f.lower()
-                    for tok in tokens:
-                        if tok in lf:
-                            found = os.path.join(d, f)
-                            break
-                    if found:
-                        break
-
-            if found:
-                try:
-                    pil_img = Image.open(found).convert("RGBA")
-                    pil_img = pil_img.resize((110, 82), Image.LANCZOS)
-                    imgs[m] = ctk.CTkImage(pil_img, size=(110, 82))
-                except:
-                    pass
+    def _buscar_imagenes_menus(self):
+        """Retorna {nombre_menu: ruta_imagen} para los menús que tienen imagen."""
+        if not self.sesiones:
+            return {}
+        # La carpeta de la aplicación solo se usa si no existe img/: su mtime
+        # cambia cada vez que SQLite crea o borra restaurante.db-wal
+        if os.path.isdir(self.img_dir):
+            search_dirs = [self.img_dir]
+        else:
+            search_dirs = [os.path.dirname(os.path.abspath(__file__))]
 
-        return imgs
+        # La ruta de cada menú queda guardada en Menu.imagen; los directorios
+        # solo se vuelven a recorrer si cambia su mtime
+        from utils.ImagenesMenu import resolver_imagenes
+        with self._sesion() as db:
+            return resolver_imagenes(db, search_dirs)
 
 
     def _estilizar_tree(self, tree):
@@ -164,7 +179,20 @@ class RestauranteApp(ctk.CTk):
         bar.pack(fill="x", pady=8)
 
         ctk.CTkButton(bar, text="Cargar CSV", command=self.cargar_csv).pack(side="left", padx=6)
-        ctk.CTkButton(bar, text="Agregar al Stock", command=self.agregar_csv_a_stock).pack(side="left", padx=6)
+        self.btn_agregar_csv = ctk.CTkButton(bar, text="Agregar al Stock", command=self.agregar_csv_a_stock)
+        self.btn_agregar_csv.pack(side="left", padx=6)
+
+        # Progreso de la importación (el archivo se lee por partes en un hilo)
+        self.btn_cancelar_csv = ctk.CTkButton(
+            bar, text="Cancelar", state="disabled", command=self._cancelar_importacion_csv
+        )
+        self.btn_cancelar_csv.pack(side="right", padx=6)
+        self.barra_csv = ctk.CTkProgressBar(bar, width=220)
+        self.barra_csv.set(0)
+        self.barra_csv.pack(side="right", padx=6)
+        self.lbl_csv_estado = ctk.CTkLabel(bar, text="")
+        self.lbl_csv_estado.pack(side="right", padx=6)
+        self._cancelar_csv = threading.Event()
 
         self.tree_csv = ttk.Treeview(
             f, columns=("nombre", "unidad", "cantidad"),
@@ -192,39 +220,25 @@ class RestauranteApp(ctk.CTk):
         if not ruta:
             return
 
-        with open(ruta, newline="", encoding="utf-8-sig") as f:
-            rows = list(csv.reader(f))
+        # Solo se muestran las primeras filas; el archivo completo se lee por
+        # partes recién al agregarlo al stock
+        from utils.LectorCSV import LectorCSV
+        rows = LectorCSV(ruta, ("nombre", "unidad", "cantidad")).vista_previa(FILAS_VISTA_PREVIA_CSV)
 
         if not rows:
             messagebox.showerror("Error", "CSV vacío.")
             return
 
-        hdr = [h.strip().lower() for h in rows[0]]
-
-        def idx(c):
-            return hdr.index(c) if c in hdr else None
-
-        iN, iU, iC = idx("nombre"), idx("unidad"), idx("cantidad")
-
-        if None in (iN, iU, iC):
-            iN, iU, iC = 0, 1, 2
-
         for i in self.tree_csv.get_children():
             self.tree_csv.delete(i)
 
-        for k, r in enumerate(rows[1:]):
-            if not r:
-                continue
-
-            vals = [
-                (r[iN] if iN < len(r) else "").strip(),
-                (r[iU] if iU < len(r) else "").strip(),
-                (r[iC] if iC < len(r) else "0").strip().replace(",", "."),
-            ]
-
+        for k, (nombre, unidad, cant) in enumerate(rows):
+            vals = [nombre, unidad, (cant or "0").replace(",", ".")]
             self.tree_csv.insert("", "end", values=vals, tags=("even" if k % 2 == 0 else "odd",))
 
         self.csv_path = ruta
+        self.barra_csv.set(0)
+        self.lbl_csv_estado.configure(text=f"Vista previa: primeras {len(rows)} filas")
 
 
     def agregar_csv_a_stock(self):
@@ -232,27 +246,91 @@ class RestauranteApp(ctk.CTk):
             messagebox.showwarning("Atención", "Primero cargue un CSV.")
             return
 
-
-        with open(self.csv_path, newline="", encoding="utf-8-sig") as f:
-            reader = csv.DictReader(f)
-            if self.db:
-                from crud.ingrediente_crud import crear_ingrediente
-            for row in reader:
-                nombre = (row.get("nombre") or "").strip().lower()
-                unidad = (row.get("unidad") or "").strip()
-                cant = (row.get("cantidad") or "0").strip().replace(",", ".")
+        from crud.ingrediente_crud import importar_ingredientes
+        from utils.LectorCSV import LectorCSV
+
+        lector = LectorCSV(self.csv_path, ("nombre", "unidad", "cantidad"))
+        cancelar = self._cancelar_csv
+        cancelar.clear()
+        # Lo que se suma al stock en memoria se acumula por ingrediente y se
+        # aplica solo si la importación termina bien
+        sumas = {}
+        resultado = {}
+
+        def filas_csv():
+            for nombre, unidad, cant in lector.filas():
+                if cancelar.is_set():
+                    # Aborta la transacción: no se guarda ninguna fila
+                    raise RuntimeError("Importación cancelada")
+                nombre = nombre.lower()
+                cant = (cant or "0").replace(",", ".")
 
                 try:
                     cant = float(cant)
                 except:
-                    cant = float((cant.lower().replace("x", "") or 0))
+                    try:
+                        cant = float((cant.lower().replace("x", "") or 0))
+                    except ValueError:
+                        cant = None
+
+                if nombre and cant is not None:
+                    unidad_prev, total = sumas.get(nombre, (unidad, 0))
+                    sumas[nombre] = (unidad_prev, total + cant)
+                yield nombre, unidad, cant
+
+        def importar():
+            # Una sola transacción con upserts por lote (importar_ingredientes)
+            with self._sesion() as db:
+                resultado["resumen"] = importar_ingredientes(db, filas_csv())
+
+        hilo = threading.Thread(target=importar, daemon=True)
+        self.btn_agregar_csv.configure(state="disabled")
+        self.btn_cancelar_csv.configure(state="normal")
+        self.lbl_csv_estado.configure(text="Importando...")
+        hilo.start()
+        self.after(100, self._vigilar_importacion_csv, hilo, lector, sumas, resultado)
+
+
+    def _cancelar_importacion_csv(self):
+        self._cancelar_csv.set()
+        self.btn_cancelar_csv.configure(state="disabled")
+        self.lbl_csv_estado.configure(text="Cancelando...")
+
+
+    def _vigilar_importacion_csv(self, hilo, lector, sumas, resultado):
+        # Tkinter solo se toca desde el hilo principal: se consulta el avance
+        # del hilo de importación cada 100 ms
+        self.barra_csv.set(lector.progreso())
+        if hilo.is_alive():
+            self.after(100, self._vigilar_importacion_csv, hilo, lector, sumas, resultado)
+            return
 
-                if nombre:
-                    self.stock.agregar_o_sumar(nombre, unidad, cant)
-                    if self.db:
-                        crear_ingrediente(self.db, nombre, unidad, cant)
+        self.btn_agregar_csv.configure(state="normal")
+        self.btn_cancelar_csv.configure(state="disabled")
+        # El resultado manda: si Cancelar llegó después de la última fila la
+        # importación ya hizo commit y hay que reflejarla en el stock en memoria
+        resumen = resultado.get("resumen")
 
-        messagebox.showinfo("OK", "Ingredientes cargados al stock y base de datos.")
+        if resumen is None and self._cancelar_csv.is_set():
+            self.barra_csv.set(0)
+            self.lbl_csv_estado.configure(text="Importación cancelada")
+            messagebox.showinfo("Cancelado", "Importación cancelada; no se guardaron cambios.")
+            return
+        if resumen is None:
+            self.lbl_csv_estado.configure(text="Error en la importación")
+            messagebox.showerror("Error", "No se pudo importar el CSV; no se guardaron cambios.")
+            return
+
+        for nombre, (unidad, cant) in sumas.items():
+            self.stock.agregar_o_sumar(nombre, unidad, cant)
+        self.barra_csv.set(1)
+        self.lbl_csv_estado.configure(text="Importación completa")
+        messagebox.showinfo(
+            "OK",
+            "Ingredientes cargados al stock y base de datos.\n"
+            f"Nuevos: {resumen['insertados']}  Actualizados: {resumen['actualizados']}  "
+            f"Rechazados: {resumen['rechazados']}"
+        )
         self._refrescar_stock()
         self._refrescar_pedido_cards()
 
@@ -342,9 +420,16 @@ class RestauranteApp(ctk.CTk):
             messagebox.showwarning("Atención", "Ingrese una cantidad positiva.")
             return
         # Guardar en la base de datos
-        if self.db:
+        if self.sesiones:
             from crud.ingrediente_crud import crear_ingrediente
-            ingr = crear_ingrediente(self.db, nombre, unidad, cantidad)
+            from database import ConflictoVersion
+            with self._sesion() as db:
+                try:
+                    ingr = crear_ingrediente(db, nombre, unidad, cantidad)
+                except ConflictoVersion:
+                    messagebox.showerror("Error", "Otra terminal modificó el ingrediente; vuelva a intentarlo.")
+                    self._refrescar_stock()
+                    return
             if ingr is None:
                 messagebox.showerror("Error", "No se pudo agregar o actualizar el ingrediente en la base de datos.")
         # También mantener en memoria para lógica local
@@ -356,18 +441,20 @@ class RestauranteApp(ctk.CTk):
         if not nombre or precio is None or precio <= 0:
             messagebox.showwarning("Atención", "Nombre y precio válidos requeridos.")
             return None
-        if self.db:
+        if self.sesiones:
             from crud.menu_crud import crear_menu
-            menu = crear_menu(self.db, nombre, precio)
+            with self._sesion() as db:
+                menu = crear_menu(db, nombre, precio)
             if menu is None:
                 messagebox.showerror("Error", "No se pudo crear el menú en la base de datos.")
             return menu
         return None
 
     def _carta_agregar_ingrediente_a_menu(self, menu_id, ingrediente_id, cantidad):
-        if self.db:
+        if self.sesiones:
             from crud.menu_crud import agregar_ingrediente_a_menu
-            ok = agregar_ingrediente_a_menu(self.db, menu_id, ingrediente_id, cantidad)
+            with self._sesion() as db:
+                ok = agregar_ingrediente_a_menu(db, menu_id, ingrediente_id, cantidad)
             if not ok:
                 messagebox.showerror("Error", "No se pudo asociar el ingrediente al menú en la base de datos.")
 
@@ -380,9 +467,10 @@ class RestauranteApp(ctk.CTk):
             return
         nombre = self.tree_stock.item(sel[0], "values")[0]
         self.stock.eliminar(nombre)
-        if self.db:
+        if self.sesiones:
             from crud.ingrediente_crud import eliminar_ingrediente
-            eliminar_ingrediente(self.db, nombre)
+            with self._sesion() as db:
+                eliminar_ingrediente(db, nombre)
         self._refrescar_stock()
         self._refrescar_pedido_cards()
 
@@ -411,6 +499,8 @@ class RestauranteApp(ctk.CTk):
 
 
     def _refrescar_stock(self):
+        if not self._pestana_construida("Stock"):
+            return
         for i in self.tree_stock.get_children():
             self.tree_stock.delete(i)
 
@@ -428,12 +518,15 @@ class RestauranteApp(ctk.CTk):
 
     def _generar_menu_interno(self):
         # Calcula qué menús pueden prepararse con el stock actual usando la base de datos
-        from crud.menu_crud import listar_menus, requerimientos_menu
-        menus = listar_menus(self.db)
+        from crud.menu_crud import listar_menus, requerimientos_menus
+        with self._sesion() as db:
+            menus = listar_menus(db)
+            recetas = requerimientos_menus(db, [menu.id for menu in menus])
+        reqs_por_menu = {menu.nombre: recetas[menu.id] for menu in menus}
         disp = []
         no_disp = []
         for menu in menus:
-            reqs = requerimientos_menu(self.db, menu.id)
+            reqs = reqs_por_menu[menu.nombre]
             if self.stock.validar_stock(reqs):
                 disp.append(menu.nombre)
             else:
@@ -441,7 +534,7 @@ class RestauranteApp(ctk.CTk):
         self._menu_interno = disp  # 💾 SE GUARDA AQUÍ
 
         for m in no_disp:
-            reqs = requerimientos_menu(self.db, next(menu.id for menu in menus if menu.nombre == m))
+            reqs = reqs_por_menu[m]
             faltas = self.stock.faltantes(reqs)
             if faltas:
                 txt = ", ".join([f"{i} (req {r:g}, disp {d:g})" for i, r, d in faltas])
@@ -474,17 +567,14 @@ class RestauranteApp(ctk.CTk):
             command=self._generar_y_ver_carta
         ).pack(side="left", padx=6)
 
-        # Selector de menú
-        if self.db:
-            from crud.menu_crud import listar_menus
+        # Selector de menú (las opciones se cargan al mostrar la pestaña)
+        if self.sesiones:
             self.menu_selector_var = ctk.StringVar()
-            self._actualizar_menu_selector()
+            self.menu_selector = ctk.CTkComboBox(bar, values=[], variable=self.menu_selector_var, width=200, state="readonly")
             self.menu_selector.pack(side="left", padx=8)
 
         # Formulario de creación/edición de menú
-        if self.db:
-            # Mostrar TODOS los ingredientes, sin importar el stock
-            ingredientes = [i.nombre for i in self.db.query(models.Ingrediente).all()]
+        if self.sesiones:
             form = ctk.CTkFrame(f)
             form.pack(fill="x", padx=8, pady=4)
             ctk.CTkLabel(form, text="Nombre menú:").grid(row=0, column=0, padx=4, pady=2, sticky="w")
@@ -497,7 +587,7 @@ class RestauranteApp(ctk.CTk):
             self.var_menu_descripcion = ctk.StringVar()
             ctk.CTkEntry(form, textvariable=self.var_menu_descripcion, width=320).grid(row=1, column=1, columnspan=3, padx=4, sticky="w")
             ctk.CTkLabel(form, text="Ingrediente:").grid(row=2, column=0, padx=4, pady=2, sticky="w")
-            self.ingredientes_listbox = ctk.CTkComboBox(form, values=ingredientes, width=180, state="readonly")
+            self.ingredientes_listbox = ctk.CTkComboBox(form, values=[], width=180, state="readonly")
             self.ingredientes_listbox.grid(row=2, column=1, padx=4, sticky="w")
             ctk.CTkLabel(form, text="Cantidad:").grid(row=2, column=2, padx=4, sticky="w")
             self.var_ing_cantidad = ctk.StringVar()
@@ -528,12 +618,21 @@ class RestauranteApp(ctk.CTk):
         self._carta_img_container = [None]
 
     def _actualizar_menu_selector(self):
-        from crud.menu_crud import listar_menus
-        menus = [m.nombre for m in listar_menus(self.db)]
-        if hasattr(self, 'menu_selector'):
-            self.menu_selector.configure(values=menus)
-        else:
-            self.menu_selector = ctk.CTkComboBox(self.tabs.tab("Carta restaurant").winfo_children()[0], values=menus, variable=self.menu_selector_var, width=200, state="readonly")
+        if not self.sesiones or not self._pestana_construida("Carta restaurant"):
+            return
+        from crud.menu_crud import iterar_menus
+        with self._sesion() as db:
+            menus = [m.nombre for m in iterar_menus(db)]
+        self.menu_selector.configure(values=menus)
+
+    def _refrescar_ingredientes_carta(self):
+        if not self.sesiones or not self._pestana_construida("Carta restaurant"):
+            return
+        # Mostrar TODOS los ingredientes, sin importar el stock
+        from crud.ingrediente_crud import iterar_ingredientes
+        with self._sesion() as db:
+            ingredientes = [i.nombre for i in iterar_ingredientes(db, solo_con_stock=False)]
+        self.ingredientes_listbox.configure(values=ingredientes)
 
     def _agregar_ingrediente_a_nuevo_menu(self):
         nombre = self.ingredientes_listbox.get()
@@ -550,7 +649,8 @@ class RestauranteApp(ctk.CTk):
             return
         # Validar existencia y stock suficiente
         from crud.ingrediente_crud import obtener_por_nombre
-        ing = obtener_por_nombre(self.db, nombre)
+        with self._sesion() as db:
+            ing = obtener_por_nombre(db, nombre)
         if not ing:
             messagebox.showerror("Error", "Ingrediente no existe.")
             return
@@ -565,6 +665,7 @@ class RestauranteApp(ctk.CTk):
     def _limpiar_formulario_menu(self):
         self.var_menu_nombre.set("")
         self.var_menu_precio.set("")
+        self._menu_cargado = None
         self.lista_ingredientes_menu = []
         self.ingredientes_menu_label.configure(text="Ingredientes del menú: []")
 
@@ -579,28 +680,34 @@ class RestauranteApp(ctk.CTk):
             messagebox.showwarning("Atención", "Complete nombre, precio, descripción y al menos un ingrediente.")
             return
         # Crear o actualizar menú
-        from crud.menu_crud import crear_menu, obtener_menu_por_nombre, agregar_ingrediente_a_menu
+        from crud.menu_crud import guardar_menu, agregar_ingrediente_a_menu
         from crud.ingrediente_crud import obtener_por_nombre
-        menu = obtener_menu_por_nombre(self.db, nombre)
-        if not menu:
-            menu = crear_menu(self.db, nombre, precio)
-            menu.descripcion = descripcion
-        else:
-            menu.precio = precio
-            menu.descripcion = descripcion
-            self.db.commit()
-        # Limpiar ingredientes previos
-        for rel in list(menu.ingredientes):
-            self.db.delete(rel)
-        self.db.commit()
-        # Agregar ingredientes nuevos (uso de filter y reduce)
         from functools import reduce
+        from database import ConflictoVersion
         ingredientes_validos = list(filter(lambda x: x[1] > 0, self.lista_ingredientes_menu))
-        for nombre_ing, cantidad in ingredientes_validos:
-            ing = obtener_por_nombre(self.db, nombre_ing)
-            if ing:
-                agregar_ingrediente_a_menu(self.db, menu.id, ing.id, cantidad)
-        self.db.commit()
+        # Si el menú se cargó en el formulario, solo se guarda si nadie lo
+        # modificó desde entonces
+        version = None
+        if self._menu_cargado and self._menu_cargado[0] == nombre:
+            version = self._menu_cargado[1]
+        with self._sesion() as db:
+            try:
+                menu = guardar_menu(db, nombre, precio, descripcion, version=version)
+            except ConflictoVersion:
+                messagebox.showerror("Error", "Otra terminal modificó el menú; vuelva a cargarlo.")
+                return
+            if not menu:
+                messagebox.showerror("Error", "No se pudo guardar el menú.")
+                return
+            # Limpiar ingredientes previos
+            for rel in list(menu.ingredientes):
+                db.delete(rel)
+            db.commit()
+            # Agregar ingredientes nuevos (uso de filter y reduce)
+            for nombre_ing, cantidad in ingredientes_validos:
+                ing = obtener_por_nombre(db, nombre_ing)
+                if ing:
+                    agregar_ingrediente_a_menu(db, menu.id, ing.id, cantidad)
         # Uso de reduce para contar total de ingredientes
         total_ings = reduce(lambda acc, x: acc + 1, ingredientes_validos, 0)
         self._limpiar_formulario_menu()
@@ -612,27 +719,29 @@ class RestauranteApp(ctk.CTk):
         messagebox.showinfo("OK", f"Menú guardado con {total_ings} ingredientes y carta actualizada.")
 
     def _cargar_menu_seleccionado(self):
-        if not self.db:
+        if not self.sesiones:
             return
         menu_nombre = self.menu_selector_var.get()
         if not menu_nombre:
             messagebox.showwarning("Atención", "Seleccione un menú.")
             return
         from crud.menu_crud import obtener_menu_por_nombre, ingredientes_de_menu
-        menu = obtener_menu_por_nombre(self.db, menu_nombre)
+        with self._sesion() as db:
+            menu = obtener_menu_por_nombre(db, menu_nombre)
+            ingredientes = ingredientes_de_menu(db, menu.id) if menu else []
         if not menu:
             messagebox.showerror("Error", "No se encontró el menú.")
             return
         self.var_menu_nombre.set(menu.nombre)
         self.var_menu_precio.set(str(menu.precio))
-        ingredientes = ingredientes_de_menu(self.db, menu.id)
+        self._menu_cargado = (menu.nombre, menu.version)
         self.lista_ingredientes_menu = [(n, c) for n, c, u in ingredientes]
         txt = ", ".join(map(lambda x: f"{x[0]}: {x[1]:g}", self.lista_ingredientes_menu))
         self.ingredientes_menu_label.configure(text=f"Ingredientes del menú: [{txt}]")
 
 
     def _mostrar_ingredientes_menu(self):
-        if not self.db:
+        if not self.sesiones:
             messagebox.showerror("Error", "No hay conexión a la base de datos.")
             return
         menu_nombre = self.menu_selector_var.get()
@@ -640,11 +749,12 @@ class RestauranteApp(ctk.CTk):
             messagebox.showwarning("Atención", "Seleccione un menú.")
             return
         from crud.menu_crud import obtener_menu_por_nombre, ingredientes_de_menu
-        menu = obtener_menu_por_nombre(self.db, menu_nombre)
+        with self._sesion() as db:
+            menu = obtener_menu_por_nombre(db, menu_nombre)
+            ingredientes = ingredientes_de_menu(db, menu.id) if menu else []
         if not menu:
             messagebox.showerror("Error", "No se encontró el menú.")
             return
-        ingredientes = ingredientes_de_menu(self.db, menu.id)
         if not ingredientes:
             msg = "Este menú no tiene ingredientes asociados."
         else:
@@ -660,16 +770,18 @@ class RestauranteApp(ctk.CTk):
         ctk.CTkButton(top, text="Cerrar", command=top.destroy).pack(pady=8)
 
     def _ui_listar_menus(self):
-        if not self.db:
+        if not self.sesiones:
             return []
-        from crud.menu_crud import listar_menus
-        return [m.nombre for m in listar_menus(self.db)]
+        from crud.menu_crud import iterar_menus
+        with self._sesion() as db:
+            return [m.nombre for m in iterar_menus(db)]
 
     def _ui_listar_ingredientes(self):
-        if not self.db:
+        if not self.sesiones:
             return []
-        from crud.ingrediente_crud import listar_ingredientes
-        return [i.nombre for i in listar_ingredientes(self.db)]
+        from crud.ingrediente_crud import iterar_ingredientes
+        with self._sesion() as db:
+            return [i.nombre for i in iterar_ingredientes(db)]
 
     def _ui_agregar_menu(self):
         nombre = self.var_menu_nombre.get().strip()
@@ -696,11 +808,12 @@ class RestauranteApp(ctk.CTk):
         # Buscar IDs
         menu_id = None
         ingr_id = None
-        if self.db:
+        if self.sesiones:
             from crud.menu_crud import obtener_menu_por_nombre
             from crud.ingrediente_crud import obtener_por_nombre
-            menu = obtener_menu_por_nombre(self.db, menu_nombre)
-            ingr = obtener_por_nombre(self.db, ingr_nombre)
+            with self._sesion() as db:
+                menu = obtener_menu_por_nombre(db, menu_nombre)
+                ingr = obtener_por_nombre(db, ingr_nombre)
             if menu: menu_id = menu.id
             if ingr: ingr_id = ingr.id
         if menu_id and ingr_id:
@@ -712,17 +825,19 @@ class RestauranteApp(ctk.CTk):
 
     def _generar_y_ver_carta(self):
         # Mostrar todos los menús registrados en la base de datos
-        if not self.db:
+        if not self.sesiones:
             messagebox.showwarning("Atención", "No hay conexión a la base de datos.")
             return
-        from crud.menu_crud import listar_menus
-        menus = [m.nombre for m in listar_menus(self.db)]
-        if not menus:
-            messagebox.showwarning("Atención", "No hay menús registrados.")
-            return
-        fd, ruta = tempfile.mkstemp(suffix=".pdf")
-        os.close(fd)
-        generar_carta_pdf(ruta, menus, self.db)
+        from crud.menu_crud import iterar_menus
+        with self._sesion() as db:
+            menus = [m.nombre for m in iterar_menus(db)]
+            if not menus:
+                messagebox.showwarning("Atención", "No hay menús registrados.")
+                return
+            from utils.Menupdf import generar_carta_pdf
+            fd, ruta = tempfile.mkstemp(suffix=".pdf")
+            os.close(fd)
+            generar_carta_pdf(ruta, menus, db)
         self._carta_temp_pdf = ruta
         self._render_pdf(ruta, self.carta_canvas, self._carta_img_container)
 
@@ -734,6 +849,8 @@ class RestauranteApp(ctk.CTk):
     def _init_tab_pedido(self):
 
         f = self.tabs.tab("Pedido")
+        # Las miniaturas solo se usan en las tarjetas de esta pestaña
+        self._cargar_imagenes_menus()
 
         topbar = ctk.CTkFrame(f)
         topbar.pack(fill="x", pady=(8, 0))
@@ -793,34 +910,25 @@ class RestauranteApp(ctk.CTk):
             return
 
         try:
-            with open(ruta, newline="", encoding="utf-8-sig") as f:
-                rows = list(csv.reader(f))
-
-            if not rows:
+            # El archivo se recorre fila a fila, sin cargarlo completo en memoria
+            from utils.LectorCSV import LectorCSV
+            lector = LectorCSV(ruta, ("menu", "cantidad"))
+            if not lector.total_bytes:
                 messagebox.showerror("Error", "Archivo vacío.")
                 return
 
-            hdr = [h.strip().lower() for h in rows[0]]
-
-            def idx(c): return hdr.index(c) if c in hdr else None
-
-            iM, iC = idx("menu"), idx("cantidad")
-            if None in (iM, iC):
-                iM, iC = 0, 1
-
             self.pedido.vaciar_pedido()
 
-            for r in rows[1:]:
-                if not r:
-                    continue
-                menu = (r[iM] if iM < len(r) else "").strip()
+            from crud.menu_crud import iterar_menus
+            with self._sesion() as db:
+                nombres_db = {m.nombre for m in iterar_menus(db)}
+
+            for menu, cant in lector.filas():
                 try:
-                    cant = int(float(r[iC].replace(",", ".")))
+                    cant = int(float(cant.replace(",", ".")))
                 except:
                     cant = 1
 
-                from crud.menu_crud import listar_menus
-                nombres_db = [m.nombre for m in listar_menus(self.db)]
                 if menu and menu in nombres_db:
                     self.pedido.agregar_item(menu, cant)
 
@@ -840,12 +948,17 @@ class RestauranteApp(ctk.CTk):
 
 
     def _refrescar_pedido_cards(self):
+        if not self._pestana_construida("Pedido"):
+            return
         for w in self.cards_frame.winfo_children():
             w.destroy()
 
         # Mostrar todos los menús de la base de datos como botones para pedir
         from crud.menu_crud import listar_menus
-        menus = listar_menus(self.db) if self.db else []
+        menus = []
+        if self.sesiones:
+            with self._sesion() as db:
+                menus = listar_menus(db)
         for i, menu in enumerate(menus):
             img = self.menu_images.get(menu.nombre)
             ctk.CTkButton(
@@ -860,6 +973,8 @@ class RestauranteApp(ctk.CTk):
 
 
     def _refrescar_pedido_tree(self):
+        if not self._pestana_construida("Pedido"):
+            return
         for i in self.tree_pedido.get_children():
             self.tree_pedido.delete(i)
 
@@ -877,26 +992,46 @@ class RestauranteApp(ctk.CTk):
         self.lbl_total.configure(text=f"Total: {total_text}")
 
 
+    def _cliente_del_pedido(self, correo):
+        """
+        Id del cliente con ese correo (sin distinguir mayúsculas) o None.
+        Se recuerda el último encontrado: los clics siguientes en las
+        tarjetas del mismo pedido no consultan la base.
+        """
+        from models import normalizar_correo
+        clave = normalizar_correo(correo)
+        if self._cliente_pedido and self._cliente_pedido[0] == clave:
+            return self._cliente_pedido[1]
+        from crud.cliente_crud import obtener_cliente_por_correo
+        with self._sesion() as db:
+            cliente = obtener_cliente_por_correo(db, clave)
+        self._cliente_pedido = (clave, cliente.id) if cliente else None
+        return cliente.id if cliente else None
+
     def _pedido_agregar(self, menu):
         # Validar correo antes de permitir agregar
         correo = self.var_pedido_correo.get().strip()
         if not correo:
             messagebox.showwarning("Atención", "Ingrese el correo del cliente antes de pedir.")
             return
-        cliente = self.db.query(models.Cliente).filter(models.Cliente.correo == correo).first() if self.db else None
-        if not cliente:
-            messagebox.showwarning("Atención", "El correo no corresponde a un cliente registrado.")
+        if not self.sesiones:
             return
-
         # Obtener requerimientos desde la base de datos
-        from crud.menu_crud import obtener_menu_por_nombre, requerimientos_menu
+        from crud.menu_crud import ids_de_menus, requerimientos_menus
         hipotetico = {}
         items_tmp = dict(self.pedido.items)
         items_tmp[menu] = items_tmp.get(menu, 0) + 1
 
+        if self._cliente_del_pedido(correo) is None:
+            messagebox.showwarning("Atención", "El correo no corresponde a un cliente registrado.")
+            return
+
+        with self._sesion() as db:
+            ids = ids_de_menus(db, items_tmp)
+            recetas = requerimientos_menus(db, ids.values())
+
         for m, cnt in items_tmp.items():
-            menu_obj = obtener_menu_por_nombre(self.db, m)
-            reqs = requerimientos_menu(self.db, menu_obj.id) if menu_obj else {}
+            reqs = recetas[ids[m]] if m in ids else {}
             for ing, cant in reqs.items():
                 hipotetico[ing] = hipotetico.get(ing, 0.0) + cant * cnt
 
@@ -941,20 +1076,41 @@ class RestauranteApp(ctk.CTk):
             messagebox.showerror("Stock insuficiente", "No alcanza el stock para este pedido.")
             return
 
+        from crud.pedido_crud import calcular_montos, fecha_hora_pedido
+        fecha_boleta = fecha_hora_pedido(self.var_pedido_fecha.get().strip())
+
+        if self.sesiones:
+            # Pedido, ítems, stock y resumen de ventas en una sola transacción;
+            # la boleta se imprime con los montos que quedaron guardados
+            from crud.menu_crud import ids_de_menus
+            from crud.pedido_crud import colocar_pedido
+            cliente_id = self._cliente_del_pedido(self.var_pedido_correo.get().strip())
+            if cliente_id is None:
+                messagebox.showwarning("Atención", "El correo no corresponde a un cliente registrado.")
+                return
+            with self._sesion() as db:
+                ids = ids_de_menus(db, self.pedido.items)
+                resultado = None
+                if len(ids) == len(self.pedido.items):
+                    cantidades = {ids[m]: c for m, c in self.pedido.items.items()}
+                    resultado = colocar_pedido(db, cliente_id, cantidades, fecha_boleta)
+            if resultado is None:
+                # El cliente pudo ser eliminado desde otra terminal
+                self._cliente_pedido = None
+                messagebox.showerror(
+                    "Error", "No se pudo guardar el pedido (stock insuficiente, menú o cliente inexistente)."
+                )
+                return
+            detalle = resultado["detalle"]
+            subtotal, iva, total = resultado["subtotal"], resultado["iva"], resultado["total"]
+        else:
+            detalle = self.pedido.detalle()
+            subtotal, iva, total = calcular_montos(sum(x[3] for x in detalle))
+
         fd, ruta = tempfile.mkstemp(suffix=".pdf")
         os.close(fd)
 
-        detalle = self.pedido.detalle()
-        subtotal = sum(x[3] for x in detalle)
-        iva = round(subtotal * 0.19)
-        total = subtotal + iva
-
-        from datetime import datetime as dt
-        fecha_str = self.var_pedido_fecha.get().strip()
-        try:
-            fecha_boleta = dt.strptime(fecha_str, "%Y-%m-%d")
-        except Exception:
-            fecha_boleta = dt.today()
+        from utils.Boleta import Boleta
         boleta = Boleta(detalle, subtotal, iva, total, fecha=fecha_boleta)
         boleta.generar_pdf(ruta)
 
@@ -962,30 +1118,7 @@ class RestauranteApp(ctk.CTk):
 
         messagebox.showinfo("OK", "¡Pedido generado correctamente!")
 
-        # Guardar pedido y sus ítems en la base de datos
-        if self.db:
-            correo = self.var_pedido_correo.get().strip()
-            fecha_str = self.var_pedido_fecha.get().strip()
-            # Asegurar formato string YYYY-MM-DD
-            from datetime import datetime as dt
-            try:
-                fecha = dt.strptime(fecha_str, "%Y-%m-%d").strftime("%Y-%m-%d")
-            except Exception:
-                fecha = dt.today().strftime("%Y-%m-%d")
-            cliente = self.db.query(models.Cliente).filter(models.Cliente.correo == correo).first()
-            if cliente:
-                pedido_db = models.Pedido(cliente_id=cliente.id, fecha=fecha)
-                self.db.add(pedido_db)
-                self.db.commit()
-                self.db.refresh(pedido_db)
-                for m, c, pu, imp in detalle:
-                    menu_db = self.db.query(models.Menu).filter(models.Menu.nombre == m).first()
-                    if menu_db:
-                        item_db = models.PedidoItem(pedido_id=pedido_db.id, menu_id=menu_db.id, cantidad=c)
-                        self.db.add(item_db)
-                self.db.commit()
-
-        # Descontar stock real
+        # La base ya descontó el stock; se refleja en el stock en memoria
         self.pedido.confirmar_y_desc()
         self._refrescar_stock()
 
@@ -1028,6 +1161,8 @@ class RestauranteApp(ctk.CTk):
 
     def _render_pdf(self, ruta_pdf, canvas, img_container):
         try:
+            import fitz  # PyMuPDF
+            from PIL import Image, ImageTk
             doc = fitz.open(ruta_pdf)
             page = doc[0]
 
@@ -1151,19 +1286,22 @@ class RestauranteApp(ctk.CTk):
         ctk.CTkButton(frame, text="Mostrar Gráfico", command=self._mostrar_grafico_seleccionado).pack(pady=16)
 
     def _mostrar_grafico_seleccionado(self):
-        if not self.db:
+        if not self.sesiones:
             messagebox.showerror("Error", "No hay conexión a la base de datos.")
             return
         tipo = self.var_grafico_tipo.get()
+        # Sin sesión: cada gráfico lee por la conexión de solo lectura
+        # (database.sesion_lectura) y no compite con el registro de pedidos
         try:
+            import graficos
             if tipo == "Ventas por fecha (diarias)":
-                graficos.graficar_ingresos_por_dia(self.db)
+                graficos.graficar_ingresos_por_dia()
             elif tipo == "Ventas por fecha (mensuales)":
-                graficos.graficar_ingresos_por_mes(self.db)
+                graficos.graficar_ingresos_por_mes()
             elif tipo == "Menús más comprados":
-                graficos.graficar_menus_mas_vendidos(self.db)
+                graficos.graficar_menus_mas_vendidos()
             elif tipo == "Uso de ingredientes en pedidos":
-                graficos.graficar_uso_ingredientes(self.db)
+                graficos.graficar_uso_ingredientes()
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo graficar: {e}")
 
@@ -1192,18 +1330,31 @@ class RestauranteApp(ctk.CTk):
         ctk.CTkButton(form, text="Actualizar", command=self._cliente_actualizar).grid(row=1, column=2, padx=8)
         ctk.CTkButton(form, text="Eliminar", command=self._cliente_eliminar).grid(row=2, column=2, padx=8)
 
-        self._refrescar_clientes()
         self.tree_clientes.bind("<ButtonRelease-1>", self._cliente_seleccionar)
 
     def _refrescar_clientes(self):
+        if not self._pestana_construida("Clientes"):
+            return
         self.tree_clientes.delete(*self.tree_clientes.get_children())
-        if not self.db:
+        if not self.sesiones:
             return
-        clientes = self.db.query(models.Cliente).all()
+        # Una página por vuelta del mainloop: con muchos clientes la ventana
+        # sigue respondiendo mientras se llena la tabla
+        self._carga_clientes += 1
+        self._cargar_pagina_clientes(self._carga_clientes, None)
+
+    def _cargar_pagina_clientes(self, carga, despues_de):
+        if carga != self._carga_clientes:
+            return  # se pidió otro refresco; esta carga quedó obsoleta
+        from crud.cliente_crud import listar_clientes_pagina
+        with self._sesion() as db:
+            clientes, cursor = listar_clientes_pagina(db, despues_de)
         # Uso de map para transformar
         filas = list(map(lambda c: (c.id, c.nombre, c.correo), clientes))
         for fila in filas:
             self.tree_clientes.insert("", "end", values=fila)
+        if cursor is not None:
+            self.after(1, self._cargar_pagina_clientes, carga, cursor)
 
     def _cliente_seleccionar(self, event):
         sel = self.tree_clientes.selection()
@@ -1224,13 +1375,13 @@ class RestauranteApp(ctk.CTk):
         if not self._validar_correo(correo):
             messagebox.showwarning("Atención", "Correo no válido.")
             return
-        # Unicidad
-        if self.db.query(models.Cliente).filter(models.Cliente.correo == correo).first():
+        from crud.cliente_crud import agregar_cliente
+        with self._sesion() as db:
+            # La unicidad (sin distinguir mayúsculas) la decide el índice único
+            nuevo = agregar_cliente(db, nombre, correo)
+        if not nuevo:
             messagebox.showwarning("Atención", "Correo ya registrado.")
             return
-        nuevo = models.Cliente(nombre=nombre, correo=correo)
-        self.db.add(nuevo)
-        self.db.commit()
         self._refrescar_clientes()
 
     def _cliente_actualizar(self):
@@ -1245,34 +1396,35 @@ class RestauranteApp(ctk.CTk):
         if not self._validar_correo(correo):
             messagebox.showwarning("Atención", "Correo no válido.")
             return
-        cliente = self.db.query(models.Cliente).get(self._cliente_id_sel)
-        if not cliente:
-            messagebox.showerror("Error", "Cliente no encontrado.")
-            return
-        # Unicidad
-        otro = self.db.query(models.Cliente).filter(models.Cliente.correo == correo, models.Cliente.id != cliente.id).first()
-        if otro:
+        from crud.cliente_crud import actualizar_cliente
+        with self._sesion() as db:
+            cliente = db.get(models.Cliente, self._cliente_id_sel)
+            if not cliente:
+                messagebox.showerror("Error", "Cliente no encontrado.")
+                return
+            # Si otro cliente ya usa el correo, el índice único rechaza el cambio
+            actualizado = actualizar_cliente(db, cliente.id, nombre, correo)
+        if not actualizado:
             messagebox.showwarning("Atención", "Correo ya registrado por otro cliente.")
             return
-        cliente.nombre = nombre
-        cliente.correo = correo
-        self.db.commit()
+        self._cliente_pedido = None  # el correo del carrito pudo cambiar de dueño
         self._refrescar_clientes()
 
     def _cliente_eliminar(self):
         if not hasattr(self, '_cliente_id_sel') or not self._cliente_id_sel:
             messagebox.showwarning("Atención", "Seleccione un cliente.")
             return
-        cliente = self.db.query(models.Cliente).get(self._cliente_id_sel)
-        if not cliente:
-            messagebox.showerror("Error", "Cliente no encontrado.")
-            return
-        # Impedir eliminar si tiene pedidos asociados
-        if self.db.query(models.Pedido).filter(models.Pedido.cliente_id == cliente.id).first():
-            messagebox.showwarning("Atención", "No se puede eliminar: el cliente tiene pedidos asociados.")
-            return
-        self.db.delete(cliente)
-        self.db.commit()
+        with self._sesion() as db:
+            cliente = db.get(models.Cliente, self._cliente_id_sel)
+            if not cliente:
+                messagebox.showerror("Error", "Cliente no encontrado.")
+                return
+            # Impedir eliminar si tiene pedidos asociados
+            if db.query(models.Pedido).filter(models.Pedido.cliente_id == cliente.id).first():
+                messagebox.showwarning("Atención", "No se puede eliminar: el cliente tiene pedidos asociados.")
+                return
+            db.delete(cliente)
+        self._cliente_pedido = None
         self._refrescar_clientes()
 
     def _validar_correo(self, correo):
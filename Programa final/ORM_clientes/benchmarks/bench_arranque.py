@@ -0,0 +1,182 @@
+# bench_arranque.py
+"""
+Mide el arranque en frío de la aplicación y falla si supera el presupuesto.
+
+1. python -X importtime -c "import Restaurante": tiempo acumulado de
+   importación, los módulos más caros y si algún módulo de la aplicación
+   importa una biblioteca pesada (fitz, PIL, reportlab, matplotlib) que
+   debería importarse recién al usarse. Las que carga una dependencia no
+   cuentan: customtkinter importa PIL.Image y PIL.ImageTk al importarse,
+   así que PIL siempre aparece al arrancar.
+2. Tiempo hasta la primera ventana: lanza un proceso que crea
+   RestauranteApp sobre una copia de restaurante.db y espera a que la
+   ventana se dibuje. Necesita pantalla (DISPLAY); sin ella se omite.
+
+Sale con código 1 si se excede algún presupuesto o si la aplicación importó
+una biblioteca pesada, y con código 2 si no se pudo medir.
+
+Uso:
+    python benchmarks/bench_arranque.py [--presupuesto-import-ms 1500] [--presupuesto-ventana-ms 4000]
+"""
+import argparse
+import glob
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+DIR_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BIBLIOTECAS_PESADAS = ("fitz", "PIL", "reportlab", "matplotlib")
+
+# Paquetes y módulos propios (Restaurante, models, crud, logic, utils, ...)
+MODULOS_APP = {
+    os.path.splitext(nombre)[0] for nombre in os.listdir(DIR_APP)
+    if nombre.endswith(".py") or glob.glob(os.path.join(DIR_APP, nombre, "*.py"))
+}
+
+SCRIPT_VENTANA = """
+from database import unidad_de_trabajo
+from models import crear_base
+from logic.Menu import poblar_db_con_menus_estaticos
+from Restaurante import RestauranteApp
+
+crear_base()
+with unidad_de_trabajo() as db:
+    poblar_db_con_menus_estaticos(db)
+app = RestauranteApp(sesiones=unidad_de_trabajo)
+app.update()
+print("VENTANA", flush=True)
+app.destroy()
+"""
+
+# import time:     self [us] | cumulative | imported package
+_LINEA_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _raiz(nombre):
+    return nombre.split(".")[0]
+
+
+def pesadas_de_la_app(arbol):
+    """
+    arbol: [(sangria, modulo)] en el orden de -X importtime (cada módulo
+    aparece después de los que importó). Retorna las bibliotecas pesadas
+    que importó directamente un módulo de la aplicación.
+    """
+    pesadas = set()
+    ancestros = []  # (sangria, modulo) del módulo actual hacia la raíz
+    # Al revés, cada módulo aparece antes de los que importó
+    for sangria, nombre in reversed(arbol):
+        while ancestros and ancestros[-1][0] >= sangria:
+            ancestros.pop()
+        if _raiz(nombre) in BIBLIOTECAS_PESADAS:
+            # Quien la importó: el primer ancestro fuera de la biblioteca
+            importador = next(
+                (a for _, a in reversed(ancestros) if _raiz(a) != _raiz(nombre)), None
+            )
+            if importador is None or _raiz(importador) in MODULOS_APP:
+                pesadas.add(_raiz(nombre))
+        ancestros.append((sangria, nombre))
+    return sorted(pesadas)
+
+
+def medir_importacion(modulo):
+    """Retorna (total_ms, [(ms_acumulado, modulo)], pesadas) o None si el import falla."""
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=DIR_APP, capture_output=True, text=True,
+    )
+    if proceso.returncode != 0:
+        print(proceso.stderr.strip().splitlines()[-1])
+        return None
+
+    total = 0
+    modulos = []
+    arbol = []
+    for linea in proceso.stderr.splitlines():
+        m = _LINEA_IMPORTTIME.match(linea)
+        if not m:
+            continue
+        acumulado, sangria, nombre = int(m.group(2)), len(m.group(3)), m.group(4)
+        modulos.append((acumulado / 1000, nombre))
+        arbol.append((sangria, nombre))
+        if sangria == 1:
+            # Solo los imports de primer nivel suman al total
+            total += acumulado
+    return total / 1000, sorted(modulos, reverse=True), pesadas_de_la_app(arbol)
+
+
+def medir_ventana(timeout=60):
+    """Segundos desde lanzar el proceso hasta que la ventana se dibuja, o None."""
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        print("  sin DISPLAY: se omite el tiempo hasta la primera ventana")
+        return None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Copia de la base para no modificar restaurante.db
+        ruta = os.path.join(tmp, "restaurante.db")
+        shutil.copy(os.path.join(DIR_APP, "restaurante.db"), ruta)
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{ruta}")
+
+        inicio = time.perf_counter()
+        proceso = subprocess.Popen(
+            [sys.executable, "-c", SCRIPT_VENTANA],
+            cwd=DIR_APP, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        )
+        try:
+            for linea in proceso.stdout:
+                if linea.strip() == "VENTANA":
+                    segundos = time.perf_counter() - inicio
+                    proceso.wait(timeout=timeout)
+                    return segundos
+            print(proceso.stderr.read().strip().splitlines()[-1])
+            return None
+        finally:
+            if proceso.poll() is None:
+                proceso.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modulo", default="Restaurante")
+    parser.add_argument("--presupuesto-import-ms", type=float, default=1500)
+    parser.add_argument("--presupuesto-ventana-ms", type=float, default=4000)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    errores = []
+
+    print(f"import {args.modulo} (-X importtime)")
+    medicion = medir_importacion(args.modulo)
+    if medicion is None:
+        print("No se pudo importar el módulo; ¿faltan dependencias?")
+        return 2
+    total_ms, modulos, pesadas = medicion
+    for ms, nombre in modulos[:args.top]:
+        print(f"  {ms:9.1f} ms  {nombre}")
+    print(f"  total: {total_ms:.1f} ms (presupuesto {args.presupuesto_import_ms:.0f} ms)")
+    if total_ms > args.presupuesto_import_ms:
+        errores.append(f"importación {total_ms:.0f} ms > {args.presupuesto_import_ms:.0f} ms")
+    if pesadas:
+        errores.append(f"la aplicación importa al arrancar: {', '.join(pesadas)}")
+
+    if args.modulo == "Restaurante":
+        print("tiempo hasta la primera ventana")
+        segundos = medir_ventana()
+        if segundos is not None:
+            ms = segundos * 1000
+            print(f"  {ms:.1f} ms (presupuesto {args.presupuesto_ventana_ms:.0f} ms)")
+            if ms > args.presupuesto_ventana_ms:
+                errores.append(f"primera ventana {ms:.0f} ms > {args.presupuesto_ventana_ms:.0f} ms")
+
+    for error in errores:
+        print(f"FALLA: {error}")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
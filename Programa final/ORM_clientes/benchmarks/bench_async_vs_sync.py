@@ -0,0 +1,92 @@
+# bench_async_vs_sync.py
+"""
+Compara pedidos por segundo colocando pedidos concurrentes con
+crud/pedido_crud.crear_pedido (hilos + Session) y con
+crud_async/pedido_crud.crear_pedido (asyncio + AsyncSession/aiosqlite).
+
+Uso:
+    python benchmarks/bench_async_vs_sync.py [--pedidos 1000] [--concurrencia 8]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from database import crear_engine, crear_engine_async, unidad_de_trabajo, unidad_de_trabajo_async
+from models import Cliente, Menu, crear_base
+from crud import pedido_crud
+from crud_async import pedido_crud as pedido_crud_async
+
+
+def preparar(ruta):
+    database.configurar_engine(crear_engine(f"sqlite:///{ruta}"))
+    crear_base()
+    with unidad_de_trabajo() as db:
+        cliente = Cliente(nombre="Bench", correo="bench@bench.cl")
+        menus = [Menu(nombre=f"Menu {i}", precio=1000 + i * 100) for i in range(8)]
+        db.add(cliente)
+        db.add_all(menus)
+        db.flush()
+        return cliente.id, [m.id for m in menus]
+
+
+def items_aleatorios(menu_ids):
+    return [random.choice(menu_ids) for _ in range(random.randint(1, 6))]
+
+
+def medir_sync(cliente_id, menu_ids, pedidos, concurrencia):
+    def colocar(_):
+        with unidad_de_trabajo() as db:
+            return pedido_crud.crear_pedido(db, cliente_id, items_aleatorios(menu_ids)) is not None
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        ok = sum(pool.map(colocar, range(pedidos)))
+    return ok, time.perf_counter() - inicio
+
+
+async def medir_async(ruta, cliente_id, menu_ids, pedidos, concurrencia):
+    database.configurar_engine_async(crear_engine_async(f"sqlite:///{ruta}"))
+    limite = asyncio.Semaphore(concurrencia)
+
+    async def colocar():
+        async with limite:
+            async with unidad_de_trabajo_async() as db:
+                pedido = await pedido_crud_async.crear_pedido(db, cliente_id, items_aleatorios(menu_ids))
+                return pedido is not None
+
+    inicio = time.perf_counter()
+    ok = sum(await asyncio.gather(*(colocar() for _ in range(pedidos))))
+    segundos = time.perf_counter() - inicio
+    await database.obtener_engine_async().dispose()
+    return ok, segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pedidos", type=int, default=1000)
+    parser.add_argument("--concurrencia", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "bench_async.db")
+        cliente_id, menu_ids = preparar(ruta)
+
+        ok, seg = medir_sync(cliente_id, menu_ids, args.pedidos, args.concurrencia)
+        print(f"sync   ({args.concurrencia} hilos):   {ok} pedidos en {seg:.2f}s -> {ok / seg:.1f} pedidos/s")
+
+        ok, seg = asyncio.run(medir_async(ruta, cliente_id, menu_ids, args.pedidos, args.concurrencia))
+        print(f"async  ({args.concurrencia} tareas):  {ok} pedidos en {seg:.2f}s -> {ok / seg:.1f} pedidos/s")
+
+        database.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
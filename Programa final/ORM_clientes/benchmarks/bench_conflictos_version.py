@@ -0,0 +1,94 @@
+# bench_conflictos_version.py
+"""
+Mide conflictos de versión y reintentos con varias terminales editando las mismas filas.
+
+Cada hilo suma stock con crud/ingrediente_crud.sumar_stock y cambia precios
+con crud/menu_crud.guardar_menu sobre pocas filas compartidas, para forzar
+choques. Las sumas se reintentan; los cambios de precio que chocan se
+informan con ConflictoVersion y no se escriben. Al final verifica que no
+se perdió ninguna suma (el stock final debe ser el inicial más todas las
+sumas exitosas) y reporta la tasa de conflictos y reintentos.
+
+Uso:
+    python benchmarks/bench_conflictos_version.py [--hilos 8] [--operaciones 2000] [--filas 3]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from database import ConflictoVersion, crear_engine, unidad_de_trabajo
+from models import Ingrediente, Menu, crear_base
+from crud import ingrediente_crud, menu_crud
+
+
+def preparar(ruta, filas):
+    database.configurar_engine(crear_engine(f"sqlite:///{ruta}"))
+    crear_base()
+    with unidad_de_trabajo() as db:
+        db.add_all(Ingrediente(nombre=f"ing {i}", unidad="unid", cantidad=0) for i in range(filas))
+        db.add_all(Menu(nombre=f"menu {i}", precio=1000) for i in range(filas))
+
+
+def operacion(filas):
+    i = random.randrange(filas)
+    with unidad_de_trabajo() as db:
+        if random.random() < 0.8:
+            return ("ing", i) if ingrediente_crud.sumar_stock(db, f"ing {i}", 1) else None
+        precio = random.randint(1000, 9000)
+        try:
+            return ("menu", i) if menu_crud.guardar_menu(db, f"menu {i}", precio) else None
+        except ConflictoVersion:
+            return ("conflicto", i)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--operaciones", type=int, default=2000)
+    parser.add_argument("--filas", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        preparar(os.path.join(tmp, "conflictos.db"), args.filas)
+        database.reiniciar_estadisticas_conflictos()
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.hilos) as pool:
+            resultados = list(pool.map(lambda _: operacion(args.filas), range(args.operaciones)))
+        segundos = time.perf_counter() - inicio
+
+        sumas = [0] * args.filas
+        for r in resultados:
+            if r and r[0] == "ing":
+                sumas[r[1]] += 1
+        with unidad_de_trabajo() as db:
+            stock = {i.nombre: i.cantidad for i in db.query(Ingrediente)}
+        database.engine.dispose()
+
+    est = database.estadisticas_conflictos()
+    exitosas = sum(1 for r in resultados if r and r[0] != "conflicto")
+    informados = sum(1 for r in resultados if r and r[0] == "conflicto")
+    print(f"{args.operaciones} operaciones, {args.hilos} hilos, {args.filas} filas compartidas")
+    print(f"  exitosas:           {exitosas} ({exitosas / segundos:,.0f} ops/s)")
+    print(f"  conflictos:         {est['conflictos']} "
+          f"({est['conflictos'] / max(est['operaciones'], 1):.1%} de las operaciones)")
+    print(f"  reintentos agotados: {est['agotados']}")
+    print(f"  precios rechazados por conflicto: {informados}")
+
+    perdidas = sum(sumas[i] - stock[f"ing {i}"] for i in range(args.filas))
+    if perdidas:
+        print(f"ERROR: {perdidas} sumas de stock perdidas")
+        return 1
+    print("  sin actualizaciones perdidas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# bench_importar_csv.py
+"""
+Compara la carga de un CSV de stock fila por fila (crear_ingrediente) contra importar_ingredientes.
+
+crear_ingrediente hace un SELECT, un commit y un refresh por fila;
+importar_ingredientes usa una transacción y un INSERT ... ON CONFLICT
+ejecutado con executemany por lote.
+
+Uso:
+    python benchmarks/bench_importar_csv.py [--filas 5000] [--repetidas 0.3]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from database import crear_engine, unidad_de_trabajo
+from models import crear_base
+from crud import ingrediente_crud
+
+
+def filas_proveedor(cantidad, repetidas):
+    # Una fracción de nombres se repite para ejercitar la rama de actualización
+    distintos = max(1, int(cantidad * (1 - repetidas)))
+    for _ in range(cantidad):
+        yield f"ingrediente {random.randrange(distintos)}", random.choice(["kg", "unid"]), random.randint(1, 50)
+
+
+def medir(ruta, filas, por_fila):
+    database.configurar_engine(crear_engine(f"sqlite:///{ruta}"))
+    crear_base()
+    inicio = time.perf_counter()
+    with unidad_de_trabajo() as db:
+        if por_fila:
+            for nombre, unidad, cantidad in filas:
+                ingrediente_crud.crear_ingrediente(db, nombre, unidad, cantidad)
+            resumen = None
+        else:
+            resumen = ingrediente_crud.importar_ingredientes(db, filas)
+    segundos = time.perf_counter() - inicio
+    database.engine.dispose()
+    return segundos, resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filas", type=int, default=5000)
+    parser.add_argument("--repetidas", type=float, default=0.3)
+    args = parser.parse_args()
+
+    random.seed(1)
+    filas = list(filas_proveedor(args.filas, args.repetidas))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lento, _ = medir(os.path.join(tmp, "por_fila.db"), filas, por_fila=True)
+        rapido, resumen = medir(os.path.join(tmp, "masivo.db"), filas, por_fila=False)
+
+    print(f"{args.filas} filas")
+    print(f"  crear_ingrediente por fila: {lento:7.2f}s ({args.filas / lento:,.0f} filas/s)")
+    print(f"  importar_ingredientes:      {rapido:7.2f}s ({args.filas / rapido:,.0f} filas/s)")
+    print(f"  {resumen}")
+
+
+if __name__ == "__main__":
+    main()
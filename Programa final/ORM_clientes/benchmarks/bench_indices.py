@@ -0,0 +1,103 @@
+# bench_indices.py
+"""
+Muestra EXPLAIN QUERY PLAN y tiempos de las consultas frecuentes antes y
+después de aplicar migraciones.py sobre una base con el esquema original
+(sin índices en las tablas de unión ni en pedido).
+
+Uso:
+    python benchmarks/bench_indices.py [--pedidos 200000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from database import crear_engine
+from models import crear_base
+
+# Esquema tal como lo creaba la versión anterior de models.py
+ESQUEMA_ORIGINAL = [
+    "CREATE TABLE cliente (id INTEGER PRIMARY KEY, nombre VARCHAR NOT NULL, correo VARCHAR NOT NULL UNIQUE)",
+    "CREATE TABLE ingrediente (id INTEGER PRIMARY KEY, nombre VARCHAR NOT NULL UNIQUE, "
+    "unidad VARCHAR NOT NULL, cantidad FLOAT NOT NULL)",
+    "CREATE TABLE menu (id INTEGER PRIMARY KEY, nombre VARCHAR NOT NULL UNIQUE, "
+    "precio INTEGER NOT NULL, descripcion VARCHAR)",
+    "CREATE TABLE menu_ingrediente (id INTEGER PRIMARY KEY, menu_id INTEGER REFERENCES menu(id), "
+    "ingrediente_id INTEGER REFERENCES ingrediente(id), cantidad FLOAT NOT NULL)",
+    "CREATE TABLE pedido (id INTEGER PRIMARY KEY, cliente_id INTEGER REFERENCES cliente(id), fecha VARCHAR NOT NULL)",
+    "CREATE TABLE pedido_item (id INTEGER PRIMARY KEY, pedido_id INTEGER REFERENCES pedido(id), "
+    "menu_id INTEGER REFERENCES menu(id), cantidad INTEGER NOT NULL)",
+]
+
+CONSULTAS = {
+    "items de un pedido": (
+        "SELECT * FROM pedido_item WHERE pedido_id = :id", {"id": 12345}),
+    "receta de un menú": (
+        "SELECT * FROM menu_ingrediente WHERE menu_id = :id", {"id": 3}),
+    "relación menú-ingrediente": (
+        "SELECT * FROM menu_ingrediente WHERE menu_id = :m AND ingrediente_id = :i", {"m": 3, "i": 4}),
+    "pedidos de un cliente": (
+        "SELECT * FROM pedido WHERE cliente_id = :id", {"id": 77}),
+    "pedidos de un día": (
+        "SELECT * FROM pedido WHERE fecha = :f", {"f": "2025-03-14"}),
+    "ventas de un menú": (
+        "SELECT SUM(cantidad) FROM pedido_item WHERE menu_id = :id", {"id": 5}),
+}
+
+
+def poblar(conn, pedidos):
+    random.seed(1)
+    conn.execute(text("INSERT INTO cliente (id, nombre, correo) VALUES (:i, :n, :c)"),
+                 [{"i": i, "n": f"c{i}", "c": f"c{i}@x.cl"} for i in range(1, 2001)])
+    conn.execute(text("INSERT INTO menu (id, nombre, precio) VALUES (:i, :n, 1000)"),
+                 [{"i": i, "n": f"m{i}"} for i in range(1, 41)])
+    conn.execute(text("INSERT INTO ingrediente (id, nombre, unidad, cantidad) VALUES (:i, :n, 'unid', 100)"),
+                 [{"i": i, "n": f"i{i}"} for i in range(1, 201)])
+    conn.execute(text("INSERT INTO menu_ingrediente (menu_id, ingrediente_id, cantidad) VALUES (:m, :i, 1)"),
+                 [{"m": m, "i": i} for m in range(1, 41) for i in random.sample(range(1, 201), 6)])
+    conn.execute(text("INSERT INTO pedido (id, cliente_id, fecha) VALUES (:i, :c, :f)"),
+                 [{"i": i, "c": random.randint(1, 2000),
+                   "f": f"2025-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}"}
+                  for i in range(1, pedidos + 1)])
+    conn.execute(text("INSERT INTO pedido_item (pedido_id, menu_id, cantidad) VALUES (:p, :m, 1)"),
+                 [{"p": p, "m": random.randint(1, 40)} for p in range(1, pedidos + 1) for _ in range(3)])
+
+
+def reportar(engine, titulo):
+    print(f"\n=== {titulo} ===")
+    with engine.connect() as conn:
+        for nombre, (sql, params) in CONSULTAS.items():
+            plan = conn.execute(text("EXPLAIN QUERY PLAN " + sql), params).all()
+            inicio = time.perf_counter()
+            for _ in range(20):
+                conn.execute(text(sql), params).all()
+            ms = (time.perf_counter() - inicio) / 20 * 1000
+            print(f"{nombre:<28} {ms:>9.3f} ms  | " + "; ".join(fila[-1] for fila in plan))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pedidos", type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        engine = crear_engine(f"sqlite:///{os.path.join(carpeta, 'bench_indices.db')}")
+        with engine.begin() as conn:
+            for ddl in ESQUEMA_ORIGINAL:
+                conn.execute(text(ddl))
+            poblar(conn, args.pedidos)
+
+        reportar(engine, "ANTES (esquema original)")
+        crear_base(engine)  # tablas nuevas + migraciones.py
+        reportar(engine, "DESPUÉS (migraciones aplicadas)")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# bench_miniaturas.py
+"""
+Compara la carga de miniaturas de menús: decodificación completa en el hilo principal contra utils.Miniaturas.
+
+Genera fotos JPEG de alta resolución y mide:
+  - original: Image.open + convert("RGBA") + resize(LANCZOS), una por una
+  - en frío:  decodificar_miniaturas() con la caché vacía (draft + pool de hilos)
+  - en caché: decodificar_miniaturas() leyendo las miniaturas ya guardadas
+
+Uso:
+    python benchmarks/bench_miniaturas.py [--imagenes 12] [--ancho 4000] [--alto 3000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from utils import Miniaturas
+
+TAMANO = (110, 82)
+
+
+def generar_fotos(directorio, cantidad, ancho, alto):
+    rutas = {}
+    for i in range(cantidad):
+        ruta = os.path.join(directorio, f"menu_{i}.jpg")
+        Image.radial_gradient("L").resize((ancho, alto)).convert("RGB").save(ruta, quality=90)
+        rutas[f"Menu {i}"] = ruta
+    return rutas
+
+
+def original(rutas):
+    for ruta in rutas.values():
+        Image.open(ruta).convert("RGBA").resize(TAMANO, Image.LANCZOS)
+
+
+def con_miniaturas(rutas):
+    futuros = Miniaturas.decodificar_miniaturas(rutas, TAMANO)
+    for futuro in futuros.values():
+        futuro.result()
+
+
+def medir(funcion, rutas):
+    inicio = time.perf_counter()
+    funcion(rutas)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--imagenes", type=int, default=12)
+    parser.add_argument("--ancho", type=int, default=4000)
+    parser.add_argument("--alto", type=int, default=3000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rutas = generar_fotos(tmp, args.imagenes, args.ancho, args.alto)
+        Miniaturas.DIR_CACHE = os.path.join(tmp, "cache")
+
+        t_original = medir(original, rutas)
+        t_frio = medir(con_miniaturas, rutas)
+        t_cache = medir(con_miniaturas, rutas)
+
+    print(f"{args.imagenes} fotos de {args.ancho}x{args.alto} -> miniaturas {TAMANO[0]}x{TAMANO[1]}")
+    print(f"  original (hilo principal): {t_original * 1000:8.1f} ms")
+    print(f"  en frío (draft + hilos):   {t_frio * 1000:8.1f} ms")
+    print(f"  en caché:                  {t_cache * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
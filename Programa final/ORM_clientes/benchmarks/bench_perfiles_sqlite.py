@@ -0,0 +1,65 @@
+# bench_perfiles_sqlite.py
+"""
+Mide commits por segundo para cada perfil de PRAGMAs de database.py.
+
+Cada commit inserta un Pedido con dos PedidoItem, igual que
+_generar_boleta_interna al confirmar una boleta.
+
+Uso:
+    python benchmarks/bench_perfiles_sqlite.py [--commits 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, PERFILES_SQLITE, crear_engine
+from models import Cliente, Menu, Pedido, PedidoItem
+
+
+def medir(perfil, commits, carpeta):
+    ruta = os.path.join(carpeta, f"bench_{perfil}.db")
+    engine = crear_engine(f"sqlite:///{ruta}", perfil=perfil)
+    Base.metadata.create_all(bind=engine)
+    Sesion = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    db = Sesion()
+    cliente = Cliente(nombre="Bench", correo="bench@bench.cl")
+    menu = Menu(nombre="Completo", precio=2500)
+    db.add_all([cliente, menu])
+    db.commit()
+
+    inicio = time.perf_counter()
+    for _ in range(commits):
+        pedido = Pedido(cliente_id=cliente.id, fecha="2025-01-01")
+        db.add(pedido)
+        db.flush()
+        db.add(PedidoItem(pedido_id=pedido.id, menu_id=menu.id, cantidad=1))
+        db.add(PedidoItem(pedido_id=pedido.id, menu_id=menu.id, cantidad=2))
+        db.commit()
+    segundos = time.perf_counter() - inicio
+
+    db.close()
+    engine.dispose()
+    return commits / segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--commits", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'perfil':<10} {'commits/s':>12}")
+    with tempfile.TemporaryDirectory() as carpeta:
+        for perfil in PERFILES_SQLITE:
+            cps = medir(perfil, args.commits, carpeta)
+            print(f"{perfil:<10} {cps:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
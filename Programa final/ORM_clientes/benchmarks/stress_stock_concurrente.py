@@ -0,0 +1,88 @@
+# stress_stock_concurrente.py
+"""
+Prueba de estrés: muchos hilos descuentan el mismo stock a la vez con
+crud/ingrediente_crud.descontar_requerimientos y restar_stock.
+
+Falla (código de salida 1) si se vende más de lo que había o si el stock
+final no cuadra con la cantidad de descuentos exitosos.
+
+Uso:
+    python benchmarks/stress_stock_concurrente.py [--hilos 16] [--intentos 2000] [--stock 500]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from database import crear_engine, unidad_de_trabajo
+from models import Ingrediente, crear_base
+from crud import ingrediente_crud
+
+INGREDIENTES = ("pan", "tomate", "queso")
+
+
+def preparar(ruta, stock):
+    database.configurar_engine(crear_engine(f"sqlite:///{ruta}"))
+    crear_base()
+    with unidad_de_trabajo() as db:
+        db.add_all(Ingrediente(nombre=n, unidad="unid", cantidad=stock) for n in INGREDIENTES)
+
+
+def intento(_):
+    # La mitad pide una receta completa y la otra mitad un solo ingrediente
+    with unidad_de_trabajo() as db:
+        if random.random() < 0.5:
+            reqs = {"pan": 1, "tomate": 1, "queso": 1}
+            return reqs if ingrediente_crud.descontar_requerimientos(db, reqs) else None
+        nombre = random.choice(INGREDIENTES)
+        return {nombre: 1} if ingrediente_crud.restar_stock(db, nombre, 1) else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hilos", type=int, default=16)
+    parser.add_argument("--intentos", type=int, default=2000)
+    parser.add_argument("--stock", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        preparar(os.path.join(tmp, "stress.db"), args.stock)
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.hilos) as pool:
+            vendidos = [r for r in pool.map(intento, range(args.intentos)) if r]
+        segundos = time.perf_counter() - inicio
+
+        esperado = {n: args.stock for n in INGREDIENTES}
+        for reqs in vendidos:
+            for nombre, cant in reqs.items():
+                esperado[nombre] -= cant
+
+        with unidad_de_trabajo() as db:
+            final = {i.nombre: i.cantidad for i in db.query(Ingrediente)}
+        database.engine.dispose()
+
+    print(f"{args.intentos} intentos en {args.hilos} hilos: {len(vendidos)} exitosos "
+          f"en {segundos:.2f}s")
+    errores = 0
+    for nombre in INGREDIENTES:
+        estado = "ok"
+        if final[nombre] < 0 or final[nombre] != esperado[nombre]:
+            estado = "ERROR"
+            errores += 1
+        print(f"  {nombre:<8} final={final[nombre]:g} esperado={esperado[nombre]:g}  {estado}")
+
+    if errores:
+        print("Sobreventa o descuentos perdidos detectados")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
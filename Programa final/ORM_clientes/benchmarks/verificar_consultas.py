@@ -0,0 +1,181 @@
+# verificar_consultas.py
+"""
+Verifica cuántas sentencias SQL ejecuta cada lectura para que no vuelva un N+1.
+
+Crea una base temporal con muchos menús, ingredientes y pedidos, cuenta las
+sentencias de cada función con el evento before_cursor_execute del engine
+y compara con el máximo permitido, que no crece con la cantidad de filas
+(salvo por lotes de ids, como en totales_pedidos).
+
+Sale con código 1 si alguna función supera su máximo o si da un resultado
+distinto al esperado.
+
+Uso:
+    python benchmarks/verificar_consultas.py [--menus 30] [--ingredientes 8] [--pedidos 40]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, select
+
+import database
+from database import crear_engine, unidad_de_trabajo
+from crud.pedido_crud import TAMANO_LOTE_TOTALES, calcular_montos
+from models import Cliente, Ingrediente, Menu, MenuIngrediente, Pedido, PedidoItem, crear_base
+
+
+@contextmanager
+def contar_consultas(engine):
+    contador = [0]
+
+    def contar(*_):
+        contador[0] += 1
+
+    event.listen(engine, "before_cursor_execute", contar)
+    try:
+        yield contador
+    finally:
+        event.remove(engine, "before_cursor_execute", contar)
+
+
+def preparar(url, menus, ingredientes, pedidos):
+    """Enlaza el engine global a url, crea las tablas y carga los datos."""
+    database.configurar_engine(crear_engine(url))
+    crear_base()
+    with unidad_de_trabajo() as db:
+        db.add_all(
+            Ingrediente(nombre=f"ing {i}", unidad="unid", cantidad=1000)
+            for i in range(menus * ingredientes)
+        )
+        db.add_all(Menu(nombre=f"menu {m}", precio=1000 + m) for m in range(menus))
+        db.add(Cliente(nombre="Cliente", correo="cliente@ejemplo.cl"))
+        db.flush()
+        db.add_all(
+            MenuIngrediente(menu_id=m + 1, ingrediente_id=m * ingredientes + i + 1, cantidad=1)
+            for m in range(menus) for i in range(ingredientes)
+        )
+        for p in range(pedidos):
+            subtotal, iva, total = calcular_montos(sum(1000 + m for m in range(menus)))
+            pedido = Pedido(cliente_id=1, fecha="2025-01-01", subtotal=subtotal, iva=iva, total=total)
+            db.add(pedido)
+            db.flush()
+            db.add_all(
+                PedidoItem(pedido_id=pedido.id, menu_id=m + 1, cantidad=1, precio_unitario=1000 + m)
+                for m in range(menus)
+            )
+        db.commit()
+
+
+def casos(menus, ingredientes, pedidos):
+    """(nombre, función(db) -> resultado, máximo de consultas, validar(resultado) -> bool)"""
+    from crud.ingrediente_crud import evaluar_stock, faltantes, validar_stock
+    from crud.menu_crud import ingredientes_de_menu, requerimientos_menu, requerimientos_menus
+    from crud.pedido_crud import calcular_total, obtener_detalle_pedido, totales_pedido, totales_pedidos
+    import graficos
+    from logic.Pedido import Pedido as PedidoCarrito
+    from logic.Stock import Stock
+
+    # Todos los ingredientes más uno inexistente y uno que no alcanza
+    reqs = {f"ing {i}": 1 for i in range(menus * ingredientes)}
+    reqs["ing 0"] = 5000
+    reqs["no existe"] = 1
+
+    def carrito(db):
+        pedido = PedidoCarrito(Stock(), sesiones=unidad_de_trabajo)
+        for m in range(menus):
+            pedido.agregar_item(f"menu {m}", 2)
+        return pedido._req_totales()
+
+    def detalle_carrito(db):
+        pedido = PedidoCarrito(Stock(), sesiones=unidad_de_trabajo)
+        for m in range(menus):
+            pedido.agregar_item(f"menu {m}", 2)
+        pedido.agregar_item("no existe", 1)
+        return pedido.detalle()
+
+    def recetas_por_relacion(db):
+        # Menú -> líneas (lazy) -> ingrediente (joined): dos consultas
+        menu = db.get(Menu, 1)
+        return [(r.ingrediente.nombre, r.cantidad) for r in menu.ingredientes]
+
+    def items_por_relacion(db):
+        # Pedido -> ítems (lazy) -> menú (joined): dos consultas
+        pedido = db.get(Pedido, 1)
+        return [(i.menu.nombre, i.cantidad) for i in pedido.items]
+
+    return [
+        ("requerimientos_menu", lambda db: requerimientos_menu(db, 1), 1,
+         lambda r: len(r) == ingredientes),
+        ("requerimientos_menus", lambda db: requerimientos_menus(db, range(1, menus + 1)), 1,
+         lambda r: all(len(v) == ingredientes for v in r.values())),
+        ("ingredientes_de_menu", lambda db: ingredientes_de_menu(db, 1), 1,
+         lambda r: len(r) == ingredientes),
+        ("obtener_detalle_pedido", lambda db: obtener_detalle_pedido(db, 1), 1,
+         lambda r: len(r) == menus),
+        ("totales_pedido", lambda db: totales_pedido(db, 1), 1,
+         lambda r: r == calcular_montos(sum(1000 + m for m in range(menus)))),
+        ("calcular_total", lambda db: calcular_total(db, 1), 1,
+         lambda r: r == calcular_montos(sum(1000 + m for m in range(menus)))[2]),
+        ("totales_pedidos", lambda db: totales_pedidos(db, range(1, pedidos + 2)),
+         -(-(pedidos + 1) // TAMANO_LOTE_TOTALES),
+         lambda r: len(r) == pedidos),
+        ("validar_stock", lambda db: validar_stock(db, reqs), 1,
+         lambda r: r is False),
+        ("faltantes", lambda db: faltantes(db, reqs), 1,
+         lambda r: sorted(r) == [("ing 0", 5000, 1000), ("no existe", 1, 0)]),
+        ("evaluar_stock", lambda db: evaluar_stock(db, reqs), 1,
+         lambda r: r[0] is False and len(r[1]) == 2),
+        ("graficos._datos_uso_ingredientes", graficos._datos_uso_ingredientes, 2,
+         lambda r: len(r) == menus * ingredientes and all(v == pedidos for v in r.values())),
+        ("Pedido._req_totales", carrito, 2,
+         lambda r: len(r) == menus * ingredientes),
+        ("Pedido.detalle", detalle_carrito, 1,
+         lambda r: len(r) == menus + 1 and r[0] == ("menu 0", 2, 1000, 2000) and r[-1][2] == 0),
+        ("Menu.ingredientes -> ingrediente", recetas_por_relacion, 2,
+         lambda r: len(r) == ingredientes),
+        ("Pedido.items -> menu", items_por_relacion, 2,
+         lambda r: len(r) == menus),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--menus", type=int, default=30)
+    parser.add_argument("--ingredientes", type=int, default=8)
+    parser.add_argument("--pedidos", type=int, default=40)
+    args = parser.parse_args()
+
+    errores = []
+    with tempfile.TemporaryDirectory() as tmp:
+        preparar(f"sqlite:///{os.path.join(tmp, 'consultas.db')}", args.menus, args.ingredientes, args.pedidos)
+        engine = database.engine
+
+        for nombre, funcion, maximo, validar in casos(args.menus, args.ingredientes, args.pedidos):
+            with unidad_de_trabajo() as db:
+                # Abrir la transacción antes de contar
+                db.execute(select(1))
+                with contar_consultas(engine) as contador:
+                    resultado = funcion(db)
+            estado = "ok"
+            if contador[0] > maximo:
+                estado = "FALLA"
+                errores.append(f"{nombre}: {contador[0]} consultas > {maximo}")
+            if not validar(resultado):
+                estado = "FALLA"
+                errores.append(f"{nombre}: resultado inesperado")
+            print(f"  {nombre:<36} {contador[0]:4d} consultas (máx {maximo})  {estado}")
+
+        database.engine.dispose()
+
+    for error in errores:
+        print(f"FALLA: {error}")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
 # cliente_crud.py
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from models import Cliente
+from crud.paginacion import TAMANO_PAGINA, iterar, pagina
+from models import Cliente, normalizar_correo
 
 
 # -------------------------
@@ -13,20 +16,30 @@ def crear_cliente(db: Session, nombre: str, correo: str):
     """
     if not nombre or not correo:
         return None  # Validación de campos vacíos
-    existente = (
-        db.query(Cliente)
-        .filter(Cliente.correo == correo)
-        .first()
-    )
-    if existente:
-        return existente
+    nuevo = agregar_cliente(db, nombre, correo)
+    if nuevo:
+        return nuevo
+    return obtener_cliente_por_correo(db, correo)
+
+
+# -------------------------
+#   AGREGAR CLIENTE NUEVO
+# -------------------------
+def agregar_cliente(db: Session, nombre: str, correo: str):
+    """
+    Inserta el cliente y retorna None si el correo ya está registrado
+    (sin importar mayúsculas): lo rechaza el índice único, sin SELECT previo.
+    También retorna None ante cualquier otro error de la base (p. ej.
+    "database is locked"), después de hacer rollback.
+    """
+    if not nombre or not correo:
+        return None
     try:
-        nuevo = Cliente(nombre=nombre, correo=correo)
+        nuevo = Cliente(nombre=nombre, correo=correo.strip())
         db.add(nuevo)
         db.commit()
-        db.refresh(nuevo)
         return nuevo
-    except Exception:
+    except SQLAlchemyError:
         db.rollback()
         return None
 
@@ -35,23 +48,38 @@ def crear_cliente(db: Session, nombre: str, correo: str):
 #   OBTENER CLIENTE POR ID
 # -------------------------
 def obtener_cliente(db: Session, cliente_id: int):
-    return db.query(Cliente).filter(Cliente.id == cliente_id).first()
+    return db.get(Cliente, cliente_id)
 
 
 # -------------------------
 #   OBTENER CLIENTE POR CORREO
 # -------------------------
 def obtener_cliente_por_correo(db: Session, correo: str):
-    return db.query(Cliente).filter(Cliente.correo == correo).first()
+    # Usa el índice único de correo_normalizado: no distingue mayúsculas
+    return db.scalars(
+        select(Cliente).where(Cliente.correo_normalizado == normalizar_correo(correo))
+    ).first()
 
 
 # -------------------------
 #     LISTAR CLIENTES
 # -------------------------
 def listar_clientes(db: Session):
-    # Uso de map para devolver lista de clientes
-    clientes = db.query(Cliente).all()
-    return list(map(lambda c: c, clientes))
+    # Todos en una lista: para tablas grandes usar la página o el iterador
+    return db.scalars(select(Cliente).order_by(Cliente.id)).all()
+
+
+def listar_clientes_pagina(db: Session, despues_de: int = None, tamano: int = TAMANO_PAGINA):
+    """
+    Una página de los clientes ordenada por id: retorna (clientes, cursor).
+    Pasar despues_de=cursor para la siguiente; cursor None = última página.
+    """
+    return pagina(db, select(Cliente), Cliente.id, despues_de, tamano)
+
+
+def iterar_clientes(db: Session, tamano_lote: int = TAMANO_PAGINA):
+    """Recorre los clientes por lotes (yield_per); la sesión debe seguir abierta."""
+    return iterar(db, select(Cliente), Cliente.id, tamano_lote)
 
 
 # -------------------------
@@ -83,14 +111,10 @@ def actualizar_cliente(db: Session, cliente_id: int, nombre=None, correo=None):
     if nombre:
         cliente.nombre = nombre
     if correo:
-        # Validar unicidad de correo
-        existente = db.query(Cliente).filter(Cliente.correo == correo, Cliente.id != cliente_id).first()
-        if existente:
-            return None
-        cliente.correo = correo
+        # Si otro cliente ya usa el correo, el índice único hace fallar el commit
+        cliente.correo = correo.strip()
     try:
         db.commit()
-        db.refresh(cliente)
         return cliente
     except Exception:
         db.rollback()
@@ -1,5 +1,9 @@
 # ingrediente_crud.py
+from sqlalchemy import select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
+from crud.paginacion import TAMANO_PAGINA, iterar, pagina
+from database import ConflictoVersion, detectar_conflicto, reintentar_en_conflicto
 from models import Ingrediente
 
 
@@ -17,22 +21,57 @@ def obtener_por_nombre(db: Session, nombre: str):
 # -------------------------
 #       LISTAR INGREDIENTES
 # -------------------------
+def _consulta_ingredientes(solo_con_stock: bool = True):
+    consulta = select(Ingrediente)
+    if solo_con_stock:
+        # El filtro va en el SQL, no en Python
+        consulta = consulta.where(Ingrediente.cantidad > 0)
+    return consulta
+
+
 def listar_ingredientes(db: Session):
-    # Uso de filter para solo ingredientes con cantidad > 0
-    ingredientes = db.query(Ingrediente).all()
-    return list(filter(lambda i: i.cantidad > 0, ingredientes))
+    # Solo ingredientes con cantidad > 0
+    return db.scalars(_consulta_ingredientes().order_by(Ingrediente.id)).all()
+
+
+def listar_ingredientes_pagina(
+    db: Session, despues_de: int = None, tamano: int = TAMANO_PAGINA, solo_con_stock: bool = True
+):
+    """
+    Una página de ingredientes ordenada por id: retorna (ingredientes, cursor).
+    Pasar despues_de=cursor para la siguiente; cursor None = última página.
+    Por defecto solo los que tienen cantidad > 0, igual que listar_ingredientes.
+    """
+    return pagina(db, _consulta_ingredientes(solo_con_stock), Ingrediente.id, despues_de, tamano)
+
+
+def iterar_ingredientes(
+    db: Session, tamano_lote: int = TAMANO_PAGINA, solo_con_stock: bool = True
+):
+    """Recorre los ingredientes por lotes (yield_per); la sesión debe seguir abierta."""
+    return iterar(db, _consulta_ingredientes(solo_con_stock), Ingrediente.id, tamano_lote)
 
 
 # -------------------------
 #       CREAR INGREDIENTE
 # -------------------------
-def crear_ingrediente(db: Session, nombre: str, unidad: str, cantidad: float):
+def crear_ingrediente(db: Session, nombre: str, unidad: str, cantidad: float, version: int = None):
+    """
+    Crea el ingrediente o fija su unidad y cantidad. version es la que leyó
+    quien llama: si la fila ya tiene otra, o si otra terminal la modifica
+    antes del commit, lanza ConflictoVersion sin escribir (no se reintenta,
+    se pisaría el cambio ajeno). Retorna None ante otros errores.
+    """
     if not nombre or not unidad or cantidad is None:
         return None
-    existente = obtener_por_nombre(db, nombre)
-    try:
+
+    def guardar():
+        existente = obtener_por_nombre(db, nombre)
         if existente:
-            # Actualizar unidad y cantidad
+            if version is not None and existente.version != version:
+                raise ConflictoVersion(f"{nombre}: versión {existente.version}, se leyó {version}")
+            # El UPDATE lleva WHERE version = la leída: StaleDataError si
+            # otra terminal lo modificó entre la lectura y el commit
             existente.unidad = unidad
             existente.cantidad = cantidad
             db.commit()
@@ -47,40 +86,168 @@ def crear_ingrediente(db: Session, nombre: str, unidad: str, cantidad: float):
         db.commit()
         db.refresh(nuevo)
         return nuevo
+
+    try:
+        return detectar_conflicto(db, guardar)
+    except ConflictoVersion:
+        raise
+    except Exception:
+        db.rollback()
+        return None
+
+
+# -------------------------
+#   IMPORTACIÓN MASIVA (CSV)
+# -------------------------
+TAMANO_LOTE_IMPORTACION = 500
+
+
+def _upsert_ingredientes():
+    """INSERT ... ON CONFLICT(nombre) DO UPDATE, para ejecutar con executemany"""
+    tabla = Ingrediente.__table__
+    stmt = sqlite_insert(tabla)
+    return stmt.on_conflict_do_update(
+        index_elements=[tabla.c.nombre],
+        set_={
+            "unidad": stmt.excluded.unidad,
+            "cantidad": stmt.excluded.cantidad,
+            "version": tabla.c.version + 1,
+        },
+    )
+
+
+def _valores_fila(fila):
+    """(nombre, unidad, cantidad) -> parámetros del upsert, o None si se rechaza"""
+    try:
+        nombre, unidad, cantidad = fila
+        cantidad = float(cantidad)
+    except (TypeError, ValueError):
+        return None
+    nombre = (nombre or "").strip()
+    unidad = (unidad or "").strip()
+    if not nombre or not unidad:
+        return None
+    return {"nombre": nombre, "unidad": unidad, "cantidad": cantidad}
+
+
+def _lotes(filas, tamano):
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _separar_lote(lote, resumen):
+    validas = []
+    for fila in lote:
+        valores = _valores_fila(fila)
+        if valores is None:
+            resumen["rechazados"] += 1
+        else:
+            validas.append(valores)
+    return validas
+
+
+def _contar_lote(validas, existentes, vistos, resumen):
+    # Un nombre repetido dentro del mismo archivo cuenta como actualización
+    vistos |= existentes
+    for valores in validas:
+        if valores["nombre"] in vistos:
+            resumen["actualizados"] += 1
+        else:
+            resumen["insertados"] += 1
+            vistos.add(valores["nombre"])
+
+
+def importar_ingredientes(db: Session, filas, tamano_lote: int = TAMANO_LOTE_IMPORTACION):
+    """
+    Carga masiva de ingredientes. filas es un iterable de
+    (nombre, unidad, cantidad); igual que crear_ingrediente, si el
+    ingrediente ya existe se reemplazan su unidad y cantidad.
+    Todo va en una transacción con un executemany por lote.
+    Retorna {"insertados": n, "actualizados": n, "rechazados": n},
+    o None si falla (en ese caso no se guarda nada).
+    """
+    resumen = {"insertados": 0, "actualizados": 0, "rechazados": 0}
+    vistos = set()
+    stmt = _upsert_ingredientes()
+    try:
+        for lote in _lotes(filas, tamano_lote):
+            validas = _separar_lote(lote, resumen)
+            if not validas:
+                continue
+            nombres = {v["nombre"] for v in validas} - vistos
+            existentes = set(db.scalars(
+                select(Ingrediente.nombre).where(Ingrediente.nombre.in_(nombres))
+            )) if nombres else set()
+            _contar_lote(validas, existentes, vistos, resumen)
+            db.execute(stmt, validas)
+        db.commit()
     except Exception:
         db.rollback()
         return None
+    # Los ingredientes ya cargados en la sesión quedaron desactualizados
+    db.expire_all()
+    return resumen
 
 
 # -------------------------
 #   SUMAR STOCK A INGREDIENTE
 # -------------------------
 def sumar_stock(db: Session, nombre: str, cantidad: float):
-    ing = obtener_por_nombre(db, nombre)
-    if not ing:
+    def sumar():
+        ing = obtener_por_nombre(db, nombre)
+        if not ing:
+            return None
+
+        ing.cantidad += cantidad
+        db.commit()
+        db.refresh(ing)
+        return ing
+
+    try:
+        return reintentar_en_conflicto(db, sumar)
+    except Exception:
+        db.rollback()
         return None
 
-    ing.cantidad += cantidad
-    db.commit()
-    db.refresh(ing)
-    return ing
+
+# -------------------------
+#   DESCUENTO ATÓMICO
+# -------------------------
+def _descontar(db: Session, nombre: str, cantidad: float):
+    """
+    UPDATE con guarda: solo descuenta si la fila tiene stock suficiente.
+    Dos terminales no pueden vender lo mismo porque la comparación y la
+    resta ocurren en la misma sentencia. También incrementa la versión para
+    que una edición concurrente de la misma fila detecte el conflicto.
+    Retorna True si se descontó.
+    """
+    resultado = db.execute(
+        update(Ingrediente)
+        .where(Ingrediente.nombre == nombre, Ingrediente.cantidad >= cantidad)
+        .values(cantidad=Ingrediente.cantidad - cantidad, version=Ingrediente.version + 1)
+        .execution_options(synchronize_session="fetch")
+    )
+    return resultado.rowcount == 1
 
 
 # -------------------------
 #   RESTAR STOCK A INGREDIENTE
 # -------------------------
 def restar_stock(db: Session, nombre: str, cantidad: float):
-    ing = obtener_por_nombre(db, nombre)
-    if not ing:
-        return None
-
-    if ing.cantidad < cantidad:
-        return False  # No alcanza
+    if _descontar(db, nombre, cantidad):
+        db.commit()
+        return True
 
-    ing.cantidad -= cantidad
-    db.commit()
-    db.refresh(ing)
-    return True
+    db.rollback()
+    if not obtener_por_nombre(db, nombre):
+        return None
+    return False  # No alcanza
 
 
 # -------------------------
@@ -99,6 +266,37 @@ def eliminar_ingrediente(db: Session, nombre: str):
         return False
 
 
+# -------------------------
+#   EVALUAR STOCK
+# -------------------------
+def _consulta_stock(nombres):
+    """SELECT nombre, cantidad FROM ingrediente WHERE nombre IN (...)"""
+    return select(Ingrediente.nombre, Ingrediente.cantidad).where(Ingrediente.nombre.in_(nombres))
+
+
+def _comparar_stock(requerimientos: dict, disponibles: dict):
+    """Compara en memoria: retorna [(nombre, requerido, disponible)] de lo que no alcanza."""
+    faltas = []
+    for nombre, req in requerimientos.items():
+        disp = disponibles.get(nombre, 0)
+        if disp < req:
+            faltas.append((nombre, req, disp))
+    return faltas
+
+
+def evaluar_stock(db: Session, requerimientos: dict):
+    """
+    requerimientos = {"tomate": 0.1, "pan": 1}
+    Lee todos los ingredientes pedidos en una sola consulta y retorna
+    (alcanza, [(nombre, requerido, disponible)]).
+    """
+    if not requerimientos:
+        return True, []
+    disponibles = dict(db.execute(_consulta_stock(list(requerimientos))).all())
+    faltas = _comparar_stock(requerimientos, disponibles)
+    return not faltas, faltas
+
+
 # -------------------------
 # VALIDACIÓN DE STOCK
 # -------------------------
@@ -106,11 +304,7 @@ def validar_stock(db: Session, requerimientos: dict):
     """
     requerimientos = {"tomate": 0.1, "pan": 1}
     """
-    for nombre, req in requerimientos.items():
-        ing = obtener_por_nombre(db, nombre)
-        if not ing or ing.cantidad < req:
-            return False
-    return True
+    return evaluar_stock(db, requerimientos)[0]
 
 
 # -------------------------
@@ -121,13 +315,7 @@ def faltantes(db: Session, requerimientos: dict):
     Retorna lista de:
     [(nombre, requerido, disponible)]
     """
-    faltas = []
-    for nombre, req in requerimientos.items():
-        ing = obtener_por_nombre(db, nombre)
-        disp = ing.cantidad if ing else 0
-        if disp < req:
-            faltas.append((nombre, req, disp))
-    return faltas
+    return evaluar_stock(db, requerimientos)[1]
 
 
 # -------------------------
@@ -135,14 +323,13 @@ def faltantes(db: Session, requerimientos: dict):
 # -------------------------
 def descontar_requerimientos(db: Session, requerimientos: dict):
     """
-    Descuenta stock si alcanza, si no retorna False
+    Descuenta todo el stock en una sola transacción, si no alcanza
+    algún ingrediente hace rollback y retorna False
     """
-    if not validar_stock(db, requerimientos):
-        return False
-
     for nombre, req in requerimientos.items():
-        ing = obtener_por_nombre(db, nombre)
-        ing.cantidad -= req
+        if not _descontar(db, nombre, req):
+            db.rollback()
+            return False
 
     db.commit()
     return True
@@ -1,5 +1,9 @@
 # menu_crud.py
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
+from crud.paginacion import TAMANO_PAGINA, iterar, pagina
+from database import ConflictoVersion, detectar_conflicto
 from models import Menu, MenuIngrediente, Ingrediente
 
 
@@ -30,13 +34,57 @@ def crear_menu(db: Session, nombre: str, precio: int, descripcion: str = None):
         return None
 
 
+# -------------------------
+#   CREAR O ACTUALIZAR MENÚ
+# -------------------------
+def guardar_menu(db: Session, nombre: str, precio: int, descripcion: str = None, version: int = None):
+    """
+    Crea el menú o fija su precio y descripción. Igual que
+    crear_ingrediente, lanza ConflictoVersion si el menú ya no tiene la
+    versión leída o si otra terminal lo modifica antes del commit.
+    """
+    if not nombre or precio is None or precio <= 0:
+        return None
+
+    def guardar():
+        menu = obtener_menu_por_nombre(db, nombre)
+        if menu and version is not None and menu.version != version:
+            raise ConflictoVersion(f"{nombre}: versión {menu.version}, se leyó {version}")
+        if not menu:
+            menu = Menu(nombre=nombre)
+            db.add(menu)
+        menu.precio = precio
+        menu.descripcion = descripcion
+        db.commit()
+        return menu
+
+    try:
+        return detectar_conflicto(db, guardar)
+    except ConflictoVersion:
+        raise
+    except Exception:
+        db.rollback()
+        return None
+
+
 # -------------------------
 #   LISTAR TODOS LOS MENÚS
 # -------------------------
 def listar_menus(db: Session):
-    # Uso de map para devolver lista de menús
-    menus = db.query(Menu).all()
-    return list(map(lambda m: m, menus))
+    return db.scalars(select(Menu).order_by(Menu.id)).all()
+
+
+def listar_menus_pagina(db: Session, despues_de: int = None, tamano: int = TAMANO_PAGINA):
+    """
+    Una página de los menús ordenada por id: retorna (menus, cursor).
+    Pasar despues_de=cursor para la siguiente; cursor None = última página.
+    """
+    return pagina(db, select(Menu), Menu.id, despues_de, tamano)
+
+
+def iterar_menus(db: Session, tamano_lote: int = TAMANO_PAGINA):
+    """Recorre los menús por lotes (yield_per); la sesión debe seguir abierta."""
+    return iterar(db, select(Menu), Menu.id, tamano_lote)
 
 
 # -------------------------
@@ -53,6 +101,18 @@ def obtener_menu_por_nombre(db: Session, nombre: str):
 # -------------------------
 #   ASIGNAR INGREDIENTE A MENÚ
 # -------------------------
+def _upsert_menu_ingrediente(menu_id: int, ingrediente_id: int, cantidad: float):
+    """INSERT ... ON CONFLICT(menu_id, ingrediente_id) DO UPDATE ... RETURNING"""
+    stmt = sqlite_insert(MenuIngrediente).values(
+        menu_id=menu_id, ingrediente_id=ingrediente_id, cantidad=cantidad
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MenuIngrediente.menu_id, MenuIngrediente.ingrediente_id],
+        set_={"cantidad": stmt.excluded.cantidad},
+    )
+    return stmt.returning(MenuIngrediente)
+
+
 def agregar_ingrediente_a_menu(db: Session, menu_id: int, ingrediente_id: int, cantidad: float):
     """
     Asocia un ingrediente con un menú.
@@ -60,29 +120,15 @@ def agregar_ingrediente_a_menu(db: Session, menu_id: int, ingrediente_id: int, c
     """
     if cantidad is None or cantidad <= 0:
         return None
-    existente = (
-        db.query(MenuIngrediente)
-        .filter(
-            MenuIngrediente.menu_id == menu_id,
-            MenuIngrediente.ingrediente_id == ingrediente_id
-        )
-        .first()
-    )
     try:
-        if existente:
-            existente.cantidad = cantidad
-            db.commit()
-            db.refresh(existente)
-            return existente
-        nuevo = MenuIngrediente(
-            menu_id=menu_id,
-            ingrediente_id=ingrediente_id,
-            cantidad=cantidad
-        )
-        db.add(nuevo)
+        # Una sola sentencia: el índice único (menu_id, ingrediente_id)
+        # decide si se inserta o se actualiza
+        relacion = db.scalars(
+            _upsert_menu_ingrediente(menu_id, ingrediente_id, cantidad),
+            execution_options={"populate_existing": True},
+        ).one()
         db.commit()
-        db.refresh(nuevo)
-        return nuevo
+        return relacion
     except Exception:
         db.rollback()
         return None
@@ -100,21 +146,62 @@ def requerimientos_menu(db: Session, menu_id: int):
         ...
     }
     """
-    reqs = (
-        db.query(MenuIngrediente)
-        .filter(MenuIngrediente.menu_id == menu_id)
-        .all()
-    )
+    filas = db.execute(
+        select(Ingrediente.nombre, MenuIngrediente.cantidad)
+        .join(Ingrediente, Ingrediente.id == MenuIngrediente.ingrediente_id)
+        .where(MenuIngrediente.menu_id == menu_id)
+    ).all()
+    return {nombre: cantidad for nombre, cantidad in filas}
 
-    resultado = {}
-    for r in reqs:
-        ingrediente = db.query(Ingrediente).filter(Ingrediente.id == r.ingrediente_id).first()
-        if ingrediente:
-            resultado[ingrediente.nombre] = r.cantidad
 
+# -------------------------
+#   REQUERIMIENTOS DE VARIOS MENÚS
+# -------------------------
+def requerimientos_menus(db: Session, menu_ids):
+    """
+    Recetas de varios menús en una sola consulta:
+    {menu_id: {"tomate": 0.1, ...}, ...}
+    Todo id pedido aparece en el resultado ({} si no tiene ingredientes).
+    """
+    resultado = {menu_id: {} for menu_id in menu_ids}
+    if not resultado:
+        return resultado
+    filas = db.execute(
+        select(MenuIngrediente.menu_id, Ingrediente.nombre, MenuIngrediente.cantidad)
+        .join(Ingrediente, Ingrediente.id == MenuIngrediente.ingrediente_id)
+        .where(MenuIngrediente.menu_id.in_(resultado))
+    ).all()
+    for menu_id, nombre, cantidad in filas:
+        resultado[menu_id][nombre] = cantidad
     return resultado
 
 
+# -------------------------
+#   IDS DE MENÚS POR NOMBRE
+# -------------------------
+def ids_de_menus(db: Session, nombres):
+    """Retorna {nombre: id} de los menús existentes, en una sola consulta."""
+    nombres = list(nombres)
+    if not nombres:
+        return {}
+    return dict(db.execute(
+        select(Menu.nombre, Menu.id).where(Menu.nombre.in_(nombres))
+    ).all())
+
+
+# -------------------------
+#   PRECIOS DE MENÚS POR NOMBRE
+# -------------------------
+def precios_de_menus(db: Session, nombres):
+    """Retorna {nombre: precio} de los menús existentes, en una sola consulta."""
+    nombres = list(nombres)
+    if not nombres:
+        return {}
+    return dict(db.execute(
+        select(Menu.nombre, Menu.precio).where(Menu.nombre.in_(nombres))
+    ).all())
+
+
 # -------------------------
 #   OBTENER PRECIO DEL MENÚ
 # -------------------------
@@ -133,21 +220,10 @@ def ingredientes_de_menu(db: Session, menu_id: int):
         (nombre_ingrediente, cantidad, unidad)
     ]
     """
-    enlaces = (
-        db.query(MenuIngrediente)
-        .filter(MenuIngrediente.menu_id == menu_id)
-        .all()
-    )
-
-    resultado = []
-
-    for enlace in enlaces:
-        ing = (
-            db.query(Ingrediente)
-            .filter(Ingrediente.id == enlace.ingrediente_id)
-            .first()
-        )
-        if ing:
-            resultado.append((ing.nombre, enlace.cantidad, ing.unidad))
-
-    return resultado
\ No newline at end of file
+    filas = db.execute(
+        select(Ingrediente.nombre, MenuIngrediente.cantidad, Ingrediente.unidad)
+        .join(Ingrediente, Ingrediente.id == MenuIngrediente.ingrediente_id)
+        .where(MenuIngrediente.menu_id == menu_id)
+        .order_by(MenuIngrediente.id)
+    ).all()
+    return [tuple(fila) for fila in filas]
@@ -0,0 +1,24 @@
+# metadato_crud.py
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from models import Metadato
+
+
+# -------------------------
+#   LEER METADATO
+# -------------------------
+def obtener_metadato(db: Session, clave: str):
+    return db.scalar(select(Metadato.valor).where(Metadato.clave == clave))
+
+
+# -------------------------
+#   GUARDAR METADATO
+# -------------------------
+def guardar_metadato(db: Session, clave: str, valor: str):
+    """Inserta o reemplaza el valor (no hace commit)."""
+    stmt = sqlite_insert(Metadato).values(clave=clave, valor=valor)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[Metadato.clave],
+        set_={"valor": stmt.excluded.valor},
+    ))
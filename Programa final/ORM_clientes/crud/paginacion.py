@@ -0,0 +1,56 @@
+# paginacion.py
+# Paginación por clave (keyset) e iteración por lotes para los listar_*
+from sqlalchemy.orm import Session
+
+# Filas por página o por lote de yield_per
+TAMANO_PAGINA = 500
+
+
+# -------------------------
+#   PÁGINA POR CLAVE
+# -------------------------
+def _consulta_pagina(consulta, columna_id, despues_de, tamano):
+    """WHERE id > despues_de ORDER BY id LIMIT tamano: usa el índice del id."""
+    if despues_de is not None:
+        consulta = consulta.where(columna_id > despues_de)
+    return consulta.order_by(columna_id).limit(tamano)
+
+
+def _cursor(filas, tamano):
+    # Página incompleta: no quedan más filas
+    return filas[-1].id if len(filas) == tamano else None
+
+
+def pagina(db: Session, consulta, columna_id, despues_de=None, tamano=TAMANO_PAGINA):
+    """
+    Retorna (filas, cursor). Para la página siguiente se vuelve a llamar con
+    despues_de=cursor; cursor es None en la última página. A diferencia de
+    OFFSET, el costo no crece con el número de página.
+    """
+    filas = db.scalars(_consulta_pagina(consulta, columna_id, despues_de, tamano)).all()
+    return filas, _cursor(filas, tamano)
+
+
+async def pagina_async(db, consulta, columna_id, despues_de=None, tamano=TAMANO_PAGINA):
+    res = await db.scalars(_consulta_pagina(consulta, columna_id, despues_de, tamano))
+    filas = res.all()
+    return filas, _cursor(filas, tamano)
+
+
+# -------------------------
+#   ITERAR POR LOTES
+# -------------------------
+def iterar(db: Session, consulta, columna_id, tamano_lote=TAMANO_PAGINA):
+    """
+    Recorre todas las filas trayendo tamano_lote a la vez (yield_per), sin
+    cargar la tabla completa en memoria. La sesión debe seguir abierta
+    mientras se itera.
+    """
+    consulta = consulta.order_by(columna_id).execution_options(yield_per=tamano_lote)
+    yield from db.scalars(consulta)
+
+
+async def iterar_async(db, consulta, columna_id, tamano_lote=TAMANO_PAGINA):
+    consulta = consulta.order_by(columna_id).execution_options(yield_per=tamano_lote)
+    async for fila in await db.stream_scalars(consulta):
+        yield fila
@@ -1,42 +1,142 @@
 # pedido_crud.py
+from collections import Counter
+
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from models import Pedido, PedidoItem, Menu
+from crud.paginacion import TAMANO_PAGINA, iterar, pagina
+from models import Cliente, Pedido, PedidoItem, Menu
+from crud.ventas_crud import registrar_venta, revertir_venta
+
+
+IVA = 0.19
 
 
 # -------------------------
-#     CREAR PEDIDO
+#   MONTOS DEL PEDIDO
+# -------------------------
+def calcular_montos(subtotal: int):
+    """Retorna (subtotal, iva, total) con el mismo redondeo que la boleta."""
+    subtotal = int(subtotal or 0)
+    iva = round(subtotal * IVA)
+    return subtotal, iva, subtotal + iva
+
+
 # -------------------------
-def crear_pedido(db: Session, cliente_id: int, items: list):
+#   FECHA Y HORA DEL PEDIDO
+# -------------------------
+def fecha_hora_pedido(fecha=None):
     """
-    items = [ menu_id, menu_id, menu_id ... ]
-    Cada aparición cuenta como 1 unidad.
+    Convierte la fecha elegida en un datetime: un día "YYYY-MM-DD" se
+    combina con la hora actual. Sin fecha (o inválida) retorna ahora.
     """
+    from datetime import datetime
+    if isinstance(fecha, datetime):
+        return fecha
+    ahora = datetime.now()
     try:
-        nuevo = Pedido(cliente_id=cliente_id)
-        db.add(nuevo)
-        db.commit()
-        db.refresh(nuevo)
+        dia = datetime.strptime(fecha, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return ahora
+    return datetime.combine(dia, ahora.time())
 
-        # Contar cantidades usando reduce
-        from functools import reduce
-        cantidades = reduce(lambda acc, menu_id: {**acc, menu_id: acc.get(menu_id, 0) + 1}, items, {})
 
-        # Insertar items
-        for menu_id, cant in cantidades.items():
-            item = PedidoItem(
-                pedido_id=nuevo.id,
-                menu_id=menu_id,
-                cantidad=cant
+# -------------------------
+#     COLOCAR PEDIDO
+# -------------------------
+def colocar_pedido(db: Session, cliente_id: int, items, fecha=None, descontar_stock: bool = True):
+    """
+    Registra un pedido completo en una sola transacción:
+    precios vigentes, pedido e ítems (un solo flush), descuento atómico del
+    stock de todas las recetas y resumen de ventas.
+
+    items = [menu_id, menu_id, ...] (cada aparición es 1 unidad) o
+            {menu_id: cantidad}
+    fecha = "YYYY-MM-DD" o datetime (por defecto ahora)
+
+    Retorna un diccionario:
+    {
+        "pedido": Pedido,
+        "detalle": [(nombre_menu, cantidad, precio_unitario, subtotal_linea)],
+        "subtotal": ..., "iva": ..., "total": ...
+    }
+    o None si el pedido está vacío, algún menú o el cliente no existe o no
+    alcanza el stock (en ese caso no se guarda nada).
+    """
+    from crud.ingrediente_crud import _descontar
+    from crud.menu_crud import requerimientos_menus
+
+    cantidades = Counter(items)
+    if not cantidades or any(c <= 0 for c in cantidades.values()):
+        return None
+    try:
+        # Precios vigentes de todos los menús del pedido en una consulta
+        menus = {
+            menu_id: (nombre, precio)
+            for menu_id, nombre, precio in db.execute(
+                select(Menu.id, Menu.nombre, Menu.precio).where(Menu.id.in_(list(cantidades)))
             )
-            db.add(item)
+        }
+        if len(menus) != len(cantidades):
+            return None
+
+        if descontar_stock:
+            # Requerimientos de todo el pedido; cada UPDATE descuenta solo si
+            # alcanza, así dos terminales no venden el mismo stock
+            requerimientos = Counter()
+            for menu_id, receta in requerimientos_menus(db, list(cantidades)).items():
+                for ingrediente, cant in receta.items():
+                    requerimientos[ingrediente] += cant * cantidades[menu_id]
+            for ingrediente, req in requerimientos.items():
+                if not _descontar(db, ingrediente, req):
+                    db.rollback()
+                    return None
+
+        nuevo = Pedido(cliente_id=cliente_id, fecha_hora=fecha_hora_pedido(fecha))
+        detalle = []
+        for menu_id, cant in cantidades.items():
+            nombre, precio = menus[menu_id]
+            # Se guarda el precio unitario al vender
+            nuevo.items.append(PedidoItem(menu_id=menu_id, cantidad=cant, precio_unitario=precio))
+            detalle.append((nombre, cant, precio, precio * cant))
+        nuevo.subtotal, nuevo.iva, nuevo.total = calcular_montos(sum(d[3] for d in detalle))
+        db.add(nuevo)
 
+        # registrar_venta hace el único flush (pedido + ítems) y suma el
+        # resumen de ventas en la misma transacción
+        registrar_venta(db, nuevo, nuevo.items)
+        # El cliente se verifica después del primer INSERT: la transacción ya
+        # tiene el bloqueo de escritura y otra terminal no puede borrarlo
+        # antes del commit (PRAGMA foreign_keys está desactivado)
+        if db.get(Cliente, cliente_id) is None:
+            db.rollback()
+            return None
         db.commit()
-        return nuevo
+        return {
+            "pedido": nuevo,
+            "detalle": detalle,
+            "subtotal": nuevo.subtotal,
+            "iva": nuevo.iva,
+            "total": nuevo.total,
+        }
     except Exception:
         db.rollback()
         return None
 
 
+# -------------------------
+#     CREAR PEDIDO
+# -------------------------
+def crear_pedido(db: Session, cliente_id: int, items: list, fecha: str = None):
+    """
+    items = [ menu_id, menu_id, menu_id ... ]
+    Cada aparición cuenta como 1 unidad.
+    fecha = "YYYY-MM-DD" o datetime (por defecto ahora)
+    No descuenta stock; para eso usar colocar_pedido.
+    """
+    resultado = colocar_pedido(db, cliente_id, items, fecha, descontar_stock=False)
+    return resultado["pedido"] if resultado else None
+
+
 # -------------------------
 #     OBTENER PEDIDO POR ID
 # -------------------------
@@ -48,7 +148,20 @@ def obtener_pedido(db: Session, pedido_id: int):
 #     LISTAR TODOS LOS PEDIDOS
 # -------------------------
 def listar_pedidos(db: Session):
-    return db.query(Pedido).all()
+    return db.scalars(select(Pedido).order_by(Pedido.id)).all()
+
+
+def listar_pedidos_pagina(db: Session, despues_de: int = None, tamano: int = TAMANO_PAGINA):
+    """
+    Una página de los pedidos ordenada por id: retorna (pedidos, cursor).
+    Pasar despues_de=cursor para la siguiente; cursor None = última página.
+    """
+    return pagina(db, select(Pedido), Pedido.id, despues_de, tamano)
+
+
+def iterar_pedidos(db: Session, tamano_lote: int = TAMANO_PAGINA):
+    """Recorre los pedidos por lotes (yield_per); la sesión debe seguir abierta."""
+    return iterar(db, select(Pedido), Pedido.id, tamano_lote)
 
 
 # -------------------------
@@ -61,42 +174,73 @@ def obtener_detalle_pedido(db: Session, pedido_id: int):
         (nombre_menu, cantidad, precio_unitario, subtotal_linea)
     ]
     """
-    pedido = obtener_pedido(db, pedido_id)
-    if not pedido:
-        return []
+    # Un solo SELECT con JOIN; el precio es el guardado al vender, no el
+    # precio actual del menú
+    filas = db.execute(
+        select(Menu.nombre, PedidoItem.cantidad, PedidoItem.precio_unitario)
+        .join(Menu, Menu.id == PedidoItem.menu_id)
+        .where(PedidoItem.pedido_id == pedido_id)
+        .order_by(PedidoItem.id)
+    ).all()
+    return [(nombre, cant, precio, precio * cant) for nombre, cant, precio in filas]
+
+
+# -------------------------
+#     TOTALES DE PEDIDOS
+# -------------------------
+# Máximo de ids por "IN (...)": SQLite limita la cantidad de parámetros
+TAMANO_LOTE_TOTALES = 500
 
-    detalle = []
 
-    for item in pedido.items:
-        menu = db.query(Menu).filter(Menu.id == item.menu_id).first()
+def _consulta_totales():
+    return select(Pedido.id, Pedido.subtotal, Pedido.iva, Pedido.total)
 
-        if menu:
-            subtotal = menu.precio * item.cantidad
-            detalle.append((menu.nombre, item.cantidad, menu.precio, subtotal))
 
-    return detalle
+def totales_pedido(db: Session, pedido_id: int):
+    """
+    Retorna (subtotal, iva, total) del pedido con una sola consulta, o
+    (0, 0, 0) si no existe. Son los montos guardados al crearlo.
+    """
+    fila = db.execute(_consulta_totales().where(Pedido.id == pedido_id)).first()
+    return tuple(fila[1:]) if fila else (0, 0, 0)
+
+
+def totales_pedidos(db: Session, pedido_ids):
+    """
+    Retorna {pedido_id: (subtotal, iva, total)} de muchos pedidos (cierre
+    del día, reimpresiones) con una consulta por cada TAMANO_LOTE_TOTALES
+    ids. Los ids que no existen no aparecen en el resultado.
+    """
+    ids = list(dict.fromkeys(pedido_ids))
+    totales = {}
+    for i in range(0, len(ids), TAMANO_LOTE_TOTALES):
+        lote = ids[i:i + TAMANO_LOTE_TOTALES]
+        for pedido_id, subtotal, iva, total in db.execute(
+            _consulta_totales().where(Pedido.id.in_(lote))
+        ):
+            totales[pedido_id] = (subtotal, iva, total)
+    return totales
 
 
 # -------------------------
 #     CALCULAR SUBTOTAL
 # -------------------------
 def calcular_subtotal(db: Session, pedido_id: int):
-    detalle = obtener_detalle_pedido(db, pedido_id)
-    return sum(linea[3] for linea in detalle)  # subtotal_linea
+    return totales_pedido(db, pedido_id)[0]
 
 
 # -------------------------
 #          IVA (19%)
 # -------------------------
 def calcular_iva(db: Session, pedido_id: int):
-    return round(calcular_subtotal(db, pedido_id) * 0.19)
+    return totales_pedido(db, pedido_id)[1]
 
 
 # -------------------------
 #          TOTAL
 # -------------------------
 def calcular_total(db: Session, pedido_id: int):
-    return calcular_subtotal(db, pedido_id) + calcular_iva(db, pedido_id)
+    return totales_pedido(db, pedido_id)[2]
 
 
 # -------------------------
@@ -107,8 +251,10 @@ def eliminar_pedido(db: Session, pedido_id: int):
     if not pedido:
         return False
     try:
+        items = list(pedido.items)
+        revertir_venta(db, pedido, items)
         # Borrar primero los items
-        for item in pedido.items:
+        for item in items:
             db.delete(item)
         db.delete(pedido)
         db.commit()
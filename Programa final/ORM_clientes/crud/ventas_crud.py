@@ -0,0 +1,140 @@
+# ventas_crud.py
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from models import Pedido, PedidoItem, VentaDiaria, VentaDiariaMenu
+
+
+# -------------------------
+#   SENTENCIAS DEL RESUMEN
+# -------------------------
+def _acumular(modelo, valores: dict, claves: list):
+    """INSERT ... ON CONFLICT(claves) DO UPDATE SET col = col + excluded.col"""
+    stmt = sqlite_insert(modelo).values(**valores)
+    return stmt.on_conflict_do_update(
+        index_elements=claves,
+        set_={
+            col: getattr(modelo, col) + getattr(stmt.excluded, col)
+            for col in valores if col not in claves
+        },
+    )
+
+
+def sentencias_venta(pedido: Pedido, items: list, signo: int = 1):
+    """
+    Sentencias que suman (signo=1) o restan (signo=-1) un pedido en
+    ventas_diarias y ventas_diarias_menu. Se exponen por separado para que
+    crud_async pueda ejecutarlas con AsyncSession.
+    """
+    sentencias = [
+        _acumular(VentaDiaria, {
+            "fecha": pedido.fecha,
+            "pedidos": signo,
+            "subtotal": signo * pedido.subtotal,
+            "iva": signo * pedido.iva,
+            "total": signo * pedido.total,
+        }, ["fecha"])
+    ]
+    for item in items:
+        sentencias.append(_acumular(VentaDiariaMenu, {
+            "fecha": pedido.fecha,
+            "menu_id": item.menu_id,
+            "cantidad": signo * item.cantidad,
+            "subtotal": signo * item.cantidad * item.precio_unitario,
+        }, ["fecha", "menu_id"]))
+    if signo < 0:
+        # Días o menús que quedaron sin ventas
+        sentencias.append(delete(VentaDiaria).where(VentaDiaria.pedidos <= 0))
+        sentencias.append(delete(VentaDiariaMenu).where(VentaDiariaMenu.cantidad <= 0))
+    return sentencias
+
+
+# -------------------------
+#   REGISTRAR / REVERTIR VENTA
+# -------------------------
+def registrar_venta(db: Session, pedido: Pedido, items: list):
+    """
+    Suma el pedido al resumen. No hace commit: debe llamarse dentro de la
+    misma transacción que inserta el pedido.
+    """
+    db.flush()
+    for stmt in sentencias_venta(pedido, items, 1):
+        db.execute(stmt)
+
+
+def revertir_venta(db: Session, pedido: Pedido, items: list):
+    """Resta el pedido del resumen (al eliminarlo). Tampoco hace commit."""
+    for stmt in sentencias_venta(pedido, items, -1):
+        db.execute(stmt)
+
+
+# -------------------------
+#   RECONSTRUIR RESUMEN
+# -------------------------
+def reconstruir_ventas(db: Session):
+    """
+    Vuelve a calcular ventas_diarias y ventas_diarias_menu desde todos los
+    pedidos (para bases existentes o si el resumen quedara inconsistente).
+    """
+    db.execute(delete(VentaDiariaMenu))
+    db.execute(delete(VentaDiaria))
+    db.execute(insert(VentaDiaria).from_select(
+        ["fecha", "pedidos", "subtotal", "iva", "total"],
+        select(
+            Pedido.fecha,
+            func.count(Pedido.id),
+            func.sum(Pedido.subtotal),
+            func.sum(Pedido.iva),
+            func.sum(Pedido.total),
+        ).group_by(Pedido.fecha),
+    ))
+    db.execute(insert(VentaDiariaMenu).from_select(
+        ["fecha", "menu_id", "cantidad", "subtotal"],
+        select(
+            Pedido.fecha,
+            PedidoItem.menu_id,
+            func.sum(PedidoItem.cantidad),
+            func.sum(PedidoItem.cantidad * PedidoItem.precio_unitario),
+        )
+        .join(Pedido, Pedido.id == PedidoItem.pedido_id)
+        .group_by(Pedido.fecha, PedidoItem.menu_id),
+    ))
+    db.commit()
+    return db.query(func.count()).select_from(VentaDiaria).scalar()
+
+
+# -------------------------
+#   CONSULTAS DEL RESUMEN
+# -------------------------
+def _filtrar_dias(q, columna, desde=None, hasta=None):
+    """desde incluido, hasta excluido (se comparan días YYYY-MM-DD)."""
+    if desde is not None:
+        q = q.filter(columna >= desde.strftime("%Y-%m-%d"))
+    if hasta is not None:
+        q = q.filter(columna < hasta.strftime("%Y-%m-%d"))
+    return q
+
+
+def ventas_por_dia(db: Session, desde=None, hasta=None):
+    """[(YYYY-MM-DD, subtotal)] ordenado por fecha."""
+    q = db.query(VentaDiaria.fecha, VentaDiaria.subtotal)
+    return _filtrar_dias(q, VentaDiaria.fecha, desde, hasta).order_by(VentaDiaria.fecha).all()
+
+
+def ventas_por_mes(db: Session, desde=None, hasta=None):
+    """[(YYYY-MM, subtotal)] ordenado por mes."""
+    mes = func.substr(VentaDiaria.fecha, 1, 7).label("mes")
+    q = db.query(mes, func.sum(VentaDiaria.subtotal))
+    return _filtrar_dias(q, VentaDiaria.fecha, desde, hasta).group_by(mes).order_by(mes).all()
+
+
+def ventas_totales(db: Session, desde=None, hasta=None):
+    q = db.query(func.coalesce(func.sum(VentaDiaria.subtotal), 0))
+    return _filtrar_dias(q, VentaDiaria.fecha, desde, hasta).scalar()
+
+
+def unidades_por_menu(db: Session, desde=None, hasta=None):
+    """[(menu_id, unidades)] vendidas en el rango."""
+    q = db.query(VentaDiariaMenu.menu_id, func.sum(VentaDiariaMenu.cantidad))
+    q = _filtrar_dias(q, VentaDiariaMenu.fecha, desde, hasta)
+    return q.group_by(VentaDiariaMenu.menu_id).all()
@@ -0,0 +1,114 @@
+# crud_async/cliente_crud.py
+# Versión asíncrona de crud/cliente_crud.py (mismos nombres y semántica)
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from crud.paginacion import TAMANO_PAGINA, iterar_async, pagina_async
+from models import Cliente, Pedido, normalizar_correo
+
+
+# -------------------------
+#     CREAR CLIENTE
+# -------------------------
+async def crear_cliente(db: AsyncSession, nombre: str, correo: str):
+    """
+    Crea un cliente si no existe y lo retorna.
+    Si ya existe por correo, retorna el existente.
+    """
+    if not nombre or not correo:
+        return None  # Validación de campos vacíos
+    nuevo = await agregar_cliente(db, nombre, correo)
+    if nuevo:
+        return nuevo
+    return await obtener_cliente_por_correo(db, correo)
+
+
+# -------------------------
+#   AGREGAR CLIENTE NUEVO
+# -------------------------
+async def agregar_cliente(db: AsyncSession, nombre: str, correo: str):
+    """None si el correo ya está registrado (lo rechaza el índice único) o si falla la base."""
+    if not nombre or not correo:
+        return None
+    try:
+        nuevo = Cliente(nombre=nombre, correo=correo.strip())
+        db.add(nuevo)
+        await db.commit()
+        return nuevo
+    except SQLAlchemyError:
+        await db.rollback()
+        return None
+
+
+# -------------------------
+#   OBTENER CLIENTE POR ID
+# -------------------------
+async def obtener_cliente(db: AsyncSession, cliente_id: int):
+    return await db.get(Cliente, cliente_id)
+
+
+# -------------------------
+#   OBTENER CLIENTE POR CORREO
+# -------------------------
+async def obtener_cliente_por_correo(db: AsyncSession, correo: str):
+    res = await db.execute(
+        select(Cliente).where(Cliente.correo_normalizado == normalizar_correo(correo))
+    )
+    return res.scalars().first()
+
+
+# -------------------------
+#     LISTAR CLIENTES
+# -------------------------
+async def listar_clientes(db: AsyncSession):
+    res = await db.execute(select(Cliente).order_by(Cliente.id))
+    return list(res.scalars().all())
+
+
+async def listar_clientes_pagina(db: AsyncSession, despues_de: int = None, tamano: int = TAMANO_PAGINA):
+    return await pagina_async(db, select(Cliente), Cliente.id, despues_de, tamano)
+
+
+def iterar_clientes(db: AsyncSession, tamano_lote: int = TAMANO_PAGINA):
+    """async for ... in iterar_clientes(db): lotes con yield_per sobre stream_scalars."""
+    return iterar_async(db, select(Cliente), Cliente.id, tamano_lote)
+
+
+# -------------------------
+#     BORRAR CLIENTE
+# -------------------------
+async def eliminar_cliente(db: AsyncSession, cliente_id: int):
+    cliente = await obtener_cliente(db, cliente_id)
+    if not cliente:
+        return False
+    # Impedir eliminar si tiene pedidos asociados (sin lazy load en async)
+    res = await db.execute(select(Pedido.id).where(Pedido.cliente_id == cliente_id).limit(1))
+    if res.first():
+        return False
+    try:
+        await db.delete(cliente)
+        await db.commit()
+        return True
+    except Exception:
+        await db.rollback()
+        return False
+
+
+# -------------------------
+#  ACTUALIZAR CLIENTE
+# -------------------------
+async def actualizar_cliente(db: AsyncSession, cliente_id: int, nombre=None, correo=None):
+    cliente = await obtener_cliente(db, cliente_id)
+    if not cliente:
+        return None
+    if nombre:
+        cliente.nombre = nombre
+    if correo:
+        # Si otro cliente ya usa el correo, el índice único hace fallar el commit
+        cliente.correo = correo.strip()
+    try:
+        await db.commit()
+        return cliente
+    except Exception:
+        await db.rollback()
+        return None
@@ -0,0 +1,229 @@
+# crud_async/ingrediente_crud.py
+# Versión asíncrona de crud/ingrediente_crud.py (mismos nombres y semántica)
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import ConflictoVersion, detectar_conflicto_async, reintentar_en_conflicto_async
+from models import Ingrediente
+from crud.ingrediente_crud import (
+    TAMANO_LOTE_IMPORTACION, _upsert_ingredientes, _lotes, _separar_lote, _contar_lote,
+    _consulta_stock, _comparar_stock, _consulta_ingredientes,
+)
+from crud.paginacion import TAMANO_PAGINA, iterar_async, pagina_async
+
+
+# -------------------------
+#   OBTENER INGREDIENTE POR NOMBRE
+# -------------------------
+async def obtener_por_nombre(db: AsyncSession, nombre: str):
+    res = await db.execute(select(Ingrediente).where(Ingrediente.nombre == nombre))
+    return res.scalars().first()
+
+
+# -------------------------
+#       LISTAR INGREDIENTES
+# -------------------------
+async def listar_ingredientes(db: AsyncSession):
+    res = await db.execute(_consulta_ingredientes().order_by(Ingrediente.id))
+    return list(res.scalars().all())
+
+
+async def listar_ingredientes_pagina(
+    db: AsyncSession, despues_de: int = None, tamano: int = TAMANO_PAGINA, solo_con_stock: bool = True
+):
+    return await pagina_async(db, _consulta_ingredientes(solo_con_stock), Ingrediente.id, despues_de, tamano)
+
+
+def iterar_ingredientes(
+    db: AsyncSession, tamano_lote: int = TAMANO_PAGINA, solo_con_stock: bool = True
+):
+    """async for ... in iterar_ingredientes(db): lotes con yield_per sobre stream_scalars."""
+    return iterar_async(db, _consulta_ingredientes(solo_con_stock), Ingrediente.id, tamano_lote)
+
+
+# -------------------------
+#       CREAR INGREDIENTE
+# -------------------------
+async def crear_ingrediente(
+    db: AsyncSession, nombre: str, unidad: str, cantidad: float, version: int = None
+):
+    """Lanza ConflictoVersion si la fila ya no tiene la versión leída (ver crud)."""
+    if not nombre or not unidad or cantidad is None:
+        return None
+
+    async def guardar():
+        existente = await obtener_por_nombre(db, nombre)
+        if existente:
+            if version is not None and existente.version != version:
+                raise ConflictoVersion(f"{nombre}: versión {existente.version}, se leyó {version}")
+            existente.unidad = unidad
+            existente.cantidad = cantidad
+            await db.commit()
+            await db.refresh(existente)
+            return existente
+        nuevo = Ingrediente(nombre=nombre, unidad=unidad, cantidad=cantidad)
+        db.add(nuevo)
+        await db.commit()
+        await db.refresh(nuevo)
+        return nuevo
+
+    try:
+        return await detectar_conflicto_async(db, guardar)
+    except ConflictoVersion:
+        raise
+    except Exception:
+        await db.rollback()
+        return None
+
+
+# -------------------------
+#   IMPORTACIÓN MASIVA (CSV)
+# -------------------------
+async def importar_ingredientes(db: AsyncSession, filas, tamano_lote: int = TAMANO_LOTE_IMPORTACION):
+    """
+    Carga masiva de ingredientes en una transacción (ver
+    crud/ingrediente_crud.importar_ingredientes).
+    """
+    resumen = {"insertados": 0, "actualizados": 0, "rechazados": 0}
+    vistos = set()
+    stmt = _upsert_ingredientes()
+    try:
+        for lote in _lotes(filas, tamano_lote):
+            validas = _separar_lote(lote, resumen)
+            if not validas:
+                continue
+            nombres = {v["nombre"] for v in validas} - vistos
+            existentes = set(await db.scalars(
+                select(Ingrediente.nombre).where(Ingrediente.nombre.in_(nombres))
+            )) if nombres else set()
+            _contar_lote(validas, existentes, vistos, resumen)
+            await db.execute(stmt, validas)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        return None
+    db.expire_all()
+    return resumen
+
+
+# -------------------------
+#   SUMAR STOCK A INGREDIENTE
+# -------------------------
+async def sumar_stock(db: AsyncSession, nombre: str, cantidad: float):
+    async def sumar():
+        ing = await obtener_por_nombre(db, nombre)
+        if not ing:
+            return None
+
+        ing.cantidad += cantidad
+        await db.commit()
+        await db.refresh(ing)
+        return ing
+
+    try:
+        return await reintentar_en_conflicto_async(db, sumar)
+    except Exception:
+        await db.rollback()
+        return None
+
+
+# -------------------------
+#   DESCUENTO ATÓMICO
+# -------------------------
+async def _descontar(db: AsyncSession, nombre: str, cantidad: float):
+    """
+    UPDATE con guarda: solo descuenta si la fila tiene stock suficiente.
+    Dos terminales no pueden vender lo mismo porque la comparación y la
+    resta ocurren en la misma sentencia. También incrementa la versión para
+    que una edición concurrente de la misma fila detecte el conflicto.
+    Retorna True si se descontó.
+    """
+    resultado = await db.execute(
+        update(Ingrediente)
+        .where(Ingrediente.nombre == nombre, Ingrediente.cantidad >= cantidad)
+        .values(cantidad=Ingrediente.cantidad - cantidad, version=Ingrediente.version + 1)
+        .execution_options(synchronize_session="fetch")
+    )
+    return resultado.rowcount == 1
+
+
+# -------------------------
+#   RESTAR STOCK A INGREDIENTE
+# -------------------------
+async def restar_stock(db: AsyncSession, nombre: str, cantidad: float):
+    if await _descontar(db, nombre, cantidad):
+        await db.commit()
+        return True
+
+    await db.rollback()
+    if not await obtener_por_nombre(db, nombre):
+        return None
+    return False  # No alcanza
+
+
+# -------------------------
+#    ELIMINAR INGREDIENTE
+# -------------------------
+async def eliminar_ingrediente(db: AsyncSession, nombre: str):
+    ing = await obtener_por_nombre(db, nombre)
+    if not ing:
+        return False
+    try:
+        await db.delete(ing)
+        await db.commit()
+        return True
+    except Exception:
+        await db.rollback()
+        return False
+
+
+# -------------------------
+#   EVALUAR STOCK
+# -------------------------
+async def evaluar_stock(db: AsyncSession, requerimientos: dict):
+    """
+    requerimientos = {"tomate": 0.1, "pan": 1}
+    Retorna (alcanza, [(nombre, requerido, disponible)]) con una sola consulta.
+    """
+    if not requerimientos:
+        return True, []
+    res = await db.execute(_consulta_stock(list(requerimientos)))
+    faltas = _comparar_stock(requerimientos, dict(res.all()))
+    return not faltas, faltas
+
+
+# -------------------------
+# VALIDACIÓN DE STOCK
+# -------------------------
+async def validar_stock(db: AsyncSession, requerimientos: dict):
+    """
+    requerimientos = {"tomate": 0.1, "pan": 1}
+    """
+    return (await evaluar_stock(db, requerimientos))[0]
+
+
+# -------------------------
+#   LISTAR FALTANTES
+# -------------------------
+async def faltantes(db: AsyncSession, requerimientos: dict):
+    """
+    Retorna lista de:
+    [(nombre, requerido, disponible)]
+    """
+    return (await evaluar_stock(db, requerimientos))[1]
+
+
+# -------------------------
+#   DESCONTAR REQUERIMIENTOS
+# -------------------------
+async def descontar_requerimientos(db: AsyncSession, requerimientos: dict):
+    """
+    Descuenta todo el stock en una sola transacción, si no alcanza
+    algún ingrediente hace rollback y retorna False
+    """
+    for nombre, req in requerimientos.items():
+        if not await _descontar(db, nombre, req):
+            await db.rollback()
+            return False
+
+    await db.commit()
+    return True
@@ -0,0 +1,202 @@
+# crud_async/menu_crud.py
+# Versión asíncrona de crud/menu_crud.py (mismos nombres y semántica)
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import ConflictoVersion, detectar_conflicto_async
+from models import Menu, MenuIngrediente, Ingrediente
+from crud.menu_crud import _upsert_menu_ingrediente
+from crud.paginacion import TAMANO_PAGINA, iterar_async, pagina_async
+
+
+# -------------------------
+#   CREAR MENÚ
+# -------------------------
+async def crear_menu(db: AsyncSession, nombre: str, precio: int, descripcion: str = None):
+    """
+    Crea un menú si no existe. Si existe lo retorna.
+    """
+    if not nombre or precio is None or precio <= 0:
+        return None
+    existente = await obtener_menu_por_nombre(db, nombre)
+    if existente:
+        return existente
+    try:
+        nuevo = Menu(nombre=nombre, precio=precio, descripcion=descripcion)
+        db.add(nuevo)
+        await db.commit()
+        await db.refresh(nuevo)
+        return nuevo
+    except Exception:
+        await db.rollback()
+        return None
+
+
+# -------------------------
+#   CREAR O ACTUALIZAR MENÚ
+# -------------------------
+async def guardar_menu(
+    db: AsyncSession, nombre: str, precio: int, descripcion: str = None, version: int = None
+):
+    """Lanza ConflictoVersion si el menú ya no tiene la versión leída (ver crud)."""
+    if not nombre or precio is None or precio <= 0:
+        return None
+
+    async def guardar():
+        menu = await obtener_menu_por_nombre(db, nombre)
+        if menu and version is not None and menu.version != version:
+            raise ConflictoVersion(f"{nombre}: versión {menu.version}, se leyó {version}")
+        if not menu:
+            menu = Menu(nombre=nombre)
+            db.add(menu)
+        menu.precio = precio
+        menu.descripcion = descripcion
+        await db.commit()
+        return menu
+
+    try:
+        return await detectar_conflicto_async(db, guardar)
+    except ConflictoVersion:
+        raise
+    except Exception:
+        await db.rollback()
+        return None
+
+
+# -------------------------
+#   LISTAR TODOS LOS MENÚS
+# -------------------------
+async def listar_menus(db: AsyncSession):
+    res = await db.execute(select(Menu).order_by(Menu.id))
+    return list(res.scalars().all())
+
+
+async def listar_menus_pagina(db: AsyncSession, despues_de: int = None, tamano: int = TAMANO_PAGINA):
+    return await pagina_async(db, select(Menu), Menu.id, despues_de, tamano)
+
+
+def iterar_menus(db: AsyncSession, tamano_lote: int = TAMANO_PAGINA):
+    """async for ... in iterar_menus(db): lotes con yield_per sobre stream_scalars."""
+    return iterar_async(db, select(Menu), Menu.id, tamano_lote)
+
+
+# -------------------------
+#   OBTENER MENÚ POR NOMBRE
+# -------------------------
+async def obtener_menu_por_nombre(db: AsyncSession, nombre: str):
+    res = await db.execute(select(Menu).where(Menu.nombre == nombre))
+    return res.scalars().first()
+
+
+# -------------------------
+#   ASIGNAR INGREDIENTE A MENÚ
+# -------------------------
+async def agregar_ingrediente_a_menu(db: AsyncSession, menu_id: int, ingrediente_id: int, cantidad: float):
+    """
+    Asocia un ingrediente con un menú.
+    Si ya existe la relación, actualiza la cantidad.
+    """
+    if cantidad is None or cantidad <= 0:
+        return None
+    try:
+        res = await db.scalars(
+            _upsert_menu_ingrediente(menu_id, ingrediente_id, cantidad),
+            execution_options={"populate_existing": True},
+        )
+        relacion = res.one()
+        await db.commit()
+        return relacion
+    except Exception:
+        await db.rollback()
+        return None
+
+
+# -------------------------
+#   REQUERIMIENTOS DE UN MENÚ
+# -------------------------
+async def requerimientos_menu(db: AsyncSession, menu_id: int):
+    """
+    Retorna un diccionario:
+    {
+        "tomate": 0.1,
+        "pan": 1,
+        ...
+    }
+    """
+    res = await db.execute(
+        select(Ingrediente.nombre, MenuIngrediente.cantidad)
+        .join(Ingrediente, Ingrediente.id == MenuIngrediente.ingrediente_id)
+        .where(MenuIngrediente.menu_id == menu_id)
+    )
+    return {nombre: cantidad for nombre, cantidad in res.all()}
+
+
+# -------------------------
+#   REQUERIMIENTOS DE VARIOS MENÚS
+# -------------------------
+async def requerimientos_menus(db: AsyncSession, menu_ids):
+    """
+    Recetas de varios menús en una sola consulta:
+    {menu_id: {"tomate": 0.1, ...}, ...}
+    """
+    resultado = {menu_id: {} for menu_id in menu_ids}
+    if not resultado:
+        return resultado
+    res = await db.execute(
+        select(MenuIngrediente.menu_id, Ingrediente.nombre, MenuIngrediente.cantidad)
+        .join(Ingrediente, Ingrediente.id == MenuIngrediente.ingrediente_id)
+        .where(MenuIngrediente.menu_id.in_(resultado))
+    )
+    for menu_id, nombre, cantidad in res.all():
+        resultado[menu_id][nombre] = cantidad
+    return resultado
+
+
+# -------------------------
+#   IDS DE MENÚS POR NOMBRE
+# -------------------------
+async def ids_de_menus(db: AsyncSession, nombres):
+    """Retorna {nombre: id} de los menús existentes, en una sola consulta."""
+    nombres = list(nombres)
+    if not nombres:
+        return {}
+    res = await db.execute(select(Menu.nombre, Menu.id).where(Menu.nombre.in_(nombres)))
+    return dict(res.all())
+
+
+# -------------------------
+#   PRECIOS DE MENÚS POR NOMBRE
+# -------------------------
+async def precios_de_menus(db: AsyncSession, nombres):
+    """Retorna {nombre: precio} de los menús existentes, en una sola consulta."""
+    nombres = list(nombres)
+    if not nombres:
+        return {}
+    res = await db.execute(select(Menu.nombre, Menu.precio).where(Menu.nombre.in_(nombres)))
+    return dict(res.all())
+
+
+# -------------------------
+#   OBTENER PRECIO DEL MENÚ
+# -------------------------
+async def precio_menu(db: AsyncSession, menu_id: int):
+    m = await db.get(Menu, menu_id)
+    return m.precio if m else 0
+
+
+# -------------------------
+#   OBTENER INGREDIENTES DE MENÚ (DETALLADO)
+# -------------------------
+async def ingredientes_de_menu(db: AsyncSession, menu_id: int):
+    """
+    Retorna:
+    [
+        (nombre_ingrediente, cantidad, unidad)
+    ]
+    """
+    res = await db.execute(
+        select(Ingrediente.nombre, MenuIngrediente.cantidad, Ingrediente.unidad)
+        .join(Ingrediente, Ingrediente.id == MenuIngrediente.ingrediente_id)
+        .where(MenuIngrediente.menu_id == menu_id)
+        .order_by(MenuIngrediente.id)
+    )
+    return [tuple(fila) for fila in res.all()]
@@ -0,0 +1,196 @@
+# crud_async/pedido_crud.py
+# Versión asíncrona de crud/pedido_crud.py (mismos nombres y semántica)
+from collections import Counter
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Cliente, Pedido, PedidoItem, Menu
+from crud.pedido_crud import TAMANO_LOTE_TOTALES, _consulta_totales, calcular_montos, fecha_hora_pedido
+from crud.paginacion import TAMANO_PAGINA, iterar_async, pagina_async
+from crud.ventas_crud import sentencias_venta
+
+
+# -------------------------
+#     COLOCAR PEDIDO
+# -------------------------
+async def colocar_pedido(db: AsyncSession, cliente_id: int, items, fecha=None, descontar_stock: bool = True):
+    """
+    Pedido, ítems, descuento de stock y resumen de ventas en una sola
+    transacción. Mismo resultado que crud.pedido_crud.colocar_pedido.
+    """
+    from crud_async.ingrediente_crud import _descontar
+    from crud_async.menu_crud import requerimientos_menus
+
+    cantidades = Counter(items)
+    if not cantidades or any(c <= 0 for c in cantidades.values()):
+        return None
+    try:
+        res = await db.execute(
+            select(Menu.id, Menu.nombre, Menu.precio).where(Menu.id.in_(list(cantidades)))
+        )
+        menus = {menu_id: (nombre, precio) for menu_id, nombre, precio in res.all()}
+        if len(menus) != len(cantidades):
+            return None
+
+        if descontar_stock:
+            requerimientos = Counter()
+            for menu_id, receta in (await requerimientos_menus(db, list(cantidades))).items():
+                for ingrediente, cant in receta.items():
+                    requerimientos[ingrediente] += cant * cantidades[menu_id]
+            for ingrediente, req in requerimientos.items():
+                if not await _descontar(db, ingrediente, req):
+                    await db.rollback()
+                    return None
+
+        nuevo = Pedido(cliente_id=cliente_id, fecha_hora=fecha_hora_pedido(fecha))
+        nuevos_items = []
+        detalle = []
+        for menu_id, cant in cantidades.items():
+            nombre, precio = menus[menu_id]
+            nuevos_items.append(PedidoItem(pedido=nuevo, menu_id=menu_id, cantidad=cant, precio_unitario=precio))
+            detalle.append((nombre, cant, precio, precio * cant))
+        nuevo.subtotal, nuevo.iva, nuevo.total = calcular_montos(sum(d[3] for d in detalle))
+        db.add(nuevo)
+
+        # Resumen de ventas en la misma transacción que los ítems
+        await db.flush()
+        for stmt in sentencias_venta(nuevo, nuevos_items, 1):
+            await db.execute(stmt)
+        # Con el bloqueo de escritura ya tomado: el cliente no puede
+        # desaparecer antes del commit
+        if await db.get(Cliente, cliente_id) is None:
+            await db.rollback()
+            return None
+        await db.commit()
+        return {
+            "pedido": nuevo,
+            "detalle": detalle,
+            "subtotal": nuevo.subtotal,
+            "iva": nuevo.iva,
+            "total": nuevo.total,
+        }
+    except Exception:
+        await db.rollback()
+        return None
+
+
+# -------------------------
+#     CREAR PEDIDO
+# -------------------------
+async def crear_pedido(db: AsyncSession, cliente_id: int, items: list, fecha: str = None):
+    """
+    items = [ menu_id, menu_id, menu_id ... ]
+    Cada aparición cuenta como 1 unidad.
+    fecha = "YYYY-MM-DD" o datetime (por defecto ahora)
+    No descuenta stock; para eso usar colocar_pedido.
+    """
+    resultado = await colocar_pedido(db, cliente_id, items, fecha, descontar_stock=False)
+    return resultado["pedido"] if resultado else None
+
+
+# -------------------------
+#     OBTENER PEDIDO POR ID
+# -------------------------
+async def obtener_pedido(db: AsyncSession, pedido_id: int):
+    return await db.get(Pedido, pedido_id)
+
+
+# -------------------------
+#     LISTAR TODOS LOS PEDIDOS
+# -------------------------
+async def listar_pedidos(db: AsyncSession):
+    res = await db.execute(select(Pedido).order_by(Pedido.id))
+    return list(res.scalars().all())
+
+
+async def listar_pedidos_pagina(db: AsyncSession, despues_de: int = None, tamano: int = TAMANO_PAGINA):
+    return await pagina_async(db, select(Pedido), Pedido.id, despues_de, tamano)
+
+
+def iterar_pedidos(db: AsyncSession, tamano_lote: int = TAMANO_PAGINA):
+    """async for ... in iterar_pedidos(db): lotes con yield_per sobre stream_scalars."""
+    return iterar_async(db, select(Pedido), Pedido.id, tamano_lote)
+
+
+# -------------------------
+#     DETALLE DE UN PEDIDO
+# -------------------------
+async def obtener_detalle_pedido(db: AsyncSession, pedido_id: int):
+    """
+    Retorna una lista como:
+    [
+        (nombre_menu, cantidad, precio_unitario, subtotal_linea)
+    ]
+    """
+    res = await db.execute(
+        select(Menu.nombre, PedidoItem.cantidad, PedidoItem.precio_unitario)
+        .join(Menu, Menu.id == PedidoItem.menu_id)
+        .where(PedidoItem.pedido_id == pedido_id)
+        .order_by(PedidoItem.id)
+    )
+    return [(nombre, cant, precio, precio * cant) for nombre, cant, precio in res.all()]
+
+
+# -------------------------
+#     TOTALES DE PEDIDOS
+# -------------------------
+async def totales_pedido(db: AsyncSession, pedido_id: int):
+    """(subtotal, iva, total) con una sola consulta, o (0, 0, 0) si no existe."""
+    res = await db.execute(_consulta_totales().where(Pedido.id == pedido_id))
+    fila = res.first()
+    return tuple(fila[1:]) if fila else (0, 0, 0)
+
+
+async def totales_pedidos(db: AsyncSession, pedido_ids):
+    """{pedido_id: (subtotal, iva, total)}, una consulta por lote de ids."""
+    ids = list(dict.fromkeys(pedido_ids))
+    totales = {}
+    for i in range(0, len(ids), TAMANO_LOTE_TOTALES):
+        res = await db.execute(_consulta_totales().where(Pedido.id.in_(ids[i:i + TAMANO_LOTE_TOTALES])))
+        for pedido_id, subtotal, iva, total in res.all():
+            totales[pedido_id] = (subtotal, iva, total)
+    return totales
+
+
+# -------------------------
+#     CALCULAR SUBTOTAL
+# -------------------------
+async def calcular_subtotal(db: AsyncSession, pedido_id: int):
+    return (await totales_pedido(db, pedido_id))[0]
+
+
+# -------------------------
+#          IVA (19%)
+# -------------------------
+async def calcular_iva(db: AsyncSession, pedido_id: int):
+    return (await totales_pedido(db, pedido_id))[1]
+
+
+# -------------------------
+#          TOTAL
+# -------------------------
+async def calcular_total(db: AsyncSession, pedido_id: int):
+    return (await totales_pedido(db, pedido_id))[2]
+
+
+# -------------------------
+#     ELIMINAR PEDIDO
+# -------------------------
+async def eliminar_pedido(db: AsyncSession, pedido_id: int):
+    pedido = await obtener_pedido(db, pedido_id)
+    if not pedido:
+        return False
+    try:
+        # Borrar primero los items
+        res = await db.execute(select(PedidoItem).where(PedidoItem.pedido_id == pedido_id))
+        items = list(res.scalars().all())
+        for stmt in sentencias_venta(pedido, items, -1):
+            await db.execute(stmt)
+        for item in items:
+            await db.delete(item)
+        await db.delete(pedido)
+        await db.commit()
+        return True
+    except Exception:
+        await db.rollback()
+        return False
@@ -1,18 +1,451 @@
 # database.py
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager, contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import StaticPool
 
 
 import os
-# Ruta absoluta a restaurante.db dentro de la carpeta ORM_clientes
+import random
+import shutil
+import threading
+import time
+# restaurante.db (versionada en git) es solo la base inicial: la aplicación
+# trabaja sobre una copia en datos/, que git ignora. Así el modo WAL, las
+# migraciones y los archivos -wal/-shm nunca tocan el archivo versionado.
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATABASE_URL = f"sqlite:///{os.path.join(BASE_DIR, 'restaurante.db')}"
+RUTA_BASE_INICIAL = os.path.join(BASE_DIR, "restaurante.db")
+RUTA_BASE_LOCAL = os.path.join(BASE_DIR, "datos", "restaurante.db")
+DATABASE_URL_POR_DEFECTO = f"sqlite:///{RUTA_BASE_LOCAL}"
+
+# Se puede apuntar a otra base con la variable de entorno DATABASE_URL, por
+# ejemplo una base compartida entre terminales o una copia en tmpfs:
+#   DATABASE_URL=sqlite:////dev/shm/restaurante.db
+#   DATABASE_URL=sqlite://            (en memoria, para pruebas)
+DATABASE_URL = os.environ.get("DATABASE_URL", DATABASE_URL_POR_DEFECTO)
+
+
+# -------------------------
+#   PERFILES DE RENDIMIENTO SQLITE
+# -------------------------
+# Cada perfil es la lista de PRAGMAs que se aplican a cada conexión nueva.
+# "default" deja SQLite tal como viene (journal de rollback + fsync completo).
+# "rapido" usa WAL y synchronous=NORMAL: cada commit ya no espera un fsync
+# del journal, solo los checkpoints del WAL.
+PERFILES_SQLITE = {
+    "default": {},
+    "rapido": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,   # 256 MB
+        "cache_size": -65536,     # negativo = KiB -> 64 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,     # ms
+    },
+    "seguro": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+    },
+}
+
+# Se elige con la variable de entorno DB_PERFIL (por defecto "rapido")
+PERFIL_POR_DEFECTO = "rapido"
+
+
+def perfil_actual():
+    nombre = os.environ.get("DB_PERFIL", PERFIL_POR_DEFECTO).strip().lower()
+    if nombre not in PERFILES_SQLITE:
+        raise ValueError(
+            f"Perfil de base de datos desconocido: '{nombre}'. "
+            f"Opciones: {', '.join(PERFILES_SQLITE)}"
+        )
+    return nombre
+
+
+def aplicar_perfil(engine, perfil=None):
+    """
+    Registra un listener 'connect' que ejecuta los PRAGMAs del perfil
+    en cada conexión que abra el engine.
+    """
+    return _registrar_pragmas(engine, PERFILES_SQLITE[perfil or perfil_actual()])
+
+
+def _registrar_pragmas(engine, pragmas):
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return engine
+
+    @event.listens_for(engine, "connect")
+    def _pragmas_sqlite(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        try:
+            for nombre, valor in pragmas.items():
+                cursor.execute(f"PRAGMA {nombre}={valor}")
+        finally:
+            cursor.close()
+
+    return engine
+
+
+# -------------------------
+#   CONFIGURACIÓN DEL POOL
+# -------------------------
+def _bool_env(nombre, defecto):
+    valor = os.environ.get(nombre)
+    if valor is None:
+        return defecto
+    return valor.strip().lower() in ("1", "true", "si", "sí", "yes", "on")
+
+
+def configuracion_db():
+    """
+    Lee la configuración de conexión desde variables de entorno:
+    DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_PRE_PING y
+    DB_POOL_RECYCLE (segundos, -1 = nunca). Sin DB_POOL_PRE_PING el valor
+    queda en None y crear_engine lo decide según la URL.
+    """
+    return {
+        "url": os.environ.get("DATABASE_URL", DATABASE_URL_POR_DEFECTO),
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+        "pool_pre_ping": _bool_env("DB_POOL_PRE_PING", None),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+    }
+
+
+def _es_sqlite_en_memoria(url):
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _copiar_base_inicial():
+    """Crea datos/restaurante.db desde restaurante.db la primera vez."""
+    if os.path.exists(RUTA_BASE_LOCAL) or not os.path.exists(RUTA_BASE_INICIAL):
+        return
+    os.makedirs(os.path.dirname(RUTA_BASE_LOCAL), exist_ok=True)
+    # Copia a un temporal y rename: otra terminal que arranque al mismo
+    # tiempo nunca ve una base a medio copiar
+    temporal = f"{RUTA_BASE_LOCAL}.{os.getpid()}.tmp"
+    shutil.copyfile(RUTA_BASE_INICIAL, temporal)
+    os.replace(temporal, RUTA_BASE_LOCAL)
+
+
+# -------------------------
+#   FÁBRICA DE ENGINES
+# -------------------------
+def crear_engine(url=None, perfil=None, **opciones):
+    """
+    Crea un engine con la configuración de configuracion_db().
+    Cualquier clave (url, pool_size, max_overflow, pool_pre_ping,
+    pool_recycle) puede sobrescribirse por parámetro.
+    """
+    config = configuracion_db()
+    config.update({k: v for k, v in opciones.items() if v is not None})
+    if url is not None:
+        config["url"] = url
+    if config["url"] == DATABASE_URL_POR_DEFECTO:
+        _copiar_base_inicial()
+    url = make_url(config.pop("url"))
+
+    # Un archivo SQLite no tiene conexión de red que se pueda cortar: el
+    # SELECT 1 previo a cada checkout solo suma una consulta por sesión
+    pre_ping = config["pool_pre_ping"]
+    if pre_ping is None:
+        pre_ping = url.get_backend_name() != "sqlite"
+    kwargs = {"pool_pre_ping": pre_ping}
+    if url.get_backend_name() == "sqlite":
+        kwargs["connect_args"] = {"check_same_thread": False}
+
+    if _es_sqlite_en_memoria(url):
+        # Una sola conexión compartida; si no, cada conexión vería su propia base vacía
+        kwargs["poolclass"] = StaticPool
+    else:
+        kwargs["pool_size"] = config["pool_size"]
+        kwargs["max_overflow"] = config["max_overflow"]
+        kwargs["pool_recycle"] = config["pool_recycle"]
+
+    return aplicar_perfil(create_engine(url, **kwargs), perfil)
+
+
+engine = crear_engine()
+
+# expire_on_commit=False: los objetos siguen legibles después del commit y
+# del cierre de la sesión, sin volver a consultar cada atributo
+SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
+
+
+def configurar_engine(nuevo_engine=None, **opciones):
+    """
+    Reemplaza el engine global (por ejemplo para pruebas) y vuelve a
+    enlazar SessionLocal. Si no se entrega un engine se crea uno con
+    crear_engine(**opciones).
+    """
+    global engine, _engine_lectura, _engine_async
+    engine = nuevo_engine if nuevo_engine is not None else crear_engine(**opciones)
+    SessionLocal.configure(bind=engine)
+    _engine_lectura = None
+    _engine_async = None
+    return engine
+
+
+# -------------------------
+#   CONEXIÓN DE SOLO LECTURA (REPORTES)
+# -------------------------
+def _url_solo_lectura(url):
+    """
+    Para un archivo SQLite retorna la URI 'file:...?mode=ro'. Con WAL los
+    lectores no bloquean a quien escribe pedidos. Para otras bases (o
+    SQLite en memoria) retorna None y se reutiliza el engine principal.
+    """
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite" or _es_sqlite_en_memoria(url):
+        return None
+    ruta = os.path.abspath(url.database)
+    return f"sqlite:///file:{ruta}?mode=ro&uri=true"
+
+
+def crear_engine_lectura(url=None):
+    url = url if url is not None else engine.url
+    url_ro = _url_solo_lectura(url)
+    if url_ro is None:
+        return engine
+    # Mismo perfil, salvo journal_mode: una conexión de solo lectura no puede
+    # cambiarlo (lo fija la conexión de escritura)
+    pragmas = {k: v for k, v in PERFILES_SQLITE[perfil_actual()].items() if k != "journal_mode"}
+    pragmas["query_only"] = "ON"
+    return _registrar_pragmas(crear_engine(url_ro, perfil="default"), pragmas)
+
+
+_engine_lectura = None
+SessionLectura = sessionmaker(autoflush=False, autocommit=False, expire_on_commit=False)
+
+
+def obtener_engine_lectura():
+    """Crea el engine de solo lectura la primera vez y lo reutiliza."""
+    global _engine_lectura
+    if _engine_lectura is None:
+        _engine_lectura = crear_engine_lectura()
+        SessionLectura.configure(bind=_engine_lectura)
+    return _engine_lectura
+
+
+@contextmanager
+def sesion_lectura():
+    """
+    Sesión para reportes y gráficos. Nunca hace commit: la transacción de
+    lectura se cierra con rollback apenas termina la consulta.
+    """
+    obtener_engine_lectura()
+    db = SessionLectura()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+
+
+# -------------------------
+#   ENGINE ASÍNCRONO (aiosqlite)
+# -------------------------
+# Se crea solo si se usa crud_async; la aplicación de escritorio no
+# necesita aiosqlite instalado.
+_engine_async = None
+_AsyncSessionLocal = None
+
+
+def crear_engine_async(url=None, perfil=None):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = make_url(url if url is not None else engine.url)
+    kwargs = {}
+    if url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+        if _es_sqlite_en_memoria(url):
+            kwargs["poolclass"] = StaticPool
+    engine_async = create_async_engine(url, **kwargs)
+    # Los PRAGMAs se registran sobre el engine síncrono interno
+    aplicar_perfil(engine_async.sync_engine, perfil)
+    return engine_async
+
+
+def obtener_engine_async():
+    global _engine_async, _AsyncSessionLocal
+    if _engine_async is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _engine_async = crear_engine_async()
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=_engine_async, autoflush=False, expire_on_commit=False
+        )
+    return _engine_async
+
+
+def configurar_engine_async(nuevo_engine):
+    """Reemplaza el engine asíncrono (por ejemplo para pruebas o benchmarks)."""
+    global _engine_async, _AsyncSessionLocal
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    _engine_async = nuevo_engine
+    _AsyncSessionLocal = async_sessionmaker(
+        bind=_engine_async, autoflush=False, expire_on_commit=False
+    )
+    return _engine_async
+
+
+@asynccontextmanager
+async def unidad_de_trabajo_async():
+    """Equivalente asíncrono de unidad_de_trabajo() con AsyncSession."""
+    obtener_engine_async()
+    db = _AsyncSessionLocal()
+    try:
+        yield db
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
+
+
+# -------------------------
+#   UNIDAD DE TRABAJO
+# -------------------------
+@contextmanager
+def unidad_de_trabajo(fabrica=None):
+    """
+    Sesión de vida corta para una acción:
+        with unidad_de_trabajo() as db:
+            crear_cliente(db, ...)
+    Hace commit al salir sin errores, rollback si hay una excepción y
+    siempre cierra la sesión, así el identity map no crece durante el día.
+    """
+    db = (fabrica or SessionLocal)()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# -------------------------
+#   REINTENTOS POR CONFLICTO DE VERSIÓN
+# -------------------------
+# Ingrediente y Menu usan version_id_col: si dos terminales editan la misma
+# fila, la segunda en escribir recibe StaleDataError. En vez de bloquear la
+# fila se deshace la transacción y:
+# - las operaciones relativas (sumar stock) se repiten con datos frescos;
+# - las que fijan valores (precio, cantidad) no se repiten, porque pisarían
+#   el cambio de la otra terminal: se informa con ConflictoVersion.
+REINTENTOS_CONFLICTO = int(os.environ.get("DB_REINTENTOS_CONFLICTO", 5))
+
+_estadisticas_conflictos = {"operaciones": 0, "conflictos": 0, "agotados": 0}
+_lock_estadisticas = threading.Lock()
+
+
+def _contar(**incrementos):
+    with _lock_estadisticas:
+        for clave, valor in incrementos.items():
+            _estadisticas_conflictos[clave] += valor
+
+
+def estadisticas_conflictos():
+    """Copia de los contadores: operaciones, conflictos y reintentos agotados."""
+    with _lock_estadisticas:
+        return dict(_estadisticas_conflictos)
+
+
+def reiniciar_estadisticas_conflictos():
+    with _lock_estadisticas:
+        for clave in _estadisticas_conflictos:
+            _estadisticas_conflictos[clave] = 0
+
+
+def _espera_reintento(intento):
+    # Espera aleatoria creciente para que los que chocaron no vuelvan a chocar
+    return random.uniform(0, 0.002 * (2 ** intento))
+
+
+def reintentar_en_conflicto(db, operacion, intentos=None):
+    """
+    Ejecuta operacion() (que debe leer, modificar y hacer commit) y la
+    repite si falla por StaleDataError. El rollback expira los objetos de
+    la sesión, así el siguiente intento vuelve a leer la versión actual.
+    """
+    from sqlalchemy.orm.exc import StaleDataError
+
+    intentos = intentos or REINTENTOS_CONFLICTO
+    _contar(operaciones=1)
+    for intento in range(intentos):
+        try:
+            return operacion()
+        except StaleDataError:
+            db.rollback()
+            _contar(conflictos=1)
+            if intento == intentos - 1:
+                _contar(agotados=1)
+                raise
+            time.sleep(_espera_reintento(intento))
+
+
+async def reintentar_en_conflicto_async(db, operacion, intentos=None):
+    """Equivalente de reintentar_en_conflicto() para AsyncSession."""
+    import asyncio
+    from sqlalchemy.orm.exc import StaleDataError
+
+    intentos = intentos or REINTENTOS_CONFLICTO
+    _contar(operaciones=1)
+    for intento in range(intentos):
+        try:
+            return await operacion()
+        except StaleDataError:
+            await db.rollback()
+            _contar(conflictos=1)
+            if intento == intentos - 1:
+                _contar(agotados=1)
+                raise
+            await asyncio.sleep(_espera_reintento(intento))
+
+
+class ConflictoVersion(Exception):
+    """Otra terminal modificó la fila después de que se leyó."""
+
+
+def detectar_conflicto(db, operacion):
+    """
+    Ejecuta operacion() una sola vez. Si falla por StaleDataError (o la
+    propia operación lanza ConflictoVersion) hace rollback y lanza
+    ConflictoVersion: nada se escribe.
+    """
+    from sqlalchemy.orm.exc import StaleDataError
+
+    _contar(operaciones=1)
+    try:
+        return operacion()
+    except (StaleDataError, ConflictoVersion) as error:
+        db.rollback()
+        _contar(conflictos=1)
+        if isinstance(error, ConflictoVersion):
+            raise
+        raise ConflictoVersion(str(error)) from error
+
+
+async def detectar_conflicto_async(db, operacion):
+    """Equivalente de detectar_conflicto() para AsyncSession."""
+    from sqlalchemy.orm.exc import StaleDataError
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+    _contar(operaciones=1)
+    try:
+        return await operacion()
+    except (StaleDataError, ConflictoVersion) as error:
+        await db.rollback()
+        _contar(conflictos=1)
+        if isinstance(error, ConflictoVersion):
+            raise
+        raise ConflictoVersion(str(error)) from error
 
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 Base = declarative_base()
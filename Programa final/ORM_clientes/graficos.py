@@ -1,23 +1,92 @@
 # graficos.py
-import matplotlib.pyplot as plt
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from models import Ingrediente, Pedido, PedidoItem, Menu
+from models import Ingrediente, PedidoItem, Menu
+from database import sesion_lectura
+from crud import ventas_crud
 from datetime import datetime
 
 
+# ==========================================================
+#  LECTURA DE DATOS (CONEXIÓN DE SOLO LECTURA)
+# ==========================================================
+
+def _leer(consulta, db: Session = None, **filtros):
+    """
+    Ejecuta consulta(db, **filtros) y retorna datos planos. Si no se entrega
+    una sesión se usa una de solo lectura, que se cierra antes de dibujar,
+    así el gráfico abierto nunca retiene una transacción.
+    """
+    if db is not None:
+        return consulta(db, **filtros)
+    with sesion_lectura() as db_ro:
+        return consulta(db_ro, **filtros)
+
+
+def _datos_stock(db: Session):
+    ingredientes = db.query(Ingrediente).order_by(Ingrediente.cantidad.asc()).limit(10).all()
+    return [(i.nombre, i.cantidad) for i in ingredientes]
+
+
+def _datos_menus_mas_vendidos(db: Session):
+    # Resumen por menú (ventas_diarias_menu): una fila por día y menú
+    unidades = ventas_crud.unidades_por_menu(db)
+    nombres = dict(db.query(Menu.id, Menu.nombre).all())
+    return {nombres[menu_id]: cant for menu_id, cant in unidades if menu_id in nombres}
+
+
+# Los ingresos (netos, sin IVA) se leen del resumen ventas_diarias:
+# una fila por día en vez de recorrer todo el historial de pedidos.
+def _datos_ingresos_por_dia(db: Session, desde=None, hasta=None):
+    filas = ventas_crud.ventas_por_dia(db, desde, hasta)
+    return {datetime.strptime(dia, "%Y-%m-%d").strftime("%d/%m/%Y"): total for dia, total in filas}
+
+
+def _datos_ingresos_por_mes(db: Session, desde=None, hasta=None):
+    return dict(ventas_crud.ventas_por_mes(db, desde, hasta))
+
+
+def _datos_ingresos_totales(db: Session, desde=None, hasta=None):
+    return ventas_crud.ventas_totales(db, desde, hasta)
+
+
+def _datos_uso_ingredientes(db: Session):
+    from crud.menu_crud import requerimientos_menus
+    # Unidades vendidas por menú y todas las recetas: dos consultas en total
+    vendidos = db.execute(
+        select(PedidoItem.menu_id, func.sum(PedidoItem.cantidad))
+        .group_by(PedidoItem.menu_id)
+    ).all()
+    recetas = requerimientos_menus(db, [menu_id for menu_id, _ in vendidos])
+    # Acumular ingredientes usados por nombre
+    uso = {}
+    for menu_id, cantidad in vendidos:
+        for ing, cant in recetas[menu_id].items():
+            uso[ing] = uso.get(ing, 0) + cant * cantidad
+    return uso
+
+
 # ==========================================================
 #  GRÁFICOS PRINCIPALES DEL SISTEMA
 # ==========================================================
 
-def graficar_stock(db: Session):
+def _pyplot():
+    # matplotlib tarda en importarse: se carga recién al dibujar el primer
+    # gráfico, no al abrir la aplicación
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def graficar_stock(db: Session = None):
     """Muestra un gráfico con los 10 ingredientes con menor stock."""
-    ingredientes = db.query(Ingrediente).order_by(Ingrediente.cantidad.asc()).limit(10).all()
+    ingredientes = _leer(_datos_stock, db)
     if not ingredientes:
         print("No hay datos disponibles para graficar stock.")
         return
     try:
-        nombres = [i.nombre for i in ingredientes]
-        cantidades = [i.cantidad for i in ingredientes]
+        nombres = [n for n, _ in ingredientes]
+        cantidades = [c for _, c in ingredientes]
+        plt = _pyplot()
         plt.figure(figsize=(10, 5))
         plt.barh(nombres, cantidades)
         plt.title("Ingredientes con Menor Stock")
@@ -28,23 +97,16 @@ def graficar_stock(db: Session):
         print(f"Error al graficar stock: {e}")
 
 
-def graficar_menus_mas_vendidos(db: Session):
+def graficar_menus_mas_vendidos(db: Session = None):
     """Muestra un gráfico de barras con los menús más vendidos."""
     try:
-        datos = (
-            db.query(Menu.nombre, PedidoItem.cantidad)
-            .join(PedidoItem, Menu.id == PedidoItem.menu_id)
-            .all()
-        )
-        if not datos:
+        acumulado = _leer(_datos_menus_mas_vendidos, db)
+        if not acumulado:
             print("No hay datos disponibles para graficar menús más vendidos.")
             return
-        # Agrupación manual
-        acumulado = {}
-        for nombre, cantidad in datos:
-            acumulado[nombre] = acumulado.get(nombre, 0) + cantidad
         nombres = list(acumulado.keys())
         cantidades = list(acumulado.values())
+        plt = _pyplot()
         plt.figure(figsize=(10, 5))
         plt.bar(nombres, cantidades)
         plt.title("Menús Más Vendidos")
@@ -56,32 +118,16 @@ def graficar_menus_mas_vendidos(db: Session):
         print(f"Error al graficar menús más vendidos: {e}")
 
 
-def graficar_ingresos_por_dia(db: Session):
+def graficar_ingresos_por_dia(db: Session = None, desde: datetime = None, hasta: datetime = None):
     """Gráfico de ingresos totales por día."""
-    from datetime import datetime
     try:
-        pedidos = db.query(Pedido).all()
-        if not pedidos:
-            print("No hay datos disponibles para graficar ingresos por día.")
-            return
-        ingresos_por_dia = {}
-        for p in pedidos:
-            try:
-                fecha_dt = datetime.strptime(p.fecha, "%Y-%m-%d")
-                fecha = fecha_dt.strftime("%d/%m/%Y")
-                # Calcular total del pedido sumando los precios de los menús
-                total = 0
-                for item in p.items:
-                    if item.menu and hasattr(item.menu, 'precio'):
-                        total += item.menu.precio * item.cantidad
-            except Exception:
-                continue
-            ingresos_por_dia[fecha] = ingresos_por_dia.get(fecha, 0) + total
+        ingresos_por_dia = _leer(_datos_ingresos_por_dia, db, desde=desde, hasta=hasta)
         if not ingresos_por_dia:
             print("No hay datos válidos para graficar ingresos por día.")
             return
         fechas = list(ingresos_por_dia.keys())
         ingresos = list(ingresos_por_dia.values())
+        plt = _pyplot()
         plt.figure(figsize=(10, 5))
         plt.plot(fechas, ingresos, marker="o")
         plt.title("Ingresos por Día")
@@ -93,15 +139,11 @@ def graficar_ingresos_por_dia(db: Session):
         print(f"Error al graficar ingresos por día: {e}")
 
 
-def graficar_ingresos_totales(db: Session):
+def graficar_ingresos_totales(db: Session = None, desde: datetime = None, hasta: datetime = None):
     """Gauge simple de ingresos totales acumulados."""
     try:
-        pedidos = db.query(Pedido).all()
-        total = 0
-        for p in pedidos:
-            for item in p.items:
-                if item.menu and hasattr(item.menu, 'precio'):
-                    total += item.menu.precio * item.cantidad
+        total = _leer(_datos_ingresos_totales, db, desde=desde, hasta=hasta)
+        plt = _pyplot()
         plt.figure(figsize=(6, 4))
         plt.bar(["Ingresos Totales"], [total], color="green")
         plt.title("Ingresos Totales")
@@ -112,31 +154,16 @@ def graficar_ingresos_totales(db: Session):
         print(f"Error al graficar ingresos totales: {e}")
 
 
-def graficar_ingresos_por_mes(db: Session):
-    """Gráfico de ingresos totales por mes."""
-    from datetime import datetime
+def graficar_ingresos_por_mes(db: Session = None, desde: datetime = None, hasta: datetime = None):
+    """Gráfico de ingresos totales por mes. desde/hasta acotan el rango (por ejemplo un solo mes)."""
     try:
-        pedidos = db.query(Pedido).all()
-        if not pedidos:
-            print("No hay datos disponibles para graficar ingresos por mes.")
-            return
-        ingresos_por_mes = {}
-        for p in pedidos:
-            try:
-                fecha_dt = datetime.strptime(p.fecha, "%Y-%m-%d")
-                fecha = fecha_dt.strftime("%Y-%m")
-                total = 0
-                for item in p.items:
-                    if item.menu and hasattr(item.menu, 'precio'):
-                        total += item.menu.precio * item.cantidad
-            except Exception:
-                continue
-            ingresos_por_mes[fecha] = ingresos_por_mes.get(fecha, 0) + total
+        ingresos_por_mes = _leer(_datos_ingresos_por_mes, db, desde=desde, hasta=hasta)
         if not ingresos_por_mes:
             print("No hay datos válidos para graficar ingresos por mes.")
             return
         meses = list(ingresos_por_mes.keys())
         ingresos = list(ingresos_por_mes.values())
+        plt = _pyplot()
         plt.figure(figsize=(10, 5))
         plt.plot(meses, ingresos, marker="o")
         plt.title("Ingresos por Mes")
@@ -148,28 +175,16 @@ def graficar_ingresos_por_mes(db: Session):
         print(f"Error al graficar ingresos por mes: {e}")
 
 
-def graficar_uso_ingredientes(db: Session):
+def graficar_uso_ingredientes(db: Session = None):
     """Gráfico de uso de ingredientes en todos los pedidos realizados."""
     try:
-        items = db.query(PedidoItem).all()
-        if not items:
-            print("No hay datos disponibles para graficar uso de ingredientes.")
-            return
-        # Acumular ingredientes usados por nombre
-        uso = {}
-        from crud.menu_crud import requerimientos_menu, obtener_menu_por_nombre
-        for item in items:
-            menu = db.query(Menu).get(item.menu_id)
-            if not menu:
-                continue
-            reqs = requerimientos_menu(db, menu.id)
-            for ing, cant in reqs.items():
-                uso[ing] = uso.get(ing, 0) + cant * item.cantidad
+        uso = _leer(_datos_uso_ingredientes, db)
         if not uso:
             print("No hay datos válidos para graficar uso de ingredientes.")
             return
         nombres = list(uso.keys())
         cantidades = list(uso.values())
+        plt = _pyplot()
         plt.figure(figsize=(10, 5))
         plt.bar(nombres, cantidades)
         plt.title("Uso de Ingredientes en Pedidos")
@@ -185,11 +200,12 @@ def graficar_uso_ingredientes(db: Session):
 #  FUNCIÓN CENTRAL PARA MOSTRAR TODOS LOS GRÁFICOS
 # ==========================================================
 
-def mostrar_graficos(db: Session):
+def mostrar_graficos(db: Session = None):
     """
     Muestra todos los gráficos del sistema en ventanas separadas.
     IMPORTANTE:
-    - Llamar como mostrar_graficos(db)
+    - Llamar como mostrar_graficos() para usar la conexión de solo lectura,
+      o mostrar_graficos(db) para reutilizar una sesión existente
     """
     graficar_stock(db)
     graficar_menus_mas_vendidos(db)
@@ -1,54 +1,90 @@
-
 # Utilidad para poblar la base de datos con menús iniciales (solo para inicialización)
+import hashlib
+import json
+
+MENUS_ESTATICOS = {
+    "Hamburguesa": {"precio": 3500, "req": {"pan de hamburguesa": 1, "carne": 1, "lamina de queso": 1}},
+    "Completo": {"precio": 2500, "req": {"pan de completo": 1, "vienesa": 1, "tomate": 0.5}},
+    "Papas Fritas": {"precio": 2000, "req": {"papas": 1.5}},
+    "Pollo Frito": {"precio": 4500, "req": {"presa de pollo": 2}},
+    "Panqueques": {"precio": 3000, "req": {"panqueques": 1, "huevos": 1, "porcion de harina": 0.1}},
+    "Ensalada Mixta": {"precio": 2200, "req": {"lechuga": 1.2, "zanahoria rallada": 2.15, "tomate": 3.15}},
+    "Coca Cola": {"precio": 1500, "req": {"coca cola": 1}},
+    "Pepsi": {"precio": 1500, "req": {"pepsi": 1}},
+}
+DESCRIPCION_ESTATICA = "Menú especial de la casa."
+INGREDIENTE_INICIAL = {"unidad": "unid", "cantidad": 100}
+
+# Clave en la tabla metadato donde se guarda la huella de los datos cargados
+CLAVE_HUELLA_SEMILLA = "semilla_menus"
+
+
+def huella_semilla():
+    """Hash de los datos iniciales: si no cambian, no hace falta volver a cargarlos."""
+    datos = [MENUS_ESTATICOS, DESCRIPCION_ESTATICA, INGREDIENTE_INICIAL]
+    return hashlib.sha256(json.dumps(datos, sort_keys=True).encode("utf-8")).hexdigest()
+
+
 def poblar_db_con_menus_estaticos(db):
     """
     Pobla la base de datos con los menús, precios e ingredientes definidos aquí.
     Solo agrega si no existen. No usar para lógica de negocio.
+    Se ejecuta en una sola transacción con upserts masivos y se omite por
+    completo si la huella guardada coincide. Retorna True si cargó datos.
     """
+    from sqlalchemy import select
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
     from models import Menu as MenuDB, Ingrediente, MenuIngrediente
-    menus = {
-        "Hamburguesa": {"precio": 3500, "req": {"pan de hamburguesa": 1, "carne": 1, "lamina de queso": 1}},
-        "Completo": {"precio": 2500, "req": {"pan de completo": 1, "vienesa": 1, "tomate": 0.5}},
-        "Papas Fritas": {"precio": 2000, "req": {"papas": 1.5}},
-        "Pollo Frito": {"precio": 4500, "req": {"presa de pollo": 2}},
-        "Panqueques": {"precio": 3000, "req": {"panqueques": 1, "huevos": 1, "porcion de harina": 0.1}},
-        "Ensalada Mixta": {"precio": 2200, "req": {"lechuga": 1.2, "zanahoria rallada": 2.15, "tomate": 3.15}},
-        "Coca Cola": {"precio": 1500, "req": {"coca cola": 1}},
-        "Pepsi": {"precio": 1500, "req": {"pepsi": 1}},
-    }
-    # Poblar ingredientes únicos
-    ingredientes_set = set()
-    for reqs in menus.values():
-        ingredientes_set.update(reqs["req"].keys())
-    ingredientes_objs = {}
-    for ing in ingredientes_set:
-        obj = db.query(Ingrediente).filter_by(nombre=ing).first()
-        if not obj:
-            obj = Ingrediente(nombre=ing, unidad="unid", cantidad=100)
-            db.add(obj)
-            db.commit()
-            db.refresh(obj)
-        ingredientes_objs[ing] = obj
-    # Poblar menús y asociar ingredientes
-    for nombre, datos in menus.items():
-        menu = db.query(MenuDB).filter_by(nombre=nombre).first()
-        descripcion = "Menú especial de la casa."
-        if not menu:
-            menu = MenuDB(nombre=nombre, precio=datos["precio"], descripcion=descripcion)
-            db.add(menu)
-            db.commit()
-            db.refresh(menu)
-        else:
-            # Actualizar precio y descripción si han cambiado
-            if menu.precio != datos["precio"] or menu.descripcion != descripcion:
-                menu.precio = datos["precio"]
-                menu.descripcion = descripcion
-                db.commit()
-        # Asociar ingredientes
-        for ing, cant in datos["req"].items():
-            ing_obj = ingredientes_objs[ing]
-            rel = db.query(MenuIngrediente).filter_by(menu_id=menu.id, ingrediente_id=ing_obj.id).first()
-            if not rel:
-                rel = MenuIngrediente(menu_id=menu.id, ingrediente_id=ing_obj.id, cantidad=cant)
-                db.add(rel)
-        db.commit()
\ No newline at end of file
+    from crud.metadato_crud import obtener_metadato, guardar_metadato
+
+    huella = huella_semilla()
+    if obtener_metadato(db, CLAVE_HUELLA_SEMILLA) == huella:
+        return False
+
+    # Ingredientes únicos: se insertan solo los que faltan
+    ingredientes = sorted({ing for datos in MENUS_ESTATICOS.values() for ing in datos["req"]})
+    db.execute(
+        sqlite_insert(Ingrediente).on_conflict_do_nothing(index_elements=["nombre"]),
+        [dict(nombre=ing, **INGREDIENTE_INICIAL) for ing in ingredientes],
+    )
+
+    # Menús: se insertan o se actualizan precio y descripción si cambiaron
+    stmt = sqlite_insert(MenuDB)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["nombre"],
+            set_={
+                "precio": stmt.excluded.precio,
+                "descripcion": stmt.excluded.descripcion,
+                "version": MenuDB.version + 1,
+            },
+            where=(MenuDB.precio != stmt.excluded.precio)
+            | MenuDB.descripcion.is_distinct_from(stmt.excluded.descripcion),
+        ),
+        [
+            {"nombre": nombre, "precio": datos["precio"], "descripcion": DESCRIPCION_ESTATICA}
+            for nombre, datos in MENUS_ESTATICOS.items()
+        ],
+    )
+
+    # Asociar ingredientes (las relaciones existentes no se tocan)
+    menu_ids = dict(db.execute(
+        select(MenuDB.nombre, MenuDB.id).where(MenuDB.nombre.in_(MENUS_ESTATICOS))
+    ).all())
+    ingrediente_ids = dict(db.execute(
+        select(Ingrediente.nombre, Ingrediente.id).where(Ingrediente.nombre.in_(ingredientes))
+    ).all())
+    db.execute(
+        sqlite_insert(MenuIngrediente).on_conflict_do_nothing(
+            index_elements=["menu_id", "ingrediente_id"]
+        ),
+        [
+            {"menu_id": menu_ids[nombre], "ingrediente_id": ingrediente_ids[ing], "cantidad": cant}
+            for nombre, datos in MENUS_ESTATICOS.items()
+            for ing, cant in datos["req"].items()
+        ],
+    )
+
+    guardar_metadato(db, CLAVE_HUELLA_SEMILLA, huella)
+    db.commit()
+    return True
@@ -4,10 +4,10 @@ from logic.Stock import Stock
 IVA = 0.19
 
 class Pedido:
-    def __init__(self, stock: Stock, db=None):
+    def __init__(self, stock: Stock, sesiones=None):
         self.stock = stock
         self.items = {}  # menu -> cantidad
-        self.db = db
+        self.sesiones = sesiones  # proveedor de sesiones cortas (unidad_de_trabajo)
 
     def agregar_item(self, menu, cant):
         self.items[menu] = self.items.get(menu, 0) + cant
@@ -22,13 +22,7 @@ class Pedido:
         self.items.clear()
 
     def subtotal(self):
-        from crud.menu_crud import obtener_menu_por_nombre
-        total = 0
-        for m, c in self.items.items():
-            menu_obj = obtener_menu_por_nombre(self.db, m) if self.db else None
-            precio = menu_obj.precio if menu_obj else 0
-            total += precio * c
-        return total
+        return sum(linea[3] for linea in self.detalle())
 
     def iva(self):
         return round(self.subtotal() * IVA)
@@ -37,11 +31,15 @@ class Pedido:
         return self.subtotal() + self.iva()
 
     def _req_totales(self):
-        from crud.menu_crud import obtener_menu_por_nombre, requerimientos_menu
+        from crud.menu_crud import ids_de_menus, requerimientos_menus
         req = {}
+        if not self.sesiones or not self.items:
+            return req
+        with self.sesiones() as db:
+            ids = ids_de_menus(db, self.items)
+            recetas = requerimientos_menus(db, ids.values())
         for m, c in self.items.items():
-            menu_obj = obtener_menu_por_nombre(self.db, m) if self.db else None
-            reqs = requerimientos_menu(self.db, menu_obj.id) if menu_obj else {}
+            reqs = recetas[ids[m]] if m in ids else {}
             for ing, cant in reqs.items():
                 req[ing] = req.get(ing, 0) + cant * c
         return req
@@ -56,10 +54,13 @@ class Pedido:
         return self.stock.descontar(self._req_totales())
 
     def detalle(self):
-        from crud.menu_crud import obtener_menu_por_nombre
+        from crud.menu_crud import precios_de_menus
+        if not self.sesiones:
+            return [(m, c, 0, 0) for m, c in self.items.items()]
+        with self.sesiones() as db:
+            precios = precios_de_menus(db, self.items)
         detalles = []
         for m, c in self.items.items():
-            menu_obj = obtener_menu_por_nombre(self.db, m) if self.db else None
-            precio = menu_obj.precio if menu_obj else 0
+            precio = precios.get(m, 0)
             detalles.append((m, c, precio, precio * c))
         return detalles
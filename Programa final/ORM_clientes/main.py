@@ -1,5 +1,5 @@
 # main.py
-from database import SessionLocal
+from database import unidad_de_trabajo
 from models import crear_base
 
 from Restaurante import RestauranteApp
@@ -9,14 +9,12 @@ def main():
     # Crear BD si no existe
     crear_base()
 
-    # Crear sesión
-    db = SessionLocal()
-
     # Poblar la base de datos con menús e ingredientes estátiscos si es necesario
-    poblar_db_con_menus_estaticos(db)
+    with unidad_de_trabajo() as db:
+        poblar_db_con_menus_estaticos(db)
 
-    # Crear y ejecutar la aplicación principal
-    app = RestauranteApp(db=db)
+    # Crear y ejecutar la aplicación principal; cada acción abre su propia sesión
+    app = RestauranteApp(sesiones=unidad_de_trabajo)
     app.mainloop()
 
 if __name__ == "__main__":
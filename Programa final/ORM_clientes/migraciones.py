@@ -0,0 +1,193 @@
+# migraciones.py
+"""
+Migraciones para bases restaurante.db ya existentes.
+
+Base.metadata.create_all() solo crea tablas que faltan; no agrega índices
+ni columnas a tablas que ya existen. Cada migración de esta lista es
+idempotente y se ejecuta en cada arranque desde models.crear_base().
+Primero revisa si hay algo pendiente: en una base al día el arranque solo
+lee y no toma el bloqueo de escritura.
+"""
+from sqlalchemy import text
+
+
+# -------------------------
+#   ÍNDICES DE TABLAS DE HECHOS / UNIÓN
+# -------------------------
+def _indices_tablas_union(conn):
+    existentes = _indices(conn)
+    if "ux_menu_ingrediente_menu_ingrediente" not in existentes:
+        # Eliminar relaciones menú-ingrediente duplicadas (queda la más
+        # reciente) antes de crear el índice único
+        conn.execute(text("""
+            DELETE FROM menu_ingrediente
+            WHERE id NOT IN (
+                SELECT MAX(id) FROM menu_ingrediente GROUP BY menu_id, ingrediente_id
+            )
+        """))
+    for nombre, sentencia in (
+        ("ux_menu_ingrediente_menu_ingrediente",
+         "CREATE UNIQUE INDEX ux_menu_ingrediente_menu_ingrediente ON menu_ingrediente (menu_id, ingrediente_id)"),
+        ("ix_menu_ingrediente_ingrediente_id",
+         "CREATE INDEX ix_menu_ingrediente_ingrediente_id ON menu_ingrediente (ingrediente_id)"),
+        ("ix_pedido_item_pedido_menu",
+         "CREATE INDEX ix_pedido_item_pedido_menu ON pedido_item (pedido_id, menu_id)"),
+        ("ix_pedido_item_menu_id", "CREATE INDEX ix_pedido_item_menu_id ON pedido_item (menu_id)"),
+        ("ix_pedido_cliente_id", "CREATE INDEX ix_pedido_cliente_id ON pedido (cliente_id)"),
+        ("ix_pedido_fecha", "CREATE INDEX ix_pedido_fecha ON pedido (fecha)"),
+    ):
+        if nombre not in existentes:
+            conn.execute(text(sentencia))
+
+
+def _columnas(conn, tabla):
+    return {fila[1] for fila in conn.execute(text(f"PRAGMA table_info({tabla})"))}
+
+
+def _indices(conn):
+    return {fila[0] for fila in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+
+
+# -------------------------
+#   PEDIDO.FECHA_HORA (DATETIME)
+# -------------------------
+def _fecha_hora_pedido(conn):
+    if "fecha_hora" not in _columnas(conn, "pedido"):
+        conn.execute(text("ALTER TABLE pedido ADD COLUMN fecha_hora DATETIME"))
+    # Los pedidos antiguos solo tienen el día: se registran a medianoche
+    if conn.execute(text("SELECT 1 FROM pedido WHERE fecha_hora IS NULL LIMIT 1")).first():
+        conn.execute(text(
+            "UPDATE pedido SET fecha_hora = fecha || ' 00:00:00.000000' WHERE fecha_hora IS NULL"
+        ))
+    if "ix_pedido_fecha_hora" not in _indices(conn):
+        conn.execute(text("CREATE INDEX ix_pedido_fecha_hora ON pedido (fecha_hora)"))
+
+
+# -------------------------
+#   PRECIOS Y TOTALES GUARDADOS
+# -------------------------
+def _precios_y_totales(conn):
+    if "precio_unitario" not in _columnas(conn, "pedido_item"):
+        conn.execute(text("ALTER TABLE pedido_item ADD COLUMN precio_unitario INTEGER NOT NULL DEFAULT 0"))
+        # Los ítems antiguos no guardaron su precio: se usa el precio actual del menú
+        conn.execute(text("""
+            UPDATE pedido_item
+            SET precio_unitario = COALESCE((SELECT precio FROM menu WHERE menu.id = pedido_item.menu_id), 0)
+        """))
+    if "subtotal" not in _columnas(conn, "pedido"):
+        for columna in ("subtotal", "iva", "total"):
+            conn.execute(text(f"ALTER TABLE pedido ADD COLUMN {columna} INTEGER NOT NULL DEFAULT 0"))
+        from crud.pedido_crud import calcular_montos
+        filas = conn.execute(text("""
+            SELECT pedido_id, SUM(precio_unitario * cantidad)
+            FROM pedido_item GROUP BY pedido_id
+        """)).all()
+        montos = []
+        for pedido_id, subtotal in filas:
+            subtotal, iva, total = calcular_montos(subtotal)
+            montos.append({"id": pedido_id, "subtotal": subtotal, "iva": iva, "total": total})
+        if montos:
+            conn.execute(
+                text("UPDATE pedido SET subtotal = :subtotal, iva = :iva, total = :total WHERE id = :id"),
+                montos,
+            )
+
+
+# -------------------------
+#   RESUMEN DE VENTAS DIARIAS
+# -------------------------
+def _resumen_ventas(conn):
+    # create_all ya creó las tablas; si están vacías pero hay pedidos, se
+    # llenan una vez desde el historial (ver reconstruir_ventas.py)
+    hay_resumen = conn.execute(text("SELECT 1 FROM ventas_diarias LIMIT 1")).first()
+    hay_pedidos = conn.execute(text("SELECT 1 FROM pedido LIMIT 1")).first()
+    if hay_resumen or not hay_pedidos:
+        return
+    from sqlalchemy.orm import Session
+    from crud.ventas_crud import reconstruir_ventas
+    with Session(bind=conn, join_transaction_mode="create_savepoint") as db:
+        reconstruir_ventas(db)
+
+
+# -------------------------
+#   VERSIÓN DE FILAS (CONCURRENCIA OPTIMISTA)
+# -------------------------
+def _version_filas(conn):
+    for tabla in ("ingrediente", "menu"):
+        if "version" not in _columnas(conn, tabla):
+            conn.execute(text(f"ALTER TABLE {tabla} ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+
+# -------------------------
+#   MENU.IMAGEN (RUTA RESUELTA)
+# -------------------------
+def _imagen_menu(conn):
+    if "imagen" not in _columnas(conn, "menu"):
+        conn.execute(text("ALTER TABLE menu ADD COLUMN imagen VARCHAR"))
+
+
+# -------------------------
+#   CLIENTE.CORREO_NORMALIZADO
+# -------------------------
+def _correo_normalizado(conn):
+    if "correo_normalizado" not in _columnas(conn, "cliente"):
+        conn.execute(text("ALTER TABLE cliente ADD COLUMN correo_normalizado VARCHAR COLLATE NOCASE"))
+    from models import normalizar_correo
+    pendientes = conn.execute(text(
+        "SELECT id, correo FROM cliente WHERE correo_normalizado IS NULL ORDER BY id"
+    )).all()
+    if pendientes:
+        usados = {fila[0] for fila in conn.execute(text(
+            "SELECT correo_normalizado FROM cliente WHERE correo_normalizado IS NOT NULL"
+        ))}
+        valores = []
+        for cliente_id, correo in pendientes:
+            normalizado = normalizar_correo(correo)
+            # Clientes antiguos que solo difieren en mayúsculas: el más antiguo
+            # queda con el correo normalizado y los demás en NULL (se siguen
+            # listando, pero la búsqueda por correo encuentra al primero)
+            if normalizado in usados:
+                continue
+            usados.add(normalizado)
+            valores.append({"id": cliente_id, "normalizado": normalizado})
+        if valores:
+            conn.execute(text("UPDATE cliente SET correo_normalizado = :normalizado WHERE id = :id"), valores)
+    if "ux_cliente_correo_normalizado" not in _indices(conn):
+        conn.execute(text(
+            "CREATE UNIQUE INDEX ux_cliente_correo_normalizado ON cliente (correo_normalizado)"
+        ))
+
+
+MIGRACIONES = [
+    _indices_tablas_union,
+    _fecha_hora_pedido,
+    _precios_y_totales,
+    _resumen_ventas,
+    _version_filas,
+    _imagen_menu,
+    _correo_normalizado,
+]
+
+
+def _estado(conn):
+    # Cambia si se alteró el esquema (schema_version) o alguna fila
+    # (total_changes cuenta las filas escritas por esta conexión)
+    return (
+        conn.execute(text("PRAGMA schema_version")).scalar(),
+        conn.execute(text("SELECT total_changes()")).scalar(),
+    )
+
+
+def aplicar_migraciones(engine):
+    """
+    Ejecuta todas las migraciones en una sola transacción. La transacción
+    solo escribe si alguna migración tenía algo pendiente.
+    """
+    with engine.begin() as conn:
+        antes = _estado(conn)
+        for migracion in MIGRACIONES:
+            migracion(conn)
+        # Actualizar estadísticas para que el planificador use los índices
+        # nuevos; si nada cambió no hay nada que analizar
+        if _estado(conn) != antes:
+            conn.execute(text("PRAGMA optimize"))
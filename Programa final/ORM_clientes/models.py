@@ -1,7 +1,10 @@
 # models.py
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, event, inspect
 from sqlalchemy.orm import relationship
-from database import Base, engine
+import database
+from database import Base
 
 
 # -------------------------
@@ -9,14 +12,41 @@ from database import Base, engine
 # -------------------------
 class Cliente(Base):
     __tablename__ = "cliente"
+    __table_args__ = (
+        # La unicidad del correo la decide este índice (sin SELECT previo):
+        # "Ana@X.cl" y "ana@x.cl" son el mismo cliente
+        Index("ux_cliente_correo_normalizado", "correo_normalizado", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String, nullable=False)
-    correo = Column(String, nullable=False, unique=True)
+    correo = Column(String, nullable=False, unique=True)  # tal como se escribió
+    # Lo llena _normalizar_correo_cliente; NOCASE para que las búsquedas
+    # usen el índice aunque no se normalice el valor buscado
+    correo_normalizado = Column(String(collation="NOCASE"), nullable=True)
 
     pedidos = relationship("Pedido", back_populates="cliente")
 
 
+def normalizar_correo(correo):
+    """Forma canónica para comparar correos: sin espacios y en minúsculas."""
+    return correo.strip().lower() if correo else correo
+
+
+@event.listens_for(Cliente, "before_insert")
+def _normalizar_correo_cliente(mapper, connection, cliente):
+    cliente.correo_normalizado = normalizar_correo(cliente.correo)
+
+
+@event.listens_for(Cliente, "before_update")
+def _renormalizar_correo_cliente(mapper, connection, cliente):
+    # Solo si cambió el correo: los clientes antiguos que quedaron con
+    # correo_normalizado NULL (duplicados por mayúsculas) se pueden seguir
+    # editando mientras no se toque su correo
+    if inspect(cliente).attrs.correo.history.has_changes():
+        cliente.correo_normalizado = normalizar_correo(cliente.correo)
+
+
 # -------------------------
 #       INGREDIENTE
 # -------------------------
@@ -27,9 +57,14 @@ class Ingrediente(Base):
     nombre = Column(String, nullable=False, unique=True)
     unidad = Column(String, nullable=False)
     cantidad = Column(Float, nullable=False)
+    # Control de concurrencia optimista: cada UPDATE exige la versión leída
+    # y la incrementa; si otra terminal la cambió antes se lanza StaleDataError
+    version = Column(Integer, nullable=False, server_default="1")
 
     menus = relationship("MenuIngrediente", back_populates="ingrediente")
 
+    __mapper_args__ = {"version_id_col": version}
+
 
 # -------------------------
 #       MENU
@@ -41,24 +76,37 @@ class Menu(Base):
     nombre = Column(String, nullable=False, unique=True)
     precio = Column(Integer, nullable=False)
     descripcion = Column(String, nullable=True)
+    # Ruta de la imagen resuelta por utils/ImagenesMenu.py ("" = sin imagen,
+    # NULL = aún no se busca)
+    imagen = Column(String, nullable=True)
+    version = Column(Integer, nullable=False, server_default="1")
 
     ingredientes = relationship("MenuIngrediente", back_populates="menu")
     items = relationship("PedidoItem", back_populates="menu")
 
+    __mapper_args__ = {"version_id_col": version}
+
 
 # -------------------------
 #   MENU - INGREDIENTE
 # -------------------------
 class MenuIngrediente(Base):
     __tablename__ = "menu_ingrediente"
+    __table_args__ = (
+        # Un ingrediente aparece una sola vez por menú; el índice también
+        # sirve para buscar la receta completa por menu_id
+        Index("ux_menu_ingrediente_menu_ingrediente", "menu_id", "ingrediente_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     menu_id = Column(Integer, ForeignKey("menu.id"))
-    ingrediente_id = Column(Integer, ForeignKey("ingrediente.id"))
+    ingrediente_id = Column(Integer, ForeignKey("ingrediente.id"), index=True)
     cantidad = Column(Float, nullable=False)
 
     menu = relationship("Menu", back_populates="ingredientes")
-    ingrediente = relationship("Ingrediente", back_populates="menus")
+    # Una línea de receta siempre se usa con su ingrediente: se carga en el
+    # mismo SELECT (LEFT OUTER JOIN) en vez de una consulta por línea
+    ingrediente = relationship("Ingrediente", back_populates="menus", lazy="joined")
 
 
 # -------------------------
@@ -68,30 +116,94 @@ class Pedido(Base):
     __tablename__ = "pedido"
 
     id = Column(Integer, primary_key=True, index=True)
-    cliente_id = Column(Integer, ForeignKey("cliente.id"))
-    fecha = Column(String, nullable=False)  # Guardar fecha como string (YYYY-MM-DD)
+    cliente_id = Column(Integer, ForeignKey("cliente.id"), index=True)
+    # Fecha y hora reales del pedido; los reportes filtran y agrupan por aquí
+    fecha_hora = Column(DateTime, nullable=False, index=True)
+    # Copia "YYYY-MM-DD" de fecha_hora, se mantiene por compatibilidad de lectura
+    fecha = Column(String, nullable=False, index=True)
+    # Montos guardados al crear el pedido (no cambian si cambia Menu.precio)
+    subtotal = Column(Integer, nullable=False, server_default="0")
+    iva = Column(Integer, nullable=False, server_default="0")
+    total = Column(Integer, nullable=False, server_default="0")
 
     cliente = relationship("Cliente", back_populates="pedidos")
     items = relationship("PedidoItem", back_populates="pedido")
 
 
+@event.listens_for(Pedido, "before_insert")
+@event.listens_for(Pedido, "before_update")
+def _sincronizar_fecha_pedido(mapper, connection, pedido):
+    """Mantiene fecha (string) y fecha_hora (DateTime) coherentes."""
+    estado = inspect(pedido)
+    cambio_fecha = estado.attrs.fecha.history.has_changes()
+    cambio_fecha_hora = estado.attrs.fecha_hora.history.has_changes()
+    if pedido.fecha_hora is None or (cambio_fecha and not cambio_fecha_hora and pedido.fecha):
+        pedido.fecha_hora = datetime.strptime(pedido.fecha, "%Y-%m-%d") if pedido.fecha else datetime.now()
+    pedido.fecha = pedido.fecha_hora.strftime("%Y-%m-%d")
+
+
 # -------------------------
 #     PEDIDO - ITEM
 # -------------------------
 class PedidoItem(Base):
     __tablename__ = "pedido_item"
+    __table_args__ = (
+        Index("ix_pedido_item_pedido_menu", "pedido_id", "menu_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     pedido_id = Column(Integer, ForeignKey("pedido.id"))
-    menu_id = Column(Integer, ForeignKey("menu.id"))
+    menu_id = Column(Integer, ForeignKey("menu.id"), index=True)
     cantidad = Column(Integer, nullable=False)
+    precio_unitario = Column(Integer, nullable=False, server_default="0")  # precio del menú al vender
 
     pedido = relationship("Pedido", back_populates="items")
-    menu = relationship("Menu", back_populates="items")
+    # Igual que MenuIngrediente.ingrediente: el menú viene en el mismo SELECT
+    menu = relationship("Menu", back_populates="items", lazy="joined")
+
+
+# -------------------------
+#   RESUMEN DE VENTAS DIARIAS
+# -------------------------
+# Se actualizan en la misma transacción que crea o elimina cada pedido
+# (crud/ventas_crud.py); los gráficos diarios y mensuales leen de aquí.
+class VentaDiaria(Base):
+    __tablename__ = "ventas_diarias"
+
+    fecha = Column(String, primary_key=True)  # YYYY-MM-DD
+    pedidos = Column(Integer, nullable=False, default=0)
+    subtotal = Column(Integer, nullable=False, default=0)
+    iva = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)
+
+
+class VentaDiariaMenu(Base):
+    __tablename__ = "ventas_diarias_menu"
+
+    fecha = Column(String, primary_key=True)  # YYYY-MM-DD
+    menu_id = Column(Integer, ForeignKey("menu.id"), primary_key=True, index=True)
+    cantidad = Column(Integer, nullable=False, default=0)
+    subtotal = Column(Integer, nullable=False, default=0)
+
+
+# -------------------------
+#   METADATOS DE LA BASE
+# -------------------------
+# Pares clave/valor internos de la aplicación (por ejemplo la huella de los
+# datos iniciales ya cargados)
+class Metadato(Base):
+    __tablename__ = "metadato"
+
+    clave = Column(String, primary_key=True)
+    valor = Column(String, nullable=True)
 
 
 # -------------------------
 #   CREAR TABLAS
 # -------------------------
-def crear_base():
+def crear_base(engine=None):
+    from migraciones import aplicar_migraciones
+    engine = engine if engine is not None else database.engine
     Base.metadata.create_all(bind=engine)
+    # create_all no toca tablas existentes: las migraciones agregan lo que falte
+    aplicar_migraciones(engine)
@@ -0,0 +1,17 @@
+# reconstruir_ventas.py
+"""
+Recalcula las tablas de resumen ventas_diarias y ventas_diarias_menu a
+partir de todos los pedidos existentes.
+
+Uso:
+    python reconstruir_ventas.py
+"""
+from database import unidad_de_trabajo
+from models import crear_base
+from crud.ventas_crud import reconstruir_ventas
+
+if __name__ == "__main__":
+    crear_base()
+    with unidad_de_trabajo() as db:
+        dias = reconstruir_ventas(db)
+    print(f"Resumen de ventas reconstruido: {dias} días.")
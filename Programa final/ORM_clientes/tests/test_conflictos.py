@@ -0,0 +1,92 @@
+# test_conflictos.py
+"""
+Dos sesiones (dos terminales) editan la misma fila: la segunda escritura
+que fija valores debe detectarse con ConflictoVersion y no pisar la
+primera.
+
+Uso (desde ORM_clientes):
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import database
+from database import ConflictoVersion, crear_engine, unidad_de_trabajo
+from crud.ingrediente_crud import crear_ingrediente, obtener_por_nombre, sumar_stock
+from crud.menu_crud import guardar_menu, obtener_menu_por_nombre
+from models import Ingrediente, Menu, crear_base
+
+
+@pytest.fixture
+def base(tmp_path):
+    anterior = database.engine
+    database.configurar_engine(crear_engine(f"sqlite:///{tmp_path / 'conflictos.db'}"))
+    crear_base()
+    with unidad_de_trabajo() as db:
+        db.add(Ingrediente(nombre="tomate", unidad="kg", cantidad=10))
+        db.add(Menu(nombre="completo", precio=2000))
+    yield
+    database.engine.dispose()
+    database.configurar_engine(anterior)
+
+
+def _cantidad(nombre):
+    with unidad_de_trabajo() as db:
+        return obtener_por_nombre(db, nombre).cantidad
+
+
+def test_version_leida_desactualizada(base):
+    with unidad_de_trabajo() as a:
+        version = obtener_por_nombre(a, "tomate").version
+    with unidad_de_trabajo() as b:
+        crear_ingrediente(b, "tomate", "kg", 20)
+
+    with unidad_de_trabajo() as a:
+        with pytest.raises(ConflictoVersion):
+            crear_ingrediente(a, "tomate", "kg", 5, version=version)
+    assert _cantidad("tomate") == 20
+
+
+def test_cambio_entre_lectura_y_commit_no_se_reintenta(base):
+    with unidad_de_trabajo() as a, unidad_de_trabajo() as b:
+        # a ya tiene la fila en su sesión cuando b la modifica
+        tomate = obtener_por_nombre(a, "tomate")
+        crear_ingrediente(b, "tomate", "kg", 20)
+        with pytest.raises(ConflictoVersion):
+            crear_ingrediente(a, "tomate", "kg", 5)
+        # El rollback expiró la fila: a ve el valor de b
+        assert tomate.cantidad == 20
+    assert _cantidad("tomate") == 20
+
+
+def test_version_vigente_se_guarda(base):
+    with unidad_de_trabajo() as a:
+        version = obtener_por_nombre(a, "tomate").version
+        ing = crear_ingrediente(a, "tomate", "kg", 5, version=version)
+    assert ing.version == version + 1
+    assert _cantidad("tomate") == 5
+
+
+def test_sumar_stock_sigue_reintentando(base):
+    with unidad_de_trabajo() as a, unidad_de_trabajo() as b:
+        tomate = obtener_por_nombre(a, "tomate")
+        sumar_stock(b, "tomate", 1)
+        # La suma es relativa: se repite con la cantidad nueva
+        assert sumar_stock(a, "tomate", 1) is tomate
+    assert _cantidad("tomate") == 12
+
+
+def test_guardar_menu_version_desactualizada(base):
+    with unidad_de_trabajo() as a:
+        version = obtener_menu_por_nombre(a, "completo").version
+    with unidad_de_trabajo() as b:
+        guardar_menu(b, "completo", 2500)
+
+    with unidad_de_trabajo() as a:
+        with pytest.raises(ConflictoVersion):
+            guardar_menu(a, "completo", 1500, version=version)
+        assert obtener_menu_por_nombre(a, "completo").precio == 2500
@@ -0,0 +1,47 @@
+# test_consultas.py
+"""
+Un test por cada máximo de consultas de benchmarks/verificar_consultas.py,
+sobre una base SQLite en memoria. Si una lectura vuelve a ser N+1 el test
+falla con la cantidad de sentencias que ejecutó.
+
+Uso (desde ORM_clientes):
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import select
+
+import database
+from database import unidad_de_trabajo
+from benchmarks.verificar_consultas import casos, contar_consultas, preparar
+
+MENUS, INGREDIENTES, PEDIDOS = 12, 4, 15
+
+CASOS = {nombre: (funcion, maximo, validar)
+         for nombre, funcion, maximo, validar in casos(MENUS, INGREDIENTES, PEDIDOS)}
+
+
+@pytest.fixture(scope="module")
+def engine():
+    anterior = database.engine
+    preparar("sqlite://", MENUS, INGREDIENTES, PEDIDOS)
+    yield database.engine
+    database.engine.dispose()
+    database.configurar_engine(anterior)
+
+
+@pytest.mark.parametrize("nombre", list(CASOS))
+def test_maximo_de_consultas(engine, nombre):
+    funcion, maximo, validar = CASOS[nombre]
+    with unidad_de_trabajo() as db:
+        # Abrir la transacción antes de contar
+        db.execute(select(1))
+        with contar_consultas(engine) as contador:
+            resultado = funcion(db)
+
+    assert contador[0] <= maximo, f"{nombre}: {contador[0]} consultas > {maximo}"
+    assert validar(resultado), f"{nombre}: resultado inesperado"
@@ -0,0 +1,117 @@
+# ImagenesMenu.py
+# -------------------------------------------------------------------------
+#   Resolución menú -> archivo de imagen, guardada en Menu.imagen
+# -------------------------------------------------------------------------
+
+import os
+
+from sqlalchemy import bindparam, select, update
+
+from models import Menu
+from crud.metadato_crud import obtener_metadato, guardar_metadato
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXTENSIONES = (".png", ".jpg", ".jpeg")
+
+# Clave en la tabla metadato con el mtime de los directorios ya indexados
+CLAVE_FIRMA_IMAGENES = "imagenes_menus_firma"
+
+
+def firma_directorios(directorios):
+    """Cambia cuando se agrega, borra o renombra un archivo en algún directorio."""
+    partes = []
+    for d in directorios:
+        try:
+            partes.append(f"{os.path.abspath(d)}:{os.stat(d).st_mtime_ns}")
+        except OSError:
+            partes.append(f"{os.path.abspath(d)}:-")
+    return "|".join(partes)
+
+
+def indice_archivos(directorios):
+    """
+    Una pasada de os.scandir por directorio. Retorna (por_nombre, archivos):
+    por_nombre = {"hamburguesa.jpg": ruta} (en minúsculas, gana el primer
+    directorio) y archivos = [(nombre_en_minusculas, ruta)] en orden.
+    """
+    por_nombre = {}
+    archivos = []
+    for d in directorios:
+        try:
+            entradas = list(os.scandir(d))
+        except OSError:
+            continue
+        for e in entradas:
+            nombre = e.name.lower()
+            if not nombre.endswith(EXTENSIONES) or not e.is_file():
+                continue
+            archivos.append((nombre, e.path))
+            por_nombre.setdefault(nombre, e.path)
+    return por_nombre, archivos
+
+
+def buscar_imagen(nombre_menu, indice):
+    """
+    Igual criterio que antes: primero el nombre del menú con espacios, "_",
+    "-" o sin separador y extensión png/jpg/jpeg; si no, el primer archivo
+    que contenga alguna palabra (de más de 2 letras) del nombre.
+    Retorna la ruta o "" si no hay imagen.
+    """
+    por_nombre, archivos = indice
+    base = nombre_menu.strip().lower()
+    for variante in (base, base.replace(" ", "_"), base.replace(" ", "-"), base.replace(" ", "")):
+        for ext in EXTENSIONES:
+            ruta = por_nombre.get(variante + ext)
+            if ruta:
+                return ruta
+
+    tokens = [t for t in base.replace("-", " ").replace("_", " ").split() if len(t) > 2]
+    for nombre, ruta in archivos:
+        if any(tok in nombre for tok in tokens):
+            return ruta
+    return ""
+
+
+def _guardar_ruta(ruta):
+    # Relativa a la carpeta de la aplicación si está dentro de ella, para que
+    # la base siga sirviendo si se mueve el proyecto
+    if not ruta:
+        return ""
+    relativa = os.path.relpath(ruta, BASE_DIR)
+    return ruta if relativa.startswith("..") else relativa
+
+
+def resolver_imagenes(db, directorios):
+    """
+    Retorna {nombre_menu: ruta_absoluta} de los menús con imagen.
+    Menu.imagen guarda la ruta resuelta ("" = sin imagen, NULL = sin
+    resolver). Solo se recorren los directorios si cambió su mtime desde la
+    última vez o si hay menús nuevos sin resolver.
+    """
+    firma = firma_directorios(directorios)
+    cambio = obtener_metadato(db, CLAVE_FIRMA_IMAGENES) != firma
+
+    menus = db.execute(select(Menu.id, Menu.nombre, Menu.imagen)).all()
+    pendientes = [m for m in menus if cambio or m.imagen is None]
+
+    resueltas = {m.id: m.imagen for m in menus}
+    if pendientes:
+        indice = indice_archivos(directorios)
+        cambios = [
+            {"b_id": m.id, "b_imagen": _guardar_ruta(buscar_imagen(m.nombre, indice))}
+            for m in pendientes
+        ]
+        tabla = Menu.__table__
+        db.execute(
+            update(tabla).where(tabla.c.id == bindparam("b_id")).values(imagen=bindparam("b_imagen")),
+            cambios,
+        )
+        resueltas.update((c["b_id"], c["b_imagen"]) for c in cambios)
+        if cambio:
+            guardar_metadato(db, CLAVE_FIRMA_IMAGENES, firma)
+        db.commit()
+
+    return {
+        m.nombre: os.path.join(BASE_DIR, resueltas[m.id])
+        for m in menus if resueltas[m.id]
+    }
@@ -0,0 +1,63 @@
+# LectorCSV.py
+# -------------------------------------------------------------------------
+#   Lectura de CSV por partes (archivos de proveedores muy grandes)
+# -------------------------------------------------------------------------
+
+import codecs
+import csv
+import os
+from itertools import islice
+
+
+class LectorCSV:
+    def __init__(self, ruta, columnas):
+        """
+        ruta: archivo CSV con encabezado
+        columnas: nombres de columna a extraer, en orden, ej: ("nombre", "unidad", "cantidad")
+        Si el encabezado no trae esos nombres se usan las primeras columnas
+        por posición.
+        """
+        self.ruta = ruta
+        self.columnas = tuple(columnas)
+        self.total_bytes = os.path.getsize(ruta)
+        self.bytes_leidos = 0
+
+    def progreso(self):
+        """Fracción del archivo ya leída (0.0 a 1.0)."""
+        if not self.total_bytes:
+            return 1.0
+        return min(1.0, self.bytes_leidos / self.total_bytes)
+
+    def _contar_bytes(self, f):
+        for linea in f:
+            self.bytes_leidos += len(linea)
+            yield linea
+
+    def _indices(self, hdr):
+        hdr = [h.strip().lower() for h in hdr]
+        if all(c in hdr for c in self.columnas):
+            return [hdr.index(c) for c in self.columnas]
+        return list(range(len(self.columnas)))
+
+    def filas(self):
+        """
+        Generador de tuplas (una por fila, sin el encabezado) con los valores
+        de self.columnas ya sin espacios. Las filas vacías se omiten y las
+        columnas que faltan quedan como "". Nunca hay más de una línea del
+        archivo en memoria.
+        """
+        self.bytes_leidos = 0
+        with open(self.ruta, "rb") as f:
+            reader = csv.reader(codecs.iterdecode(self._contar_bytes(f), "utf-8-sig"))
+            hdr = next(reader, None)
+            if hdr is None:
+                return
+            indices = self._indices(hdr)
+            for r in reader:
+                if not r:
+                    continue
+                yield tuple((r[i] if i < len(r) else "").strip() for i in indices)
+
+    def vista_previa(self, n):
+        """Primeras n filas, sin leer el resto del archivo."""
+        return list(islice(self.filas(), n))
@@ -52,9 +52,11 @@ def generar_carta_pdf(ruta_salida: str, menus_disponibles: List[str], db,
     y = top_y - 1.1*cm
     alt = True
 
-    from models import Menu as MenuDB
+    # Todos los menús en una pasada en vez de una consulta por fila
+    from crud.menu_crud import iterar_menus
+    menus_db = {m.nombre: m for m in iterar_menus(db)}
     for nombre_menu in menus_disponibles:
-        menu_obj = db.query(MenuDB).filter_by(nombre=nombre_menu).first()
+        menu_obj = menus_db.get(nombre_menu)
         if not menu_obj:
             continue
         if y < 4*cm:  # salto de página
@@ -0,0 +1,72 @@
+# Miniaturas.py
+# -------------------------------------------------------------------------
+#   Miniaturas de los menús con caché en disco y decodificación en paralelo
+# -------------------------------------------------------------------------
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIR_CACHE = os.environ.get("MINIATURAS_CACHE_DIR", os.path.join(BASE_DIR, ".cache", "miniaturas"))
+
+
+def _ruta_cache(ruta, tamano):
+    # La clave cambia si la imagen se modifica (mtime/tamaño) o si se pide
+    # otro tamaño de miniatura
+    st = os.stat(ruta)
+    clave = f"{os.path.abspath(ruta)}|{st.st_mtime_ns}|{st.st_size}|{tamano[0]}x{tamano[1]}"
+    return os.path.join(DIR_CACHE, hashlib.sha1(clave.encode("utf-8")).hexdigest() + ".png")
+
+
+def _guardar_en_cache(img, destino):
+    try:
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        # Se escribe a un temporal y se renombra: otro proceso nunca lee un PNG a medias
+        temporal = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+        img.save(temporal, "PNG")
+        os.replace(temporal, destino)
+    except OSError:
+        pass  # sin permiso de escritura: se decodificará de nuevo la próxima vez
+
+
+def miniatura(ruta, tamano):
+    """
+    Retorna la imagen (PIL, RGBA) de 'ruta' reducida a 'tamano' (ancho, alto).
+    Usa la copia en caché si existe; si no, decodifica el original y la guarda.
+    """
+    cache = _ruta_cache(ruta, tamano)
+    if os.path.exists(cache):
+        try:
+            img = Image.open(cache)
+            img.load()
+            return img
+        except OSError:
+            pass  # caché dañada: se regenera
+
+    with Image.open(ruta) as original:
+        # En JPEG, draft() decodifica directamente a 1/2, 1/4 u 1/8 de la
+        # resolución: el costo ya no crece con el tamaño de la foto
+        original.draft("RGB", (tamano[0] * 2, tamano[1] * 2))
+        img = original.convert("RGBA").resize(tamano, Image.LANCZOS)
+    _guardar_en_cache(img, cache)
+    return img
+
+
+def decodificar_miniaturas(rutas, tamano, hilos=None):
+    """
+    rutas: {clave: ruta_imagen}
+    Retorna {clave: Future} con la miniatura PIL de cada imagen, decodificada
+    en un pool de hilos. No crea objetos de Tk: eso debe hacerse en el hilo
+    principal cuando los Future terminan.
+    """
+    pool = ThreadPoolExecutor(
+        max_workers=hilos or min(4, os.cpu_count() or 1),
+        thread_name_prefix="miniaturas",
+    )
+    futuros = {clave: pool.submit(miniatura, ruta, tamano) for clave, ruta in rutas.items()}
+    pool.shutdown(wait=False)
+    return futuros